@@ -0,0 +1,246 @@
+"""Resized copies of the recipe images, rendered in the background.
+
+Once a new recipe image is committed, the :func:`render_variants` job
+renders it at every size of settings.RECIPE_IMAGE_SIZES (longest side in
+pixels, never enlarged) in every format of RECIPE_IMAGE_FORMATS. The
+copies are turned upright and carry no EXIF metadata, so no camera or
+location details of the original leak through them. Decoding and
+encoding hold the GIL, so the run_workers threads hand them to a pool of
+RECIPE_IMAGE_WORKERS processes of their own process, and at most that
+many render jobs run at once. With 0 the worker thread renders itself.
+"""
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Optional
+
+import django
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from recipe_menu.adapters import jobs, list_cache, repository
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {"jpeg": "jpg", "webp": "webp"}
+QUALITY = 80
+
+_lock = threading.Lock()
+_processes: Optional[ProcessPoolExecutor] = None
+
+
+def _has_alpha(image: Image.Image) -> bool:
+    return "A" in image.getbands() or "transparency" in image.info
+
+
+def _encode(
+    image: Image.Image, format: str, icc_profile: Optional[bytes]
+) -> bytes:
+    if format == "jpeg":
+        if _has_alpha(image):
+            # JPEG has no alpha channel, transparent areas turn white
+            rgba = image.convert("RGBA")
+            image = Image.new("RGB", rgba.size, "white")
+            image.paste(rgba, mask=rgba.getchannel("A"))
+
+        elif image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+
+        options = {"progressive": True, "optimize": True}
+
+    else:
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if _has_alpha(image) else "RGB")
+
+        options = {"method": 4}
+
+    buffer = io.BytesIO()
+    # only what is passed here is written, the EXIF block is left out
+    image.save(
+        buffer,
+        format,
+        quality=QUALITY,
+        icc_profile=icc_profile,
+        **options,
+    )
+
+    return buffer.getvalue()
+
+
+def render(
+    data: bytes, sizes: dict[str, int], formats: Iterable[str]
+) -> dict[str, dict[str, bytes]]:
+    """Encode the image ``data`` at each of ``sizes`` in each format."""
+    with Image.open(io.BytesIO(data)) as original:
+        largest = max(sizes.values())
+        # a JPEG is decoded at 1/2, 1/4 or 1/8 of its size when that still
+        # covers the largest variant, far less work than decoding it whole
+        original.draft("RGB", (largest, largest))
+        icc_profile = original.info.get("icc_profile")
+        image = ImageOps.exif_transpose(original)
+
+    variants = {}
+
+    # each size is resized from the one above it rather than the original
+    for name, size in sorted(sizes.items(), key=lambda item: -item[1]):
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        variants[name] = {
+            format: _encode(image, format, icc_profile) for format in formats
+        }
+
+    return variants
+
+
+def _pool() -> ProcessPoolExecutor:
+    global _processes
+
+    with _lock:
+        if _processes is None:
+            # spawned, forking a process that runs threads is unsafe
+            _processes = ProcessPoolExecutor(
+                max_workers=settings.RECIPE_IMAGE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            )
+
+        return _processes
+
+
+def _render(
+    data: bytes, sizes: dict[str, int], formats: Iterable[str]
+) -> dict[str, dict[str, bytes]]:
+    if settings.RECIPE_IMAGE_WORKERS <= 0:
+        return render(data, sizes, formats)
+
+    return _pool().submit(render, data, sizes, formats).result()
+
+
+def shutdown(wait: bool = True) -> None:
+    global _processes
+
+    with _lock:
+        processes, _processes = _processes, None
+
+    if processes is not None:
+        processes.shutdown(wait=wait)
+
+
+def _forget_pool() -> None:
+    # the pool of the parent is not usable from a forked child
+    global _processes, _lock
+
+    _processes = None
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_pool)
+
+
+def _stem(image: str) -> str:
+    # the content hash for images named after theirs
+    stem, _ = os.path.splitext(os.path.basename(image))
+    return stem
+
+
+def _variants_directory(image: str) -> str:
+    return (
+        f"{settings.RECIPE_MODEL_IMAGEFIELD_LOCATION}/variants/{_stem(image)}"
+    )
+
+
+def _variant_path(image: str, name: str, size: int, format: str) -> str:
+    # the rendering parameters are part of the name, with the content hash
+    # of the directory it pins the bytes of the file, which clients keep
+    # for good (core/media.py). A change of size or quality renders anew
+    stem = f"{name}-{size}-q{QUALITY}"
+
+    return f"{_variants_directory(image)}/{stem}.{EXTENSIONS[format]}"
+
+
+@jobs.task(priority=10, concurrency=settings.RECIPE_IMAGE_WORKERS or None)
+def render_variants(recipe_id: int) -> Optional[dict[str, dict[str, str]]]:
+    """Render and record the variants of the current image of a recipe."""
+    repo = repository.RecipeRepository()
+    image, user_id = repo.get_image(recipe_id) or (None, None)
+
+    if not image:
+        return None
+
+    started = time.perf_counter()
+    storage = storages["recipe_images"]
+    variants = {
+        name: {
+            format: _variant_path(image, name, size, format)
+            for format in settings.RECIPE_IMAGE_FORMATS
+        }
+        for name, size in settings.RECIPE_IMAGE_SIZES.items()
+    }
+
+    # variants are named after the image they come from and how they were
+    # rendered, the ones of an image shown by another recipe already are
+    # there to reuse
+    if not all(
+        storage.exists(path)
+        for formats in variants.values()
+        for path in formats.values()
+    ):
+        with storage.open(image) as file:
+            rendered = _render(
+                file.read(),
+                settings.RECIPE_IMAGE_SIZES,
+                settings.RECIPE_IMAGE_FORMATS,
+            )
+
+        for name, encoded in rendered.items():
+            for format, content in encoded.items():
+                storage.save(variants[name][format], ContentFile(content))
+
+    with transaction.atomic():
+        recorded = repo.set_image_variants(recipe_id, image, variants)
+
+        if recorded:
+            # the recipe and the lists showing it now render the variants
+            repository.UserRepository().touch(user_id)
+            list_cache.invalidate(user_id)
+
+    if not recorded:
+        # the image was replaced meanwhile, drop what was just written
+        # unless another recipe shows the same image
+        release(image)
+        return None
+
+    logger.info(
+        "rendered the variants of %s in %.3fs",
+        image,
+        time.perf_counter() - started,
+    )
+
+    return variants
+
+
+@jobs.task()
+def release(image: str) -> None:
+    """Delete ``image`` and its variants unless a recipe still shows it."""
+    repo = repository.RecipeRepository()
+    storage = storages["recipe_images"]
+
+    with transaction.atomic():
+        repo.lock_image(_stem(image))
+
+        if repo.count_image_references(image):
+            return
+
+        directory = _variants_directory(image)
+
+        if storage.exists(directory):
+            for name in storage.listdir(directory)[1]:
+                storage.delete(f"{directory}/{name}")
+
+        storage.delete(image)
@@ -0,0 +1,262 @@
+"""Durable background jobs kept in the database.
+
+A job is queued with :func:`enqueue` in the caller's transaction, so it
+exists, and runs, only if the work that asked for it commits. Workers
+started by ``manage.py run_workers`` claim jobs with ``SELECT ... FOR
+UPDATE SKIP LOCKED``, highest priority first, and hold them for the
+task's timeout. A job still running past its timeout is taken to be lost
+with its worker and runs again, tasks must be safe to run twice.
+
+A task is a module-level function marked with :func:`task`, whose
+options set the priority of its jobs, how many attempts they get and how
+many of them may run at once across every worker. Jobs that used up
+their attempts stay behind, with their error, until :func:`prune`
+deletes them.
+"""
+import dataclasses
+import logging
+import threading
+import time
+import traceback
+from datetime import timedelta
+from typing import Callable, Optional
+
+from django.apps import apps as django_apps
+from django.db import close_old_connections, transaction
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from recipe_menu.adapters import repository
+
+logger = logging.getLogger(__name__)
+
+Job = django_apps.get_model("core.Job")
+
+
+@dataclasses.dataclass(frozen=True)
+class TaskOptions:
+    priority: int = 0
+    max_attempts: int = 3
+    # seconds before the first retry, doubled for each one after it
+    retry_delay: float = 10
+    # seconds a worker holds a job before it may run elsewhere again
+    timeout: float = 300
+    # jobs of the task running at once across every worker, None for any
+    concurrency: Optional[int] = None
+
+    def __post_init__(self):
+        # a job of a task allowed none at once would never be claimed
+        if self.concurrency is not None and self.concurrency < 1:
+            raise ValueError("concurrency must be at least 1 or None")
+
+
+DEFAULT_OPTIONS = TaskOptions()
+
+
+def task(**options) -> Callable:
+    """Mark a function as a task, with the :class:`TaskOptions` given."""
+
+    task_options = TaskOptions(**options)
+
+    def decorate(func: Callable) -> Callable:
+        func.task_options = task_options
+        return func
+
+    return decorate
+
+
+def _name(func: Callable) -> str:
+    return f"{func.__module__}.{func.__qualname__}"
+
+
+def _options(name: str) -> TaskOptions:
+    try:
+        return import_string(name).task_options
+
+    except (ImportError, AttributeError):
+        # fails when run, and is retried like any other failure
+        return DEFAULT_OPTIONS
+
+
+def enqueue(
+    func: Callable,
+    payload: Optional[dict] = None,
+    priority: Optional[int] = None,
+    delay: float = 0,
+) -> int:
+    """Queue ``func(**payload)``, in the transaction of the caller if any."""
+    options = getattr(func, "task_options", None)
+
+    if options is None:
+        raise TypeError(f"{_name(func)} is not marked with jobs.task")
+
+    job = Job.objects.create(
+        task=_name(func),
+        payload=payload or {},
+        priority=options.priority if priority is None else priority,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+    return job.id
+
+
+def _running(now) -> dict[str, int]:
+    return dict(
+        Job.objects.filter(
+            status=Job.Status.RUNNING, locked_until__gte=now
+        )
+        .values_list("task")
+        .annotate(count=Count("id"))
+    )
+
+
+def claim(worker: str) -> Optional[Job]:
+    """Take the next job due, None when there is none."""
+    now = timezone.now()
+
+    # jobs of lost workers go back in the queue
+    Job.objects.filter(
+        status=Job.Status.RUNNING, locked_until__lt=now
+    ).update(status=Job.Status.QUEUED, locked_by="", locked_until=None)
+
+    with transaction.atomic():
+        excluded = {
+            name
+            for name, count in _running(now).items()
+            if (limit := _options(name).concurrency) is not None
+            and count >= limit
+        }
+
+        while True:
+            job = (
+                Job.objects.select_for_update(skip_locked=True)
+                .filter(status=Job.Status.QUEUED, run_at__lte=now)
+                .exclude(task__in=excluded)
+                .order_by("-priority", "run_at", "id")
+                .first()
+            )
+
+            if job is None:
+                return None
+
+            options = _options(job.task)
+
+            if options.concurrency is None:
+                break
+
+            # claims of a limited task take turns, each one counting the
+            # jobs claimed before it
+            repository.advisory_lock(Job, f"jobs:{job.task}")
+
+            if _running(now).get(job.task, 0) < options.concurrency:
+                break
+
+            excluded.add(job.task)
+
+        job.status = Job.Status.RUNNING
+        job.attempts += 1
+        job.locked_by = worker
+        job.locked_until = now + timedelta(seconds=options.timeout)
+        job.save(
+            update_fields=["status", "attempts", "locked_by", "locked_until"]
+        )
+
+    return job
+
+
+def _finish(job: Job, error: Optional[str]) -> None:
+    # the worker no longer owns a job that timed out and was claimed again
+    owned = Job.objects.filter(
+        id=job.id, status=Job.Status.RUNNING, locked_by=job.locked_by
+    )
+
+    if error is None:
+        owned.delete()
+        return
+
+    options = _options(job.task)
+
+    if job.attempts >= options.max_attempts:
+        owned.update(status=Job.Status.FAILED, last_error=error)
+        return
+
+    owned.update(
+        status=Job.Status.QUEUED,
+        run_at=timezone.now()
+        + timedelta(seconds=options.retry_delay * 2 ** (job.attempts - 1)),
+        locked_by="",
+        locked_until=None,
+        last_error=error,
+    )
+
+
+def prune(older_than: timedelta) -> int:
+    """Delete the failed jobs last due ``older_than`` ago, returns how many."""
+    count, _ = Job.objects.filter(
+        status=Job.Status.FAILED, run_at__lt=timezone.now() - older_than
+    ).delete()
+
+    return count
+
+
+def run(job: Job) -> bool:
+    """Run a claimed job, True if it succeeded."""
+    started = time.perf_counter()
+
+    try:
+        import_string(job.task)(**job.payload)
+
+    except Exception:
+        logger.exception("job %s failed on attempt %d", job, job.attempts)
+        _finish(job, traceback.format_exc())
+        return False
+
+    logger.info("job %s done in %.3fs", job, time.perf_counter() - started)
+    _finish(job, None)
+
+    return True
+
+
+class Worker:
+    """Claims and runs jobs one at a time, in the thread calling it."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def run_once(self) -> bool:
+        """Run the next job due, False when there was none."""
+        if (job := claim(self.name)) is None:
+            return False
+
+        run(job)
+
+        return True
+
+    def drain(self) -> int:
+        """Run jobs until none is due, returns how many ran."""
+        count = 0
+
+        while self.run_once():
+            count += 1
+
+        return count
+
+    def run_forever(
+        self, stop: threading.Event, poll_interval: float = 1
+    ) -> None:
+        while not stop.is_set():
+            # the connection may have dropped or outlived its age since
+            # the last job
+            close_old_connections()
+
+            try:
+                idle = not self.run_once()
+
+            except Exception:
+                # the database went away, try again later
+                logger.exception("worker %s failed", self.name)
+                idle = True
+
+            if idle:
+                stop.wait(poll_interval)
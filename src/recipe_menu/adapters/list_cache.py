@@ -0,0 +1,52 @@
+import hashlib
+import time
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _generation_key(user_id: int) -> str:
+    return f"lists:generation:{user_id}"
+
+
+async def ageneration(user_id: int) -> int:
+    key = _generation_key(user_id)
+    value = await cache.aget(key)
+
+    if value is None:
+        # seeded from the clock instead of 0, so a counter that was evicted
+        # never comes back to a value older entries were stored under
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        value = await cache.aget(key)
+
+    return value
+
+
+def invalidate(user_id: int) -> None:
+    key = _generation_key(user_id)
+
+    def bump():
+        try:
+            cache.incr(key)
+
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+
+    # bumping before the write is visible would let a concurrent reader
+    # cache the old rows under the new generation
+    transaction.on_commit(bump)
+
+
+async def amake_key(user_id: int, scope: str, parts: tuple) -> str:
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return f"lists:{scope}:{user_id}:{await ageneration(user_id)}:{digest}"
+
+
+async def aload(key: str) -> Any:
+    return await cache.aget(key)
+
+
+async def astore(key: str, value: Any) -> None:
+    await cache.aset(key, value, settings.LIST_CACHE_TIMEOUT)
@@ -0,0 +1,177 @@
+import base64
+import binascii
+import json
+from typing import Optional
+
+from django.core.exceptions import ValidationError
+from django.db.models import Field, Q, QuerySet
+
+from recipe_menu.domain import model as domain_model
+
+NEXT = "n"
+PREV = "p"
+
+
+def ordering_keys(order_by: str) -> list[tuple[str, bool]]:
+    # every ordering gets the primary key as tie-breaker, so the position
+    # of a row is unique and pages never overlap or skip rows
+    field = order_by.lstrip("-")
+    descending = order_by.startswith("-")
+
+    if field in ("id", "pk"):
+        return [("id", descending)]
+
+    return [(field, descending), ("id", descending)]
+
+
+def encode_cursor(order_by: str, row, direction: str) -> str:
+    position = [getattr(row, field) for field, _ in ordering_keys(order_by)]
+    payload = json.dumps(
+        {"o": order_by, "p": position, "d": direction},
+        default=str,
+        separators=(",", ":"),
+    )
+
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def ordering_fields(queryset: QuerySet, order_by: str) -> list[Field]:
+    # the model field, or the annotation, behind each ordering key
+    return [
+        (
+            queryset.query.annotations[field].output_field
+            if field in queryset.query.annotations
+            else queryset.model._meta.get_field(field)
+        )
+        for field, _ in ordering_keys(order_by)
+    ]
+
+
+def decode_cursor(
+    cursor: str, order_by: str, fields: list[Field]
+) -> tuple[list, str]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        position, direction = payload["p"], payload["d"]
+
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise domain_model.InvalidPaginationError
+
+    # a cursor is only meaningful for the ordering it was issued for
+    if (
+        payload.get("o") != order_by
+        or direction not in (NEXT, PREV)
+        or not isinstance(position, list)
+        or len(position) != len(ordering_keys(order_by))
+    ):
+        raise domain_model.InvalidPaginationError
+
+    # the values are the client's to forge, each must be one its column
+    # can hold before it reaches a query
+    try:
+        position = [
+            field.to_python(value) for field, value in zip(fields, position)
+        ]
+
+    except (ValueError, TypeError, ValidationError):
+        raise domain_model.InvalidPaginationError
+
+    if None in position:
+        raise domain_model.InvalidPaginationError
+
+    return position, direction
+
+
+def _seek(keys: list[tuple[str, bool]], position: list, forward: bool) -> Q:
+    # (a, b) > (x, y)  ->  a > x OR (a = x AND b > y)
+    q = Q()
+
+    for index, (field, descending) in enumerate(keys):
+        lookup = "lt" if descending == forward else "gt"
+        condition = Q(**{f"{field}__{lookup}": position[index]})
+
+        for previous in range(index):
+            condition &= Q(**{keys[previous][0]: position[previous]})
+
+        q |= condition
+
+    return q
+
+
+def _page_query(
+    queryset: QuerySet,
+    order_by: str,
+    pagination: domain_model.PaginationObj,
+) -> tuple[QuerySet, str]:
+    keys = ordering_keys(order_by)
+    direction = NEXT
+
+    if pagination.cursor is not None:
+        position, direction = decode_cursor(
+            pagination.cursor,
+            order_by,
+            ordering_fields(queryset, order_by),
+        )
+        queryset = queryset.filter(
+            _seek(keys, position, forward=direction == NEXT)
+        )
+
+    ordering = [
+        f"-{field}" if descending == (direction == NEXT) else field
+        for field, descending in keys
+    ]
+
+    # fetch one extra row to learn whether there is a page after this one
+    return queryset.order_by(*ordering)[: pagination.page_size + 1], direction
+
+
+def _page(
+    rows: list,
+    direction: str,
+    order_by: str,
+    pagination: domain_model.PaginationObj,
+) -> tuple[list, Optional[str], Optional[str]]:
+    has_more = len(rows) > pagination.page_size
+    rows = rows[: pagination.page_size]
+
+    if direction == PREV:
+        rows.reverse()
+
+    if not rows:
+        return rows, None, None
+
+    if direction == NEXT:
+        has_next = has_more
+        has_prev = pagination.cursor is not None
+
+    else:
+        has_next = True
+        has_prev = has_more
+
+    return (
+        rows,
+        encode_cursor(order_by, rows[-1], NEXT) if has_next else None,
+        encode_cursor(order_by, rows[0], PREV) if has_prev else None,
+    )
+
+
+def paginate(
+    queryset: QuerySet,
+    order_by: str,
+    pagination: domain_model.PaginationObj,
+) -> tuple[list, Optional[str], Optional[str]]:
+    query, direction = _page_query(queryset, order_by, pagination)
+
+    return _page(list(query), direction, order_by, pagination)
+
+
+async def apaginate(
+    queryset: QuerySet,
+    order_by: str,
+    pagination: domain_model.PaginationObj,
+) -> tuple[list, Optional[str], Optional[str]]:
+    query, direction = _page_query(queryset, order_by, pagination)
+
+    return _page(
+        [row async for row in query], direction, order_by, pagination
+    )
@@ -0,0 +1,48 @@
+from collections import defaultdict
+from typing import Iterable
+
+from django.db.models import Model
+
+
+async def aprefetch_related(
+    instances: list[Model], relations: Iterable[str]
+) -> None:
+    """Load many-to-many ``relations`` of ``instances`` on the async ORM.
+
+    One query per relation whatever the number of instances, like
+    prefetch_related, whose cache the rows are stored in so that
+    ``instance.<relation>.all()`` reads them without a query.
+    """
+    if not instances:
+        return
+
+    ids = [instance.pk for instance in instances]
+
+    for relation in relations:
+        field = instances[0]._meta.get_field(relation)
+        source = field.m2m_field_name()
+        target = field.m2m_reverse_field_name()
+        related = defaultdict(list)
+
+        links = (
+            field.remote_field.through.objects.filter(
+                **{f"{source}_id__in": ids}
+            )
+            .select_related(target)
+            .order_by("pk")
+        )
+
+        async for link in links:
+            related[getattr(link, f"{source}_id")].append(
+                getattr(link, target)
+            )
+
+        for instance in instances:
+            queryset = getattr(instance, relation).all()
+            queryset._result_cache = related[instance.pk]
+            queryset._prefetch_done = True
+
+            if not hasattr(instance, "_prefetched_objects_cache"):
+                instance._prefetched_objects_cache = {}
+
+            instance._prefetched_objects_cache[relation] = queryset
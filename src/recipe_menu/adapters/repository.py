@@ -1,19 +1,50 @@
+import hashlib
 from abc import ABC, abstractmethod
-from typing import Union, Optional
+from typing import Iterator, Union, Optional
+from recipe_menu.adapters import prefetch, user_cache
 from recipe_menu.domain import model as domain_model
 
-from django.db import IntegrityError
-from django.db.models import Prefetch
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import F
 from django.apps import apps as django_apps
 from django.contrib.auth import get_user_model
 
 
+def advisory_lock(model, name: str) -> None:
+    # a Postgres lock on ``name`` held until the transaction ends, on the
+    # database the writes of ``model`` go to
+    key = int(hashlib.sha256(name.encode()).hexdigest()[:15], 16)
+
+    with connections[router.db_for_write(model)].cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [key])
+
+
 class AbstractRepository(ABC):
 
+    def __init__(self):
+        # rows this repository loaded or added, by primary key. update()
+        # and delete() only act on these, so a repository belongs to the
+        # unit of work that created it and shares nothing with others
+        self._seen = {}
+
+    def _track(self, instance):
+        self._seen[instance.pk] = instance
+        return instance
+
+    def _tracked(self, entity):
+        return self._seen.get(entity.id)
+
     @abstractmethod
     def get(self):
         raise NotImplementedError
 
+    async def aget(self, *args, **kwargs):
+        # Django 4.2 runs its async queries through sync_to_async anyway,
+        # loading and converting in one hop keeps lazy relations of the
+        # domain conversion off the event loop
+        return await sync_to_async(self.get)(*args, **kwargs)
+
     @abstractmethod
     def add(self):
         raise NotImplementedError
@@ -23,139 +54,315 @@ class AbstractRepository(ABC):
         raise NotImplementedError
 
 
+PROFILE_FIELDS = ("id", "email", "name")
+
+
 class UserRepository(AbstractRepository):
     model = get_user_model()
 
     def get(
         self,
         field: dict[str, Union[str, int]],
-        plan: Optional[list[Prefetch]] = None,
+        plan: Optional[domain_model.ReadPlan] = None,
         filter_obj: Optional[domain_model.UserFilterObj] = None,
         order_by: Optional[Union[str, list[str]]] = None,
         prefetching: bool = False,
+        pagination: Optional[domain_model.PaginationObj] = None,
     ) -> domain_model.User:
         if not prefetching:
             return self.model.objects.get(**field).to_domain()
 
-        return (
-            self.model.objects.prefetch_related(*plan)
-            .get(**field)
-            .to_domain(
-                filter_obj=filter_obj,
-                order_by=order_by,
-                prefetching=prefetching,
+        return self.model.objects.get(**field).to_domain(
+            filter_obj=filter_obj,
+            order_by=order_by,
+            plan=plan,
+            pagination=pagination,
+            prefetching=prefetching,
+        )
+
+    def stream_recipes(
+        self,
+        field: dict[str, Union[str, int]],
+        plan: domain_model.ReadPlan,
+        filter_obj: domain_model.UserFilterObj,
+        order_by: str,
+        chunk_size: int,
+    ) -> Iterator[domain_model.Recipe]:
+        # the user is looked up now, the recipes only once iterated
+        return self.model.objects.get(**field).stream_recipes(
+            filter_obj=filter_obj,
+            order_by=order_by,
+            plan=plan,
+            chunk_size=chunk_size,
+        )
+
+    async def aget(
+        self,
+        field: dict[str, Union[str, int]],
+        plan: Optional[domain_model.ReadPlan] = None,
+        filter_obj: Optional[domain_model.UserFilterObj] = None,
+        order_by: Optional[Union[str, list[str]]] = None,
+        prefetching: bool = False,
+        pagination: Optional[domain_model.PaginationObj] = None,
+    ) -> domain_model.User:
+        user = await self.model.objects.aget(**field)
+
+        if not prefetching:
+            return user.to_domain()
+
+        return await user.ato_domain(
+            filter_obj=filter_obj,
+            order_by=order_by,
+            plan=plan,
+            pagination=pagination,
+        )
+
+    def get_profile(
+        self, field: dict[str, Union[str, int]]
+    ) -> domain_model.User:
+        # id, email and name only, served from the profile cache, the
+        # returned user cannot check passwords
+        profile = user_cache.profiles.get(field)
+
+        if profile is None:
+            profile = user_cache.Profile(
+                *self.model.objects.values_list(*PROFILE_FIELDS).get(**field)
+            )
+            user_cache.profiles.set(profile)
+
+        return self._profile_to_domain(profile)
+
+    async def aget_profile(
+        self, field: dict[str, Union[str, int]]
+    ) -> domain_model.User:
+        profile = user_cache.profiles.get(field)
+
+        if profile is None:
+            profile = user_cache.Profile(
+                *await self.model.objects.values_list(*PROFILE_FIELDS).aget(
+                    **field
+                )
             )
+            user_cache.profiles.set(profile)
+
+        return self._profile_to_domain(profile)
+
+    def get_reference(self, id: int):
+        # a model instance to hang rows owned by the user on, built from the
+        # cached profile, other fields load lazily if ever read
+        profile = self.get_profile({"id": id})
+
+        return self.model.from_db(
+            router.db_for_read(self.model),
+            PROFILE_FIELDS,
+            (profile.id, profile.email, profile.name),
         )
 
+    @staticmethod
+    def _profile_to_domain(profile: user_cache.Profile) -> domain_model.User:
+        user = domain_model.User(email=profile.email, name=profile.name)
+        user.id = profile.id
+        return user
+
     def add(self, user: domain_model.User):
         try:
-            return self.model().add_from_domain(user)
+            instance = self.model().add_from_domain(user)
 
         except IntegrityError:
             raise domain_model.UserAlreadyExist
 
+        profile = user_cache.Profile(
+            instance.id, instance.email, instance.name
+        )
+        transaction.on_commit(lambda: user_cache.profiles.set(profile))
+
+        return instance
+
     def update(self, user: domain_model.User):
         self.model.update_from_domain(user)
 
+        # dropped now for this thread and again once committed, in case a
+        # concurrent reader cached the old row in between
+        user_cache.profiles.invalidate(user.id)
+        transaction.on_commit(
+            lambda: user_cache.profiles.invalidate(user.id)
+        )
+
+    def get_content_version(self, field: dict[str, int]) -> int:
+        return self.model.objects.values_list(
+            "content_version", flat=True
+        ).get(**field)
+
+    async def aget_content_version(self, field: dict[str, int]) -> int:
+        return await self.model.objects.values_list(
+            "content_version", flat=True
+        ).aget(**field)
+
+    def touch(self, id: int) -> None:
+        self.model.objects.filter(id=id).update(
+            content_version=F("content_version") + 1
+        )
+
 
 class RecipeRepository(AbstractRepository):
     model = django_apps.get_model("core.Recipe")
-    instance = None
 
     def get(
         self,
         field: dict[str, int],
         prefetch_model: Optional[list[str]] = None,
         select_related: Optional[str] = None,
+        plan: Optional[domain_model.ReadPlan] = None,
     ) -> domain_model.Recipe:
-        if select_related is not None and prefetch_model is not None:
-            self.instance = (
-                self.model.objects.select_related(select_related)
-                .prefetch_related(*prefetch_model)
-                .get(**field)
-            )
+        queryset = self.model.objects.all()
+
+        if select_related is not None:
+            queryset = queryset.select_related(select_related)
 
-        elif select_related is not None:
-            self.instance = self.model.objects.select_related(
-                select_related
-            ).get(**field)
+        if prefetch_model is not None:
+            queryset = queryset.prefetch_related(*prefetch_model)
+
+        if plan is None:
+            return self._track(queryset.get(**field)).to_domain()
+
+        queryset = queryset.prefetch_related(*plan.prefetch)
+
+        if plan.columns is not None:
+            queryset = queryset.only(*plan.columns)
+
+        return self._track(queryset.get(**field)).to_domain(
+            fields=plan.fields
+        )
+
+    async def aget(
+        self, field: dict[str, int], plan: domain_model.ReadPlan
+    ) -> domain_model.Recipe:
+        # get() on the async ORM, the owner is joined as nothing may load
+        # lazily on the event loop
+        queryset = self.model.objects.select_related("user")
+
+        if plan.columns is not None:
+            queryset = queryset.only(*plan.columns)
+
+        instance = self._track(await queryset.aget(**field))
+        await prefetch.aprefetch_related(
+            [instance], [lookup.prefetch_to for lookup in plan.prefetch]
+        )
 
-        elif prefetch_model is not None:
-            self.instance = self.model.objects.prefetch_related(
-                *prefetch_model
-            ).get(**field)
+        return instance.to_domain(fields=plan.fields)
 
-        else:
-            self.instance = self.model.objects.get(**field)
+    def get_version(self, field: dict[str, int]) -> tuple[int, int]:
+        # a recipe renders its tags and ingredients too, so its
+        # representation also changes with its owner's content version
+        return self.model.objects.values_list(
+            "version", "user__content_version"
+        ).get(**field)
 
-        return self.instance.to_domain()
+    async def aget_version(self, field: dict[str, int]) -> tuple[int, int]:
+        return await self.model.objects.values_list(
+            "version", "user__content_version"
+        ).aget(**field)
 
     def add(self, recipe: domain_model.Recipe):
-        self.instance = self.model().add_from_domain(recipe)
-        return self.instance
+        return self._track(self.model().add_from_domain(recipe))
+
+    def add_many(self, recipes: list[domain_model.Recipe]) -> list:
+        return self.model.add_many_from_domain(recipes)
 
     def update(self, recipe: domain_model.Recipe) -> None:
-        if self.instance is not None:
-            self.instance.update_from_domain(recipe)
+        if (instance := self._tracked(recipe)) is not None:
+            instance.update_from_domain(recipe)
+
+    def delete(self, recipe: domain_model.Recipe) -> None:
+        if (instance := self._seen.pop(recipe.id, None)) is not None:
+            instance.delete()
+
+    def get_image(self, id: int) -> Optional[tuple[str, int]]:
+        # storage name of the image and owner of the recipe
+        return (
+            self.model.objects.filter(id=id)
+            .values_list("image", "user_id")
+            .first()
+        )
 
-    def delete(self) -> None:
-        if self.instance is not None:
-            self.instance.delete()
+    def count_image_references(self, image: str) -> int:
+        return self.model.objects.filter(image=image).count()
+
+    def lock_image(self, digest: str) -> None:
+        # taken by the uploads storing an image and by images.release
+        # deleting it, so an upload finding the file in place never has
+        # it deleted under the row it is about to commit
+        advisory_lock(self.model, f"images:{digest}")
+
+    def set_image_variants(
+        self, id: int, image: str, variants: dict[str, dict[str, str]]
+    ) -> bool:
+        # recorded only while the recipe still shows the image they were
+        # rendered from, a newer upload has its own variants coming
+        return bool(
+            self.model.objects.filter(id=id, image=image).update(
+                image_variants=variants, version=F("version") + 1
+            )
+        )
 
 
 class TagRepository(AbstractRepository):
     model = django_apps.get_model("core.Tag")
-    instance = None
 
     def get(
         self, field: dict[str, int], select_related: Optional[str] = None
     ) -> domain_model.Tag:
-        if select_related is not None:
-            self.instance = self.model.objects.select_related(
-                select_related
-            ).get(**field)
+        queryset = self.model.objects.all()
 
-        else:
-            self.instance = self.model.objects.get(**field)
+        if select_related is not None:
+            queryset = queryset.select_related(select_related)
 
-        return self.instance.to_domain()
+        return self._track(queryset.get(**field)).to_domain()
 
     def add(self):
         pass
 
     def update(self, tag: domain_model.Tag) -> None:
-        if self.instance is not None:
-            self.instance.update_from_domain(tag)
+        if (instance := self._tracked(tag)) is None:
+            return
 
-    def delete(self) -> None:
-        if self.instance is not None:
-            self.instance.delete()
+        try:
+            instance.update_from_domain(tag)
+
+        except IntegrityError:
+            raise domain_model.TagAlreadyExist
+
+    def delete(self, tag: domain_model.Tag) -> None:
+        if (instance := self._seen.pop(tag.id, None)) is not None:
+            instance.delete()
 
 
 class IngredientRepository(AbstractRepository):
     model = django_apps.get_model("core.Ingredient")
-    instance = None
 
     def get(
         self, field: dict[str, int], select_related: Optional[str] = None
     ) -> domain_model.Ingredient:
-        if select_related is not None:
-            self.instance = self.model.objects.select_related(
-                select_related
-            ).get(**field)
+        queryset = self.model.objects.all()
 
-        else:
-            self.instance = self.model.objects.get(**field)
+        if select_related is not None:
+            queryset = queryset.select_related(select_related)
 
-        return self.instance.to_domain()
+        return self._track(queryset.get(**field)).to_domain()
 
     def add(self):
         pass
 
     def update(self, ingredient: domain_model.Ingredient) -> None:
-        if self.instance is not None:
-            self.instance.update_from_domain(ingredient)
+        if (instance := self._tracked(ingredient)) is None:
+            return
+
+        try:
+            instance.update_from_domain(ingredient)
+
+        except IntegrityError:
+            raise domain_model.IngredientAlreadyExist
 
-    def delete(self) -> None:
-        if self.instance is not None:
-            self.instance.delete()
+    def delete(self, ingredient: domain_model.Ingredient) -> None:
+        if (instance := self._seen.pop(ingredient.id, None)) is not None:
+            instance.delete()
@@ -0,0 +1,117 @@
+"""Which database the reads of a service call go to.
+
+Services annotated with :func:`read_only` read from a replica
+(settings.DATABASE_REPLICAS), any other query goes to the primary. A user
+who just wrote is kept on the primary for REPLICA_STICKY_SECONDS, long
+enough for the replicas to catch up, so they always read their own writes.
+The reader is the user the current request is authenticated as, set by the
+views with :func:`reading_as`.
+"""
+import functools
+import inspect
+import random
+from contextvars import ContextVar, Token
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_reader: ContextVar[Optional[int]] = ContextVar("reader", default=None)
+# replica the reads of the current read-only service go to, None for primary
+_replica: ContextVar[Optional[str]] = ContextVar("replica", default=None)
+
+
+def _sticky_key(user_id: int) -> str:
+    return f"replicas:sticky:{user_id}"
+
+
+def reading_as(user_id: Optional[int]) -> Token:
+    return _reader.set(user_id)
+
+
+def stop_reading(token: Token) -> None:
+    _reader.reset(token)
+
+
+def mark_written(user_id: int) -> None:
+    if settings.DATABASE_REPLICAS:
+        cache.set(
+            _sticky_key(user_id), True, settings.REPLICA_STICKY_SECONDS
+        )
+
+
+def read_database() -> str:
+    replica = _replica.get()
+
+    # checked per query, in the thread running it: reads inside a
+    # transaction must see its writes
+    if replica is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return DEFAULT_DB_ALIAS
+
+    return replica
+
+
+def _replica_for(reader: Optional[int]) -> Optional[str]:
+    replicas = settings.DATABASE_REPLICAS
+
+    if not replicas:
+        return None
+
+    if reader is None:
+        return random.choice(replicas)
+
+    # one replica per user, so the reads of a request agree with each other
+    return replicas[reader % len(replicas)]
+
+
+def _choose_replica() -> Optional[str]:
+    reader = _reader.get()
+    replica = _replica_for(reader)
+
+    if replica is not None and reader is not None:
+        if cache.get(_sticky_key(reader)):
+            return None
+
+    return replica
+
+
+async def _achoose_replica() -> Optional[str]:
+    reader = _reader.get()
+    replica = _replica_for(reader)
+
+    if replica is not None and reader is not None:
+        if await cache.aget(_sticky_key(reader)):
+            return None
+
+    return replica
+
+
+def read_only(func):
+    """Run the reads of ``func`` on a replica, unless the reader is sticky."""
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            token = _replica.set(await _achoose_replica())
+
+            try:
+                return await func(*args, **kwargs)
+
+            finally:
+                _replica.reset(token)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _replica.set(_choose_replica())
+
+        try:
+            return func(*args, **kwargs)
+
+        finally:
+            _replica.reset(token)
+
+    return wrapper
@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Union
+
+from django.conf import settings
+
+
+class Profile(NamedTuple):
+    id: int
+    email: str
+    name: str
+
+
+class ProfileCache:
+    """Process-local LRU of user profiles, looked up by id or by email.
+
+    Entries expire after ``timeout`` seconds, which bounds how long a
+    change made through another process (or the admin) stays unseen here.
+    """
+
+    def __init__(self, maxsize: int, timeout: float):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._profiles = OrderedDict()
+        self._ids_by_email = {}
+        self._lock = threading.Lock()
+
+    def get(self, field: dict[str, Union[str, int]]) -> Optional[Profile]:
+        if len(field) != 1:
+            return None
+
+        with self._lock:
+            if "id" in field:
+                id = field["id"]
+
+            elif "email" in field:
+                id = self._ids_by_email.get(field["email"])
+
+            else:
+                return None
+
+            entry = self._profiles.get(id)
+
+            if entry is None:
+                return None
+
+            profile, expires_at = entry
+
+            if expires_at <= time.monotonic():
+                self._discard(id)
+                return None
+
+            self._profiles.move_to_end(id)
+            return profile
+
+    def set(self, profile: Profile) -> None:
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._discard(profile.id)
+            self._profiles[profile.id] = (
+                profile,
+                time.monotonic() + self.timeout,
+            )
+            self._ids_by_email[profile.email] = profile.id
+
+            while len(self._profiles) > self.maxsize:
+                self._discard(next(iter(self._profiles)))
+
+    def invalidate(self, id: int) -> None:
+        with self._lock:
+            self._discard(id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+            self._ids_by_email.clear()
+
+    def _discard(self, id: int) -> None:
+        entry = self._profiles.pop(id, None)
+
+        if entry is None:
+            return
+
+        email = entry[0].email
+
+        if self._ids_by_email.get(email) == id:
+            del self._ids_by_email[email]
+
+
+profiles = ProfileCache(
+    settings.USER_PROFILE_CACHE_SIZE, settings.USER_PROFILE_CACHE_TIMEOUT
+)
@@ -1,6 +1,6 @@
+import hashlib
 import os
-import uuid
-from dataclasses import dataclass
+from dataclasses import dataclass, field as dataclass_field
 from enum import Enum
 from typing import Optional, Callable, Union
 
@@ -16,24 +16,49 @@ def manage_profile(user, update_fields):
     return update_fields
 
 
-def determine_prefetch_plan(
-    filter: "UserFilterObj", plan: Optional[list[Prefetch]] = None
-) -> list[Prefetch]:
-    if plan is None:
-        plan = []
+def determine_read_plan(
+    model: "UserFilterModel",
+    fields: Optional["RecipeFieldsObj"] = None,
+    order_by: Optional[str] = None,
+) -> "ReadPlan":
+    if model != UserFilterModel.RECIPES:
+        return ReadPlan()
 
-    if filter.model == UserFilterModel.RECIPES:
-        plan.append(Prefetch("recipes"))
-        plan.append(Prefetch("recipes__tags"))
-        plan.append(Prefetch("recipes__ingredients"))
+    requested = (
+        set(RECIPE_FIELDS)
+        if fields is None or fields.fields is None
+        else fields.fields
+    )
 
-    elif filter.model == UserFilterModel.TAGS:
-        plan.append(Prefetch("recipes__tags"))
+    # lookups are relative to the listed collection, so the relations of
+    # every row are loaded in one query each, whatever the row count is
+    prefetch = [
+        Prefetch(relation)
+        for relation in RECIPE_RELATIONS
+        if relation in requested
+    ]
 
-    elif filter.model == UserFilterModel.INGREDIENTS:
-        plan.append(Prefetch("recipes__ingredients"))
+    if fields is None or fields.fields is None:
+        return ReadPlan(prefetch=prefetch)
 
-    return plan
+    columns = ["id", "user"] + [
+        column for column in RECIPE_COLUMNS if column in requested
+    ]
+
+    # keyset pagination reads the ordering column off the last row, the
+    # search rank is computed rather than loaded
+    if order_by is not None:
+        order_field = order_by.lstrip("-")
+
+        if order_field not in columns and order_field not in (
+            "pk",
+            SEARCH_RANK,
+        ):
+            columns.append(order_field)
+
+    return ReadPlan(
+        fields=frozenset(requested), columns=columns, prefetch=prefetch
+    )
 
 
 class UserAlreadyExist(Exception):
@@ -70,11 +95,23 @@ class UserFilterModel(str, Enum):
     INGREDIENTS = "ingredients"
 
 
+class InvalidSearchError(Exception):
+    message = "無效的搜尋條件"
+    status_code = status.HTTP_400_BAD_REQUEST
+
+
+# annotated on searched recipes, higher for better matches
+SEARCH_RANK = "rank"
+SEARCH_MAX_LENGTH = 255
+
+
 @dataclass
 class UserFilterObj:
     model: UserFilterModel
     tags: Optional[str] = None
     ingredients: Optional[str] = None
+    # words looked up in the title and description of recipes
+    search: Optional[str] = None
 
     def __post_init__(self):
         if self.tags is not None:
@@ -83,6 +120,12 @@ class UserFilterObj:
         if self.ingredients is not None:
             self.ingredients = [int(id) for id in self.ingredients.split(",")]
 
+        if self.search is not None:
+            self.search = " ".join(self.search.split())
+
+            if not self.search or len(self.search) > SEARCH_MAX_LENGTH:
+                raise InvalidSearchError
+
 
 @dataclass
 class UserAssignedObj:
@@ -99,6 +142,111 @@ class UserAssignedObj:
             self.ingredients = [int(id) for id in self.ingredients.split(",")]
 
 
+class InvalidPaginationError(Exception):
+    message = "無效的分頁參數"
+    status_code = status.HTTP_400_BAD_REQUEST
+
+
+@dataclass
+class PaginationObj:
+    cursor: Optional[str] = None
+    page_size: Optional[str] = None
+
+    def __post_init__(self):
+        if self.page_size is None:
+            self.page_size = settings.LIST_PAGE_SIZE
+
+        try:
+            self.page_size = int(self.page_size)
+
+        except (TypeError, ValueError):
+            raise InvalidPaginationError
+
+        self.page_size = min(
+            max(self.page_size, 1), settings.LIST_MAX_PAGE_SIZE
+        )
+
+
+@dataclass(frozen=True)
+class Page:
+    items: list
+    next: Optional[str] = None
+    prev: Optional[str] = None
+
+
+class InvalidOrderingError(Exception):
+    message = "無效的排序欄位"
+    status_code = status.HTTP_400_BAD_REQUEST
+
+
+# what each list may be ordered by, prefixed with - to reverse. Keyset
+# cursors compare the values of these, none of them may be null
+# each one is backed by a (user, field, id) index, and is short enough to
+# be carried in a cursor
+ORDERING_FIELDS = {
+    UserFilterModel.RECIPES: ("id", "pk", "title", "time_minutes", "price"),
+    UserFilterModel.TAGS: ("id", "pk", "name"),
+    UserFilterModel.INGREDIENTS: ("id", "pk", "name"),
+}
+
+
+def check_ordering(
+    filter_obj: Union["UserFilterObj", "UserAssignedObj"], order_by: str
+) -> None:
+    allowed = ORDERING_FIELDS[filter_obj.model]
+
+    # searched recipes may also be ordered by relevance
+    if getattr(filter_obj, "search", None) is not None:
+        allowed += (SEARCH_RANK,)
+
+    if order_by.removeprefix("-") not in allowed:
+        raise InvalidOrderingError
+
+
+RECIPE_COLUMNS = (
+    "title",
+    "description",
+    "time_minutes",
+    "price",
+    "link",
+    "image",
+    "image_variants",
+)
+RECIPE_RELATIONS = ("tags", "ingredients")
+RECIPE_FIELDS = ("id",) + RECIPE_COLUMNS + RECIPE_RELATIONS
+
+
+class InvalidFieldsError(Exception):
+    message = "無效的欄位"
+    status_code = status.HTTP_400_BAD_REQUEST
+
+
+@dataclass
+class RecipeFieldsObj:
+    fields: Optional[str] = None
+
+    def __post_init__(self):
+        if self.fields is None:
+            return
+
+        fields = {field.strip() for field in self.fields.split(",")}
+
+        if not fields <= set(RECIPE_FIELDS):
+            raise InvalidFieldsError
+
+        # rows are always identified, whatever was asked for, sorted so
+        # the object has the same repr in every process
+        self.fields = tuple(sorted(fields | {"id"}))
+
+
+@dataclass(frozen=True)
+class ReadPlan:
+    # None means every field and every column
+    fields: Optional[frozenset[str]] = None
+    columns: Optional[list[str]] = None
+    prefetch: list[Prefetch] = dataclass_field(default_factory=list)
+
+
 class User:
     def __init__(
         self,
@@ -165,6 +313,22 @@ class RecipeNotOwnerError(Exception):
 @dataclass(frozen=True)
 class RecipeImage:
     image: Union[TemporaryUploadedFile, File, None]
+    # SHA-256 of the content of a new upload, it is stored under that name
+    digest: Optional[str] = None
+
+
+def content_digest(image: File) -> str:
+    # the upload handlers hash uploads as they stream in, files from
+    # anywhere else are read once more
+    if (digest := getattr(image, "content_hash", None)) is not None:
+        return digest
+
+    content_hash = hashlib.sha256()
+
+    for chunk in image.chunks():
+        content_hash.update(chunk)
+
+    return content_hash.hexdigest()
 
 
 class Recipe:
@@ -179,6 +343,7 @@ class Recipe:
         tags: Union[list["Tag"], None],
         ingredients: Union[list["Ingredient"], None],
         image_object: Optional[RecipeImage] = None,
+        image_variants: Optional[dict[str, dict[str, str]]] = None,
     ):
         self.id = None
         self.title = title
@@ -187,6 +352,12 @@ class Recipe:
         self.price = price
         self.link = link
         self.image_object = image_object
+        # storage names of the resized copies of the image, by size then
+        # format, empty until the image pipeline has rendered them
+        self.image_variants = (
+            image_variants if image_variants is not None else {}
+        )
+        self.update_image = False
         self.user = None
         self.tags = tags if tags is not None else []
         self.update_tags = False
@@ -239,7 +410,10 @@ class Recipe:
 
     def update_image_object(self, image_object: RecipeImage):
         _, ext = os.path.splitext(image_object.image.name)
-        image_object.image.name = f"{uuid.uuid4()}{ext}"
+        digest = content_digest(image_object.image)
+        # identical images share one name, the storage writes it once
+        image_object = RecipeImage(image=image_object.image, digest=digest)
+        image_object.image.name = f"{digest}{ext.lower()}"
         image_object.image.url = (
             "{media_url}/{field_location}/{filename}".format(
                 media_url=settings.MEDIA_URL,
@@ -249,6 +423,8 @@ class Recipe:
         )
 
         self.image_object = image_object
+        self.image_variants = {}
+        self.update_image = True
 
     @property
     def image(self) -> Union[TemporaryUploadedFile, File, None]:
@@ -271,6 +447,11 @@ class TagNotOwnerError(Exception):
     status_code = status.HTTP_404_NOT_FOUND
 
 
+class TagAlreadyExist(Exception):
+    message = "標籤已存在"
+    status_code = status.HTTP_400_BAD_REQUEST
+
+
 class Tag:
     def __init__(self, name: str) -> None:
         self.id = None
@@ -314,6 +495,11 @@ class IngredientNotOwnerError(Exception):
     status_code = status.HTTP_404_NOT_FOUND
 
 
+class IngredientAlreadyExist(Exception):
+    message = "原料已存在"
+    status_code = status.HTTP_400_BAD_REQUEST
+
+
 class Ingredient:
     def __init__(self, name: str, id: Optional[int] = None):
         self.id = id
@@ -1,11 +1,17 @@
 from .services import (
     register,
     login,
+    mark_content_changed,
     retrieve_user,
     update_user,
+    retrieve_content_version,
     retrieve_recipes,
+    search_recipes,
+    stream_recipes,
     retrieve_recipe,
+    retrieve_recipe_version,
     create_recipe,
+    create_recipes,
     update_recipe,
     delete_recipe,
     update_recipe_image,
@@ -17,14 +23,44 @@ from .services import (
     delete_ingredient,
 )
 
+from .async_services import (
+    aretrieve_user,
+    aretrieve_content_version,
+    aretrieve_recipe_version,
+    aregister,
+    alogin,
+    aupdate_user,
+    aretrieve_recipes,
+    asearch_recipes,
+    astream_recipes,
+    aretrieve_recipe,
+    acreate_recipe,
+    acreate_recipes,
+    aupdate_recipe,
+    adelete_recipe,
+    aupdate_recipe_image,
+    aretrieve_tags,
+    aupdate_tag,
+    adelete_tag,
+    aretrieve_ingredients,
+    aupdate_ingredient,
+    adelete_ingredient,
+)
+
 __all__ = [
     "register",
     "login",
+    "mark_content_changed",
     "retrieve_user",
     "update_user",
+    "retrieve_content_version",
     "retrieve_recipes",
+    "search_recipes",
+    "stream_recipes",
     "retrieve_recipe",
+    "retrieve_recipe_version",
     "create_recipe",
+    "create_recipes",
     "update_recipe",
     "delete_recipe",
     "update_recipe_image",
@@ -34,4 +70,25 @@ __all__ = [
     "retrieve_ingredients",
     "update_ingredient",
     "delete_ingredient",
+    "aretrieve_user",
+    "aretrieve_content_version",
+    "aretrieve_recipe_version",
+    "aregister",
+    "alogin",
+    "aupdate_user",
+    "aretrieve_recipes",
+    "asearch_recipes",
+    "astream_recipes",
+    "aretrieve_recipe",
+    "acreate_recipe",
+    "acreate_recipes",
+    "aupdate_recipe",
+    "adelete_recipe",
+    "aupdate_recipe_image",
+    "aretrieve_tags",
+    "aupdate_tag",
+    "adelete_tag",
+    "aretrieve_ingredients",
+    "aupdate_ingredient",
+    "adelete_ingredient",
 ]
@@ -0,0 +1,194 @@
+"""Async variants of the services, for the async views.
+
+Reads await the async ORM, the relations of listed recipes are loaded by
+adapters.prefetch.aprefetch_related, as Django 4.2 has no async
+prefetch_related. It has no async transactions either, so the writes run
+their sync unit of work in one sync_to_async hop, keeping
+transaction.atomic and on_commit exactly as they are. The hop is thread
+sensitive, the same thread the async ORM itself uses. The recipe stream
+is read by a sync server-side cursor, see recipe/streaming.py.
+"""
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+
+from recipe_menu.adapters import repository, routing
+from recipe_menu.domain import model as domain_model
+
+from . import services
+
+
+@routing.read_only
+async def aretrieve_user(id: int, repo: repository.AbstractRepository):
+    try:
+        return await repo.aget_profile({"id": id})
+
+    except repo.model.DoesNotExist:
+        raise domain_model.UserNotExist
+
+
+@routing.read_only
+async def aretrieve_content_version(
+    user_id: int, repo: repository.AbstractRepository
+) -> int:
+    try:
+        return await repo.aget_content_version({"id": user_id})
+
+    except repo.model.DoesNotExist:
+        raise domain_model.UserNotExist
+
+
+@routing.read_only
+async def aretrieve_recipe_version(
+    id: int, repo: repository.AbstractRepository
+) -> tuple[int, int]:
+    try:
+        return await repo.aget_version({"id": id})
+
+    except repo.model.DoesNotExist:
+        raise domain_model.RecipeNotExist
+
+
+@routing.read_only
+async def aretrieve_recipes(
+    user_id: int,
+    filter_obj: domain_model.UserFilterObj,
+    order_by: str,
+    repo: repository.AbstractRepository,
+    pagination: Optional[domain_model.PaginationObj] = None,
+    fields: Optional[domain_model.RecipeFieldsObj] = None,
+) -> domain_model.Page:
+    domain_model.check_ordering(filter_obj, order_by)
+
+    plan = domain_model.determine_read_plan(
+        filter_obj.model, fields=fields, order_by=order_by
+    )
+
+    if pagination is None:
+        pagination = domain_model.PaginationObj()
+
+    try:
+        user: domain_model.User = await repo.aget(
+            {"id": user_id},
+            plan=plan,
+            filter_obj=filter_obj,
+            order_by=order_by,
+            pagination=pagination,
+            prefetching=True,
+        )
+
+    except repo.model.DoesNotExist:
+        raise domain_model.UserNotExist
+
+    return user.recipes
+
+
+@routing.read_only
+async def asearch_recipes(
+    user_id: int,
+    filter_obj: domain_model.UserFilterObj,
+    repo: repository.AbstractRepository,
+    pagination: Optional[domain_model.PaginationObj] = None,
+    fields: Optional[domain_model.RecipeFieldsObj] = None,
+) -> domain_model.Page:
+    # best matches first, the tag and ingredient filters narrow them down
+    if filter_obj.search is None:
+        raise domain_model.InvalidSearchError
+
+    return await aretrieve_recipes(
+        user_id=user_id,
+        filter_obj=filter_obj,
+        order_by=f"-{domain_model.SEARCH_RANK}",
+        repo=repo,
+        pagination=pagination,
+        fields=fields,
+    )
+
+
+@routing.read_only
+async def aretrieve_recipe(
+    id: int,
+    repo: repository.AbstractRepository,
+    fields: Optional[domain_model.RecipeFieldsObj] = None,
+) -> domain_model.Recipe:
+    plan = domain_model.determine_read_plan(
+        domain_model.UserFilterModel.RECIPES, fields=fields
+    )
+
+    try:
+        return await repo.aget({"id": id}, plan=plan)
+
+    except repo.model.DoesNotExist:
+        raise domain_model.RecipeNotExist
+
+
+@routing.read_only
+async def aretrieve_tags(
+    user_id: int,
+    filter_obj: domain_model.UserFilterObj,
+    order_by: str,
+    repo: repository.AbstractRepository,
+    pagination: Optional[domain_model.PaginationObj] = None,
+):
+    return (
+        await _aretrieve_names(
+            user_id, filter_obj, order_by, repo, pagination
+        )
+    ).tags
+
+
+@routing.read_only
+async def aretrieve_ingredients(
+    user_id: int,
+    filter_obj: domain_model.UserFilterObj,
+    order_by: str,
+    repo: repository.AbstractRepository,
+    pagination: Optional[domain_model.PaginationObj] = None,
+):
+    return (
+        await _aretrieve_names(
+            user_id, filter_obj, order_by, repo, pagination
+        )
+    ).ingredients
+
+
+async def _aretrieve_names(
+    user_id: int,
+    filter_obj: domain_model.UserFilterObj,
+    order_by: str,
+    repo: repository.AbstractRepository,
+    pagination: Optional[domain_model.PaginationObj],
+) -> domain_model.User:
+    # the user with a page of their tags or ingredients
+    domain_model.check_ordering(filter_obj, order_by)
+
+    if pagination is None:
+        pagination = domain_model.PaginationObj()
+
+    try:
+        return await repo.aget(
+            {"id": user_id},
+            plan=domain_model.determine_read_plan(filter_obj.model),
+            filter_obj=filter_obj,
+            order_by=order_by,
+            pagination=pagination,
+            prefetching=True,
+        )
+
+    except repo.model.DoesNotExist:
+        raise domain_model.UserNotExist
+
+
+aregister = sync_to_async(services.register)
+alogin = sync_to_async(services.login)
+aupdate_user = sync_to_async(services.update_user)
+astream_recipes = sync_to_async(services.stream_recipes)
+acreate_recipe = sync_to_async(services.create_recipe)
+acreate_recipes = sync_to_async(services.create_recipes)
+aupdate_recipe = sync_to_async(services.update_recipe)
+adelete_recipe = sync_to_async(services.delete_recipe)
+aupdate_recipe_image = sync_to_async(services.update_recipe_image)
+aupdate_tag = sync_to_async(services.update_tag)
+adelete_tag = sync_to_async(services.delete_tag)
+aupdate_ingredient = sync_to_async(services.update_ingredient)
+adelete_ingredient = sync_to_async(services.delete_ingredient)
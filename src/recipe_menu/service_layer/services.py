@@ -1,19 +1,49 @@
 import dataclasses
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 
+from django.conf import settings
 from django.db import transaction
 from rest_framework_simplejwt.tokens import AccessToken
 
-from recipe_menu.adapters import repository
+from recipe_menu.adapters import (
+    images,
+    jobs,
+    list_cache,
+    repository,
+    routing,
+)
 from recipe_menu.domain import model as domain_model
 
 
+def _release_image(recipe: domain_model.Recipe) -> None:
+    # the file is shared by every recipe showing the same image, it goes
+    # once this is committed if none is left
+    if recipe.image:
+        jobs.enqueue(images.release, {"image": recipe.image.name})
+
+
+def _content_changed(user_id: int) -> None:
+    repository.UserRepository().touch(user_id)
+    list_cache.invalidate(user_id)
+    routing.mark_written(user_id)
+
+
+def mark_content_changed(user_ids: Iterable[int]) -> None:
+    # for writes made outside the services, like maintenance commands
+    for user_id in user_ids:
+        _content_changed(user_id)
+
+
 @transaction.atomic
 def register(
     email: str, name: str, password: str, repo: repository.AbstractRepository
 ):
     user = domain_model.User(email=email, name=name, password=password)
-    return repo.add(user)
+    instance = repo.add(user)
+
+    routing.mark_written(instance.id)
+
+    return instance
 
 
 def login(email: str, password: str, repo: repository.AbstractRepository):
@@ -34,9 +64,10 @@ def login(email: str, password: str, repo: repository.AbstractRepository):
     )
 
 
+@routing.read_only
 def retrieve_user(id: int, repo: repository.AbstractRepository):
     try:
-        user = repo.get({"id": id})
+        user = repo.get_profile({"id": id})
 
     except repo.model.DoesNotExist:
         raise domain_model.UserNotExist
@@ -49,7 +80,7 @@ def update_user(
     id: int, update_fields: dict, repo: repository.AbstractRepository
 ) -> None:
     try:
-        user = repo.get({"id": id})
+        user = repo.get_profile({"id": id})
 
         domain_model.manage_profile(user, update_fields)
 
@@ -58,15 +89,37 @@ def update_user(
     except repo.model.DoesNotExist:
         raise domain_model.UserNotExist
 
+    routing.mark_written(id)
+
+
+@routing.read_only
+def retrieve_content_version(
+    user_id: int, repo: repository.AbstractRepository
+) -> int:
+    try:
+        return repo.get_content_version({"id": user_id})
+
+    except repo.model.DoesNotExist:
+        raise domain_model.UserNotExist
 
+
+@routing.read_only
 def retrieve_recipes(
     user_id: int,
     filter_obj: domain_model.UserFilterObj,
     order_by: str,
     repo: repository.AbstractRepository,
-) -> set:
+    pagination: Optional[domain_model.PaginationObj] = None,
+    fields: Optional[domain_model.RecipeFieldsObj] = None,
+) -> domain_model.Page:
+    domain_model.check_ordering(filter_obj, order_by)
+
+    plan = domain_model.determine_read_plan(
+        filter_obj.model, fields=fields, order_by=order_by
+    )
 
-    plan = domain_model.determine_prefetch_plan(filter_obj)
+    if pagination is None:
+        pagination = domain_model.PaginationObj()
 
     try:
         user: domain_model.User = repo.get(
@@ -74,6 +127,7 @@ def retrieve_recipes(
             plan=plan,
             filter_obj=filter_obj,
             order_by=order_by,
+            pagination=pagination,
             prefetching=True,
         )
 
@@ -83,14 +137,67 @@ def retrieve_recipes(
     return user.recipes
 
 
+@routing.read_only
+def search_recipes(
+    user_id: int,
+    filter_obj: domain_model.UserFilterObj,
+    repo: repository.AbstractRepository,
+    pagination: Optional[domain_model.PaginationObj] = None,
+    fields: Optional[domain_model.RecipeFieldsObj] = None,
+) -> domain_model.Page:
+    # best matches first, the tag and ingredient filters narrow them down
+    if filter_obj.search is None:
+        raise domain_model.InvalidSearchError
+
+    return retrieve_recipes(
+        user_id=user_id,
+        filter_obj=filter_obj,
+        order_by=f"-{domain_model.SEARCH_RANK}",
+        repo=repo,
+        pagination=pagination,
+        fields=fields,
+    )
+
+
+def stream_recipes(
+    user_id: int,
+    filter_obj: domain_model.UserFilterObj,
+    order_by: str,
+    repo: repository.AbstractRepository,
+    fields: Optional[domain_model.RecipeFieldsObj] = None,
+    chunk_size: Optional[int] = None,
+) -> Iterator[domain_model.Recipe]:
+    domain_model.check_ordering(filter_obj, order_by)
+
+    plan = domain_model.determine_read_plan(
+        filter_obj.model, fields=fields, order_by=order_by
+    )
+
+    try:
+        return repo.stream_recipes(
+            {"id": user_id},
+            plan=plan,
+            filter_obj=filter_obj,
+            order_by=order_by,
+            chunk_size=chunk_size or settings.LIST_STREAM_CHUNK_SIZE,
+        )
+
+    except repo.model.DoesNotExist:
+        raise domain_model.UserNotExist
+
+
+@routing.read_only
 def retrieve_recipe(
-    id: int, repo: repository.AbstractRepository
+    id: int,
+    repo: repository.AbstractRepository,
+    fields: Optional[domain_model.RecipeFieldsObj] = None,
 ) -> domain_model.Recipe:
+    plan = domain_model.determine_read_plan(
+        domain_model.UserFilterModel.RECIPES, fields=fields
+    )
 
     try:
-        recipe: domain_model.Recipe = repo.get(
-            {"id": id}, prefetch_model=["tags", "ingredients"]
-        )
+        recipe: domain_model.Recipe = repo.get({"id": id}, plan=plan)
 
     except repo.model.DoesNotExist:
         raise domain_model.RecipeNotExist
@@ -98,6 +205,17 @@ def retrieve_recipe(
     return recipe
 
 
+@routing.read_only
+def retrieve_recipe_version(
+    id: int, repo: repository.AbstractRepository
+) -> tuple[int, int]:
+    try:
+        return repo.get_version({"id": id})
+
+    except repo.model.DoesNotExist:
+        raise domain_model.RecipeNotExist
+
+
 def create_recipe(
     title: str,
     time_minutes: int,
@@ -110,12 +228,77 @@ def create_recipe(
     ingredients: Optional[list[str]] = None,
 ) -> domain_model.Recipe:
     try:
-        user = repository.UserRepository.model.objects.get(id=user_id)
+        user = repository.UserRepository().get_reference(user_id)
+
+    except repository.UserRepository.model.DoesNotExist:
+        raise domain_model.UserNotExist
+
+    recipe = _new_recipe(
+        title=title,
+        time_minutes=time_minutes,
+        price=price,
+        description=description,
+        link=link,
+        tags=tags,
+        ingredients=ingredients,
+    )
+    recipe.mark_user(user)
+    repo.add(recipe)
+
+    _content_changed(user_id)
+
+    return recipe
+
+
+@transaction.atomic
+def create_recipes(
+    recipes: list[dict],
+    user_id: int,
+    repo: repository.AbstractRepository,
+) -> list[domain_model.Recipe]:
+    # recipes:
+    # validated payloads of create_recipe, like:
+    # {"title": "recipe", ..., "tags": [{"name": "tag1"}]}
+    try:
+        user = repository.UserRepository().get_reference(user_id)
 
     except repository.UserRepository.model.DoesNotExist:
         raise domain_model.UserNotExist
 
-    recipe = domain_model.Recipe(
+    new_recipes = [
+        _new_recipe(
+            title=recipe.get("title"),
+            time_minutes=recipe.get("time_minutes"),
+            price=recipe.get("price"),
+            description=recipe.get("description"),
+            link=recipe.get("link"),
+            tags=recipe.get("tags"),
+            ingredients=recipe.get("ingredients"),
+        )
+        for recipe in recipes
+    ]
+
+    for recipe in new_recipes:
+        recipe.mark_user(user)
+
+    repo.add_many(new_recipes)
+
+    if new_recipes:
+        _content_changed(user_id)
+
+    return new_recipes
+
+
+def _new_recipe(
+    title: str,
+    time_minutes: int,
+    price: float,
+    description: str,
+    link: str,
+    tags: Optional[list[str]] = None,
+    ingredients: Optional[list[str]] = None,
+) -> domain_model.Recipe:
+    return domain_model.Recipe(
         title=title,
         description=description,
         price=price,
@@ -135,10 +318,6 @@ def create_recipe(
             else None
         ),
     )
-    recipe.mark_user(user)
-    repo.add(recipe)
-
-    return recipe
 
 
 @transaction.atomic
@@ -171,6 +350,8 @@ def update_recipe(
 
     repo.update(recipe)
 
+    _content_changed(user_id)
+
     return recipe
 
 
@@ -192,9 +373,14 @@ def update_recipe_image(
     if not recipe.check_ownership(user_id):
         raise domain_model.RecipeNotOwnerError
 
+    _release_image(recipe)
     recipe.update_image_object(image_object)
+    repo.lock_image(recipe.image_object.digest)
     repo.update(recipe)
 
+    _content_changed(user_id)
+    jobs.enqueue(images.render_variants, {"recipe_id": recipe.id})
+
     return recipe
 
 
@@ -209,17 +395,26 @@ def delete_recipe(
     if not recipe.check_ownership(user_id):
         raise domain_model.RecipeNotOwnerError
 
-    del recipe
-    repo.delete()
+    _release_image(recipe)
+    repo.delete(recipe)
 
+    _content_changed(user_id)
 
+
+@routing.read_only
 def retrieve_tags(
     user_id: int,
     filter_obj: domain_model.UserFilterObj,
     order_by: str,
     repo: repository.AbstractRepository,
+    pagination: Optional[domain_model.PaginationObj] = None,
 ):
-    plan = domain_model.determine_prefetch_plan(filter_obj)
+    domain_model.check_ordering(filter_obj, order_by)
+
+    plan = domain_model.determine_read_plan(filter_obj.model)
+
+    if pagination is None:
+        pagination = domain_model.PaginationObj()
 
     try:
         user: domain_model.User = repo.get(
@@ -227,6 +422,7 @@ def retrieve_tags(
             plan=plan,
             filter_obj=filter_obj,
             order_by=order_by,
+            pagination=pagination,
             prefetching=True,
         )
 
@@ -256,6 +452,8 @@ def update_tag(
 
     repo.update(tag)
 
+    _content_changed(user_id)
+
     return tag
 
 
@@ -274,17 +472,25 @@ def delete_tag(
     if not tag.check_ownership(user_id):
         raise domain_model.TagNotOwnerError
 
-    del tag
-    repo.delete()
+    repo.delete(tag)
+
+    _content_changed(user_id)
 
 
+@routing.read_only
 def retrieve_ingredients(
     user_id: int,
     filter_obj: domain_model.UserFilterObj,
     order_by: str,
     repo: repository.AbstractRepository,
+    pagination: Optional[domain_model.PaginationObj] = None,
 ):
-    plan = domain_model.determine_prefetch_plan(filter_obj)
+    domain_model.check_ordering(filter_obj, order_by)
+
+    plan = domain_model.determine_read_plan(filter_obj.model)
+
+    if pagination is None:
+        pagination = domain_model.PaginationObj()
 
     try:
         user: domain_model.User = repo.get(
@@ -292,6 +498,7 @@ def retrieve_ingredients(
             plan=plan,
             filter_obj=filter_obj,
             order_by=order_by,
+            pagination=pagination,
             prefetching=True,
         )
 
@@ -323,6 +530,8 @@ def update_ingredient(
 
     repo.update(ingredient)
 
+    _content_changed(user_id)
+
     return ingredient
 
 
@@ -343,5 +552,6 @@ def delete_ingredient(
     if not ingredient.check_ownership(user_id):
         raise domain_model.IngredientNotOwnerError
 
-    del ingredient
-    repo.delete()
+    repo.delete(ingredient)
+
+    _content_changed(user_id)
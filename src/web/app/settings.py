@@ -82,17 +82,77 @@ WSGI_APPLICATION = "app.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Connections are borrowed from a per-process pool (core.db.backends.
+# postgresql_pool) and handed back after each request, DB_POOL=false
+# connects and disconnects per request with the stock backend instead
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": (
+            "core.db.backends.postgresql_pool"
+            if os.environ.get("DB_POOL", "true").lower() == "true"
+            else "django.db.backends.postgresql"
+        ),
         "HOST": os.environ.get("DB_HOST"),
         "NAME": os.environ.get("DB_NAME"),
         "USER": os.environ.get("DB_USER"),
         "PASSWORD": os.environ.get("DB_PASS"),
+        "POOL": {
+            "MIN_SIZE": int(os.environ.get("DB_POOL_MIN_SIZE", 0)),
+            "MAX_SIZE": int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+            # seconds a request waits for a connection once MAX_SIZE are in
+            # use, before failing with OperationalError
+            "TIMEOUT": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+            "MAX_LIFETIME": float(
+                os.environ.get("DB_POOL_MAX_LIFETIME", 1800)
+            ),
+            # a connection idle for this long is pinged before reuse
+            "CHECK_INTERVAL": float(
+                os.environ.get("DB_POOL_CHECK_INTERVAL", 10)
+            ),
+        },
     }
 }
 
 
+# Read replicas, DB_REPLICAS is a comma separated list of "host[:port][/name]"
+# entries (the primary's credentials, name by default) or of
+# "sqlite:///path" files standing in for replicas locally. Read-only services
+# read from them, a user stays on the primary REPLICA_STICKY_SECONDS after
+# each of their writes.
+DATABASE_REPLICAS = []
+
+for index, replica in enumerate(
+    filter(None, os.environ.get("DB_REPLICAS", "").split(",")), 1
+):
+    replica = replica.strip()
+
+    if replica.startswith("sqlite:///"):
+        replica_settings = {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": replica[len("sqlite:///"):],
+        }
+
+    else:
+        address, _, name = replica.partition("/")
+        host, _, port = address.partition(":")
+        replica_settings = {
+            **DATABASES["default"],
+            "HOST": host,
+            "PORT": port,
+            "NAME": name or DATABASES["default"]["NAME"],
+        }
+
+    DATABASES[f"replica{index}"] = {
+        **replica_settings,
+        # tests read the test database through every replica
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica{index}")
+
+DATABASE_ROUTERS = ["core.db.routers.ReplicaRouter"]
+
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", 5))
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -111,6 +171,22 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Passwords are hashed with PBKDF2 at PASSWORD_HASH_ITERATIONS iterations
+# (Django 4.2's default is 600000), measure the cost on the deployment
+# hardware with `manage.py calibrate_hashers`. Login rehashes stored passwords
+# below the setting, never above it.
+PASSWORD_HASH_ITERATIONS = int(
+    os.environ.get("PASSWORD_HASH_ITERATIONS", 600000)
+)
+
+PASSWORD_HASHERS = [
+    "core.hashers.CalibratedPBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
@@ -133,6 +209,39 @@ STATIC_ROOT = "/vol/web/static"
 MEDIA_URL = "media/"
 MEDIA_ROOT = "/vol/web/media"
 
+# Recipe images are named after a hash of their content, the same photo
+# uploaded to many recipes is stored once. The upload handlers hash files
+# while they stream in
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+    "recipe_images": {
+        "BACKEND": "core.storage.ContentAddressedStorage",
+    },
+}
+FILE_UPLOAD_HANDLERS = [
+    "core.uploadhandler.ContentHashMemoryFileUploadHandler",
+    "core.uploadhandler.ContentHashTemporaryFileUploadHandler",
+]
+
+# How core.media sends the recipe images it allowed. "" streams them from
+# Django, "x-accel-redirect" hands them to nginx, serving MEDIA_INTERNAL_URL
+# from MEDIA_ROOT in an internal location:
+#   location /internal-media/ { internal; alias /vol/web/media/; }
+# and "x-sendfile" to Apache mod_xsendfile or lighttpd, by absolute path
+MEDIA_SENDFILE = os.environ.get("MEDIA_SENDFILE", "")
+MEDIA_INTERNAL_URL = os.environ.get("MEDIA_INTERNAL_URL", "/internal-media/")
+# Seconds the signed URLs of recipe images stay valid for at least, at
+# most twice as long. 0 serves them unsigned to anyone, the content hashes
+# the images are named after are then the only thing keeping them private
+MEDIA_URL_EXPIRY = int(os.environ.get("MEDIA_URL_EXPIRY", 60 * 60))
+# how long clients cache the images not named after their content
+MEDIA_MAX_AGE = int(os.environ.get("MEDIA_MAX_AGE", 24 * 60 * 60))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -144,10 +253,37 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=1440),
 }
 
+# Verified access tokens each process keeps until their expiry, so a client
+# reusing its token skips the signature check, 0 verifies every request
+JWT_VERIFIED_CACHE_SIZE = int(
+    os.environ.get("JWT_VERIFIED_CACHE_SIZE", 10000)
+)
+
+# JSON_BACKEND=stdlib switches the API back to DRF's json renderer/parser
+JSON_RENDERERS = {
+    "orjson": ("core.renderers.ORJSONRenderer", "core.renderers.ORJSONParser"),
+    "stdlib": (
+        "rest_framework.renderers.JSONRenderer",
+        "rest_framework.parsers.JSONParser",
+    ),
+}
+JSON_RENDERER, JSON_PARSER = JSON_RENDERERS[
+    os.environ.get("JSON_BACKEND", "orjson")
+]
+
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTStatelessUserAuthentication",
+        "core.authentication.CachedJWTStatelessUserAuthentication",
+    ),
+    "DEFAULT_RENDERER_CLASSES": (
+        JSON_RENDERER,
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        JSON_PARSER,
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
     ),
 }
 
@@ -156,3 +292,71 @@ SPECTACULAR_SETTINGS = {"COMPONENT_SPLIT_REQUEST": True}
 APPEND_SLASH = False
 
 RECIPE_MODEL_IMAGEFIELD_LOCATION = "uploads/recipe"
+
+# Copies of the recipe images rendered after each upload, longest side in
+# pixels by size name, each one encoded in every format listed
+RECIPE_IMAGE_SIZES = {"thumbnail": 320, "medium": 960}
+RECIPE_IMAGE_FORMATS = ("webp", "jpeg")
+# processes rendering them in each run_workers process, which is also the
+# number of render jobs running at once across all the workers. 0 renders
+# them in the worker threads themselves, with no limit
+RECIPE_IMAGE_WORKERS = int(os.environ.get("RECIPE_IMAGE_WORKERS", 2))
+
+# Keyset pagination of the list endpoints, clients may ask for a smaller or
+# bigger page with ?page_size= but never above LIST_MAX_PAGE_SIZE
+LIST_PAGE_SIZE = int(os.environ.get("LIST_PAGE_SIZE", 50))
+LIST_MAX_PAGE_SIZE = int(os.environ.get("LIST_MAX_PAGE_SIZE", 200))
+
+# ?stream=1 answers the whole recipe list at once, read from the database
+# and written to the client LIST_STREAM_CHUNK_SIZE recipes at a time
+LIST_STREAM_CHUNK_SIZE = int(os.environ.get("LIST_STREAM_CHUNK_SIZE", 500))
+
+# The list cache, its per-user generation counters and the replica
+# stickiness flags live in the default cache, shared by every process,
+# run_workers included: redis, which docker-compose runs beside the database
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.redis.RedisCache"
+        ),
+        "LOCATION": os.environ.get(
+            "CACHE_LOCATION", "redis://127.0.0.1:6379/0"
+        ),
+    }
+}
+
+# the cache outlives the test database, the tests clear it first
+TEST_RUNNER = "core.test_runner.TestRunner"
+
+# A cache of one process never sees the invalidations made by the others,
+# with one of these lists are not cached and replicas are refused at start
+# up (core/checks.py)
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+# 0 turns the list cache off
+LIST_CACHE_TIMEOUT = (
+    int(os.environ.get("LIST_CACHE_TIMEOUT", 300))
+    if CACHES["default"]["BACKEND"] not in PROCESS_LOCAL_CACHES
+    else 0
+)
+
+# id, email and name of users kept in each process by the user repository,
+# a change made through another process shows after at most the timeout
+USER_PROFILE_CACHE_SIZE = int(
+    os.environ.get("USER_PROFILE_CACHE_SIZE", 10000)
+)
+USER_PROFILE_CACHE_TIMEOUT = int(
+    os.environ.get("USER_PROFILE_CACHE_TIMEOUT", 60)
+)
+
+# Upper bound of recipes accepted by one POST /recipes/bulk/ request
+RECIPE_BULK_MAX_SIZE = int(os.environ.get("RECIPE_BULK_MAX_SIZE", 1000))
+
+# List and detail serializers run through functions generated from their
+# field declarations (recipe/compiled.py), False falls back to plain DRF
+COMPILED_SERIALIZERS = (
+    os.environ.get("COMPILED_SERIALIZERS", "true").lower() == "true"
+)
@@ -22,7 +22,9 @@ from drf_spectacular.views import (
 from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
-from django.conf.urls.static import static
+
+from core import media
+from core.views import HealthAPIView, MetricsAPIView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -32,12 +34,14 @@ urlpatterns = [
         SpectacularSwaggerView.as_view(url_name="api-schema"),
         name="api-docs",
     ),
+    path("health/", HealthAPIView.as_view(), name="health"),
+    path("health/metrics/", MetricsAPIView.as_view(), name="health-metrics"),
+    # MEDIA_URL comes prefixed with the script name, patterns do not
+    path(
+        f"{settings.MEDIA_URL.lstrip('/')}<path:name>",
+        media.serve,
+        name="media",
+    ),
     path("users/", include("user.urls")),
     path("", include("recipe.urls")),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL,
-        document_root=settings.MEDIA_ROOT,
-    )
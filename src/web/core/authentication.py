@@ -0,0 +1,85 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import (
+    JWTStatelessUserAuthentication,
+)
+
+
+class VerifiedTokens:
+    """Bounded LRU of verified tokens, keyed by the digest of the raw token.
+
+    A token is served from here only until its ``exp`` claim, after that
+    it is verified again, and fails, like any expired token.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._tokens = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(raw_token: bytes) -> bytes:
+        return hashlib.sha256(raw_token).digest()
+
+    def get(self, raw_token: bytes):
+        key = self.key(raw_token)
+
+        with self._lock:
+            entry = self._tokens.get(key)
+
+            if entry is None:
+                return None
+
+            token, expires_at = entry
+
+            if expires_at <= time.time():
+                del self._tokens[key]
+                return None
+
+            self._tokens.move_to_end(key)
+            return token
+
+    def set(self, raw_token: bytes, token) -> None:
+        if self.maxsize <= 0 or "exp" not in token:
+            return
+
+        key = self.key(raw_token)
+
+        with self._lock:
+            self._tokens[key] = (token, token["exp"])
+            self._tokens.move_to_end(key)
+
+            while len(self._tokens) > self.maxsize:
+                self._tokens.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+
+
+verified_tokens = VerifiedTokens(settings.JWT_VERIFIED_CACHE_SIZE)
+
+
+class CachedJWTStatelessUserAuthentication(JWTStatelessUserAuthentication):
+    # JWTStatelessUserAuthentication that verifies each distinct token once
+    # per process. DRF keeps the result on the request as request.user and
+    # request.auth, views and serializers read it from there instead of
+    # authenticating again.
+
+    def get_validated_token(self, raw_token):
+        token = verified_tokens.get(raw_token)
+
+        if token is None:
+            token = super().get_validated_token(raw_token)
+            verified_tokens.set(raw_token, token)
+
+        return token
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    target_class = CachedJWTStatelessUserAuthentication
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    # the flag keeping a user who just wrote on the primary must be seen by
+    # every process, or their next read may go to a lagging replica
+    backend = settings.CACHES["default"]["BACKEND"]
+
+    if settings.DATABASE_REPLICAS and backend in settings.PROCESS_LOCAL_CACHES:
+        return [
+            Error(
+                f"DB_REPLICAS needs a cache shared by every process, "
+                f"{backend} is local to one",
+                hint="Set CACHE_BACKEND and CACHE_LOCATION to a redis cache.",
+                id="core.E001",
+            )
+        ]
+
+    return []
@@ -0,0 +1,60 @@
+"""PostgreSQL backend whose connections come from a per-process pool.
+
+Django still opens and closes its connection around every request (with
+CONN_MAX_AGE left at 0), closing hands it back to the pool instead. The
+pool is configured by the "POOL" entry of the database settings, keys
+``MIN_SIZE``, ``MAX_SIZE``, ``TIMEOUT``, ``MAX_LIFETIME`` and
+``CHECK_INTERVAL`` as in :class:`core.db.pool.ConnectionPool`.
+"""
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from core.db import pool as db_pool
+
+from .creation import DatabaseCreation
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_pool(self, conn_params: dict) -> db_pool.ConnectionPool:
+        options = self.settings_dict.get("POOL", {})
+
+        def connect():
+            return super(DatabaseWrapper, self).get_new_connection(
+                conn_params
+            )
+
+        return db_pool.get_pool(
+            repr((sorted(conn_params.items()), sorted(options.items()))),
+            lambda: db_pool.ConnectionPool(
+                connect=connect,
+                dbname=conn_params.get("dbname"),
+                min_size=options.get("MIN_SIZE", 0),
+                max_size=options.get("MAX_SIZE", 10),
+                timeout=options.get("TIMEOUT", 10),
+                max_lifetime=options.get("MAX_LIFETIME", 1800),
+                check_interval=options.get("CHECK_INTERVAL", 10),
+            ),
+        )
+
+    @base.async_unsafe
+    def get_new_connection(self, conn_params):
+        self.pool = self.get_pool(conn_params)
+        connection = self.pool.getconn()
+
+        # set by the parent when it opens a connection, a reused one still
+        # carries the isolation level it was opened with
+        isolation_level = self.settings_dict["OPTIONS"].get("isolation_level")
+        self.isolation_level = (
+            IsolationLevel.READ_COMMITTED
+            if isolation_level is None
+            else IsolationLevel(isolation_level)
+        )
+
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.putconn(self.connection)
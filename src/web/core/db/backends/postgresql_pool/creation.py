@@ -0,0 +1,16 @@
+from django.db.backends.postgresql import creation
+
+from core.db import pool as db_pool
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    # Postgres refuses to drop a database, or to copy it as a template,
+    # while connections to it are open, idle pooled ones included
+
+    def _clone_test_db(self, suffix, verbosity, keepdb=False):
+        db_pool.close_pools(self.connection.settings_dict["NAME"])
+        super()._clone_test_db(suffix, verbosity, keepdb)
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        db_pool.close_pools(test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
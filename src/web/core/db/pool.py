@@ -0,0 +1,292 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+import psycopg2
+from psycopg2 import extensions
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    pass
+
+
+class ConnectionPool:
+    """Thread-safe pool of psycopg2 connections to one database.
+
+    Checkout hands out the most recently returned connection, checking it
+    is alive first when it sat idle for ``check_interval`` seconds or more,
+    and blocks up to ``timeout`` seconds once ``max_size`` connections are
+    in use. Connections older than ``max_lifetime`` seconds are closed
+    instead of reused, and returned connections are rolled back to a clean
+    state, or closed when that fails.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], extensions.connection],
+        dbname: str,
+        min_size: int = 0,
+        max_size: int = 10,
+        timeout: float = 10,
+        max_lifetime: float = 1800,
+        check_interval: float = 10,
+    ):
+        self.connect = connect
+        self.dbname = dbname
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check_interval = check_interval
+
+        self._lock = threading.Condition()
+        # (connection, created_at, returned_at), most recently returned last
+        self._idle = deque()
+        self._created_at = {}
+        self._size = 0
+        self._waiting = 0
+        self._closed = False
+        self._counters = dict.fromkeys(
+            (
+                "connections_created",
+                "connections_closed",
+                "checkouts",
+                "checkout_waits",
+                "checkout_timeouts",
+                "failed_checks",
+            ),
+            0,
+        )
+        self._wait_seconds = 0.0
+
+    def getconn(self) -> extensions.connection:
+        if self.min_size:
+            self._fill()
+
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            entry = self._checkout(deadline)
+
+            if entry is None:
+                # a free slot, connect outside the lock
+                return self._open()
+
+            conn, created_at, returned_at = entry
+
+            if self._healthy(conn, created_at, returned_at):
+                return conn
+
+            self._discard(conn)
+
+    def putconn(self, conn: extensions.connection) -> None:
+        created_at = self._created_at.get(id(conn))
+
+        if (
+            created_at is None
+            or self._closed
+            or self._expired(created_at)
+            or not self._reset(conn)
+        ):
+            self._discard(conn)
+            return
+
+        with self._lock:
+            self._idle.append((conn, created_at, time.monotonic()))
+            self._lock.notify()
+
+    def close(self) -> None:
+        # idle connections close now, the ones in use once returned
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+
+        for conn, _, _ in idle:
+            self._discard(conn)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "database": self.dbname,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "waiting": self._waiting,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                **self._counters,
+                "wait_seconds": round(self._wait_seconds, 6),
+            }
+
+    def _checkout(self, deadline: float):
+        with self._lock:
+            started = None
+
+            while not self._idle and self._size >= self.max_size:
+                remaining = deadline - time.monotonic()
+
+                if remaining <= 0:
+                    self._counters["checkout_timeouts"] += 1
+                    raise PoolTimeout(
+                        f"no database connection free in {self.timeout}s "
+                        f"({self.max_size} in use)"
+                    )
+
+                if started is None:
+                    started = time.monotonic()
+                    self._counters["checkout_waits"] += 1
+
+                self._waiting += 1
+
+                try:
+                    self._lock.wait(remaining)
+
+                finally:
+                    self._waiting -= 1
+
+            if started is not None:
+                self._wait_seconds += time.monotonic() - started
+
+            self._counters["checkouts"] += 1
+
+            if self._idle:
+                return self._idle.pop()
+
+            self._size += 1
+            return None
+
+    def _open(self) -> extensions.connection:
+        try:
+            conn = self.connect()
+
+        except BaseException:
+            with self._lock:
+                self._size -= 1
+                self._lock.notify()
+
+            raise
+
+        with self._lock:
+            self._created_at[id(conn)] = time.monotonic()
+            self._counters["connections_created"] += 1
+
+        return conn
+
+    def _fill(self) -> None:
+        # opens the connections missing to min_size, one at a time
+        while True:
+            with self._lock:
+                if self._closed or self._size >= self.min_size:
+                    return
+
+                self._size += 1
+
+            self.putconn(self._open())
+
+    def _healthy(self, conn, created_at: float, returned_at: float) -> bool:
+        if conn.closed or self._expired(created_at):
+            return False
+
+        if time.monotonic() - returned_at < self.check_interval:
+            return True
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+
+            conn.rollback()
+            return True
+
+        except psycopg2.Error:
+            with self._lock:
+                self._counters["failed_checks"] += 1
+
+            return False
+
+    def _expired(self, created_at: float) -> bool:
+        return time.monotonic() - created_at >= self.max_lifetime
+
+    @staticmethod
+    def _reset(conn: extensions.connection) -> bool:
+        if conn.closed:
+            return False
+
+        status = conn.info.transaction_status
+
+        if status == extensions.TRANSACTION_STATUS_IDLE:
+            return True
+
+        if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+
+        try:
+            conn.rollback()
+
+        except psycopg2.Error:
+            return False
+
+        return conn.info.transaction_status == (
+            extensions.TRANSACTION_STATUS_IDLE
+        )
+
+    def _discard(self, conn: extensions.connection) -> None:
+        try:
+            conn.close()
+
+        except psycopg2.Error:
+            pass
+
+        with self._lock:
+            if self._created_at.pop(id(conn), None) is not None:
+                self._size -= 1
+                self._counters["connections_closed"] += 1
+
+            self._lock.notify()
+
+
+_pools: dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+# connections opened before a fork, the child must neither use nor close
+# them as they share their socket with the parent
+_inherited = []
+
+
+def get_pool(key: str, factory: Callable[[], ConnectionPool]):
+    with _pools_lock:
+        pool = _pools.get(key)
+
+        if pool is None:
+            pool = _pools[key] = factory()
+
+        return pool
+
+
+def all_pools() -> list[ConnectionPool]:
+    with _pools_lock:
+        return list(_pools.values())
+
+
+def close_pools(dbname: str) -> None:
+    with _pools_lock:
+        pools = [
+            _pools.pop(key)
+            for key, pool in list(_pools.items())
+            if pool.dbname == dbname
+        ]
+
+    for pool in pools:
+        pool.close()
+
+
+def _forget_pools() -> None:
+    global _pools_lock
+
+    _inherited.extend(_pools.values())
+    _pools.clear()
+    _pools_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_pools)
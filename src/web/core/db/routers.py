@@ -0,0 +1,19 @@
+from django.db import DEFAULT_DB_ALIAS
+
+from recipe_menu.adapters import routing
+
+
+class ReplicaRouter:
+    # Writes go to the primary, reads to the database the current service
+    # call was routed to (recipe_menu.adapters.routing), the primary outside
+    # of read-only services. Replicas hold the primary's data, so objects
+    # read from one relate to and are saved on the primary.
+
+    def db_for_read(self, model, **hints):
+        return routing.read_database()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
@@ -0,0 +1,50 @@
+from collections import Counter
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count, Min
+
+
+def merge_duplicate_names(
+    model, through, column: str, using: str = DEFAULT_DB_ALIAS
+) -> Counter:
+    """Merge rows of model sharing (user, name) into the oldest one.
+
+    Recipe links of the merged rows are moved to the kept row through the
+    many-to-many table, recipes already linked to it are left as they are.
+    Returns the number of removed rows by user id.
+    """
+    removed = Counter()
+    objects = model.objects.using(using)
+    links = through.objects.using(using)
+
+    duplicates = (
+        objects.values("user_id", "name")
+        .annotate(keep=Min("id"), total=Count("id"))
+        .filter(total__gt=1)
+    )
+
+    for duplicate in duplicates:
+        keep = duplicate["keep"]
+        ids = list(
+            objects.filter(
+                user_id=duplicate["user_id"], name=duplicate["name"]
+            )
+            .exclude(id=keep)
+            .values_list("id", flat=True)
+        )
+
+        linked = set(
+            links.filter(**{column: keep}).values_list("recipe_id", flat=True)
+        )
+        rows = links.filter(**{f"{column}__in": ids})
+        recipes = set(rows.values_list("recipe_id", flat=True)) - linked
+
+        links.bulk_create(
+            [through(recipe_id=recipe, **{column: keep}) for recipe in recipes]
+        )
+        rows.delete()
+        objects.filter(id__in=ids).delete()
+
+        removed[duplicate["user_id"]] += len(ids)
+
+    return removed
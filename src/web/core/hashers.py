@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, must_update_salt
+
+
+class CalibratedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 at PASSWORD_HASH_ITERATIONS iterations.
+
+    The algorithm name is Django's own, stored hashes keep verifying and
+    ones below the configured cost are rehashed on the next login. Hashes
+    above it are left alone, lowering the setting to trade strength for
+    login throughput never weakens a password that is already stored.
+    """
+
+    @property
+    def iterations(self) -> int:
+        return settings.PASSWORD_HASH_ITERATIONS
+
+    def must_update(self, encoded: str) -> bool:
+        decoded = self.decode(encoded)
+
+        return decoded["iterations"] < self.iterations or must_update_salt(
+            decoded["salt"], self.salt_entropy
+        )
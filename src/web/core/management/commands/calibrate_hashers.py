@@ -0,0 +1,96 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand, CommandError
+
+# iterations of the probe hash the per-iteration cost is measured from
+PROBE_ITERATIONS = 100000
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the password hashers on this machine and print the "
+        "PASSWORD_HASH_ITERATIONS that makes one hash take --target-ms."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target-ms", type=float, default=250)
+        parser.add_argument("--samples", type=int, default=5)
+        parser.add_argument(
+            "--min-iterations",
+            type=int,
+            default=600000,
+            help="Never suggest less, Django 4.2's default by default.",
+        )
+
+    def handle(self, *args, **options):
+        if options["target_ms"] <= 0 or options["samples"] < 1:
+            raise CommandError("--target-ms and --samples must be positive")
+
+        samples = options["samples"]
+
+        for hasher in get_hashers():
+            try:
+                if hasher.library is not None:
+                    hasher._load_library()
+
+            except ValueError:
+                self.stdout.write(f"{hasher.algorithm}: library not installed")
+                continue
+
+            self.stdout.write(
+                f"{hasher.algorithm}: "
+                f"{self.describe(self.measure(hasher, samples))}"
+            )
+
+        preferred = get_hashers()[0]
+
+        if not hasattr(preferred, "iterations"):
+            raise CommandError(
+                f"{preferred.algorithm} has no iterations to calibrate"
+            )
+
+        per_iteration = (
+            self.measure(preferred, samples, PROBE_ITERATIONS)
+            / PROBE_ITERATIONS
+        )
+        iterations = int(options["target_ms"] / 1000 / per_iteration)
+        # round down to a readable number
+        iterations -= iterations % 1000
+
+        if iterations < options["min_iterations"]:
+            self.stderr.write(
+                f"{options['target_ms']:g}ms buys only {iterations} "
+                f"iterations, keeping --min-iterations"
+            )
+            iterations = options["min_iterations"]
+
+        self.stdout.write(
+            f"calibrated {preferred.algorithm}: "
+            f"{self.describe(self.measure(preferred, samples, iterations))} "
+            f"(currently {settings.PASSWORD_HASH_ITERATIONS} iterations)"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"PASSWORD_HASH_ITERATIONS={iterations}")
+        )
+
+    @staticmethod
+    def describe(seconds: float) -> str:
+        return f"{seconds * 1000:.1f}ms per hash, {1 / seconds:.1f} logins/s"
+
+    @staticmethod
+    def measure(hasher, samples: int, iterations=None) -> float:
+        # best of the samples, a login costs one hash on one core
+        salt = hasher.salt()
+        kwargs = {} if iterations is None else {"iterations": iterations}
+        best = None
+
+        for _ in range(samples):
+            started = time.perf_counter()
+            hasher.encode("calibrate-hashers", salt, **kwargs)
+            elapsed = time.perf_counter() - started
+
+            best = elapsed if best is None else min(best, elapsed)
+
+        return best
@@ -0,0 +1,30 @@
+from django.db import transaction
+from django.core.management.base import BaseCommand
+
+from core.dedupe import merge_duplicate_names
+from core.models import Ingredient, Recipe, Tag
+from recipe_menu import service_layer as services
+
+
+class Command(BaseCommand):
+    help = (
+        "Merge tags and ingredients that share a name for the same user, "
+        "moving their recipe links to the oldest row."
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            tags = merge_duplicate_names(Tag, Recipe.tags.through, "tag_id")
+            ingredients = merge_duplicate_names(
+                Ingredient, Recipe.ingredients.through, "ingredient_id"
+            )
+
+            # cached lists and ETags of the owners showed the merged rows
+            services.mark_content_changed(tags.keys() | ingredients.keys())
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"merged {tags.total()} duplicate tags "
+                f"and {ingredients.total()} duplicate ingredients"
+            )
+        )
@@ -0,0 +1,103 @@
+import os
+import signal
+import socket
+import threading
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+
+from recipe_menu.adapters import jobs
+
+# seconds between two prunes of the failed jobs
+PRUNE_INTERVAL = 60 * 60
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the background jobs queued in the database, with --concurrency "
+        "threads each running one job at a time. SIGINT or SIGTERM stops "
+        "them once their current job is done. Failed jobs are deleted "
+        "--prune-after days after their last attempt."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1,
+            help="Seconds an idle worker waits before looking again.",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once no job is due instead of waiting for more.",
+        )
+        parser.add_argument(
+            "--prune-after",
+            type=float,
+            default=7,
+            help="Days failed jobs are kept for, 0 keeps them for good.",
+        )
+
+    def handle(self, *args, **options):
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+        if options["burst"]:
+            count = jobs.Worker(prefix).drain()
+            self.stdout.write(f"ran {count} jobs")
+            self.prune(options["prune_after"])
+            return
+
+        stop = threading.Event()
+
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: stop.set())
+
+        def work(name: str) -> None:
+            try:
+                jobs.Worker(name).run_forever(
+                    stop, poll_interval=options["poll_interval"]
+                )
+
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=work, args=(f"{prefix}:{index}",))
+            for index in range(options["concurrency"])
+        ]
+
+        for thread in threads:
+            thread.start()
+
+        self.stdout.write(f"{len(threads)} workers started")
+
+        # the main thread prunes while the workers run
+        while True:
+            self.prune(options["prune_after"])
+            connection.close()
+
+            if stop.wait(PRUNE_INTERVAL):
+                break
+
+        for thread in threads:
+            thread.join()
+
+        self.stdout.write("workers stopped")
+
+    def prune(self, days: float) -> None:
+        if days <= 0:
+            return
+
+        try:
+            count = jobs.prune(timedelta(days=days))
+
+        except DatabaseError as exc:
+            # the database went away, the next prune tries again
+            self.stderr.write(f"could not prune failed jobs: {exc}")
+            return
+
+        if count:
+            self.stdout.write(f"pruned {count} failed jobs")
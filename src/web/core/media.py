@@ -0,0 +1,313 @@
+"""Recipe images served to clients.
+
+The recipe image storage hands out URLs signed by :func:`signed_url`,
+valid for at least settings.MEDIA_URL_EXPIRY seconds, so only clients the
+API showed a recipe to can fetch its images, for a while. :func:`serve`
+checks the signature and that the requested file may be served, then
+either hands it to the front proxy (settings.MEDIA_SENDFILE) which sends
+it straight from disk without going through a Python worker, or streams
+it itself, with support for single byte ranges. Files whose name pins
+their bytes, originals named after a hash of their content and variants
+named after it and their rendering parameters, never change. They are
+cached by clients for a year, or until their URL expires.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+import threading
+import time
+from typing import AsyncIterator, Iterator, Optional
+from urllib.parse import quote, urlencode
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import PermissionDenied, SuspiciousFileOperation
+from django.core.files.storage import storages
+from django.core.handlers.asgi import ASGIRequest
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
+from django.utils.crypto import constant_time_compare
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+CHUNK_SIZE = 64 * 1024
+
+# <digest>.<ext>, or variants/<digest>/<name>-<size>-q<quality>.<ext>
+_IMMUTABLE = re.compile(
+    r"(^|/)([0-9a-f]{64}|variants/[0-9a-f]{64}/[^/]+-\d+-q\d+)\.[^/.]+$"
+)
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+_signer = signing.Signer(salt="core.media")
+
+_lock = threading.Lock()
+_stats = {
+    "requests": 0,
+    "not_modified": 0,
+    "partial": 0,
+    "bytes_sent": 0,
+    "bytes_offloaded": 0,
+}
+
+
+def _count(**amounts: int) -> None:
+    with _lock:
+        for key, amount in amounts.items():
+            _stats[key] += amount
+
+
+def stats() -> dict[str, int]:
+    with _lock:
+        return dict(_stats)
+
+
+def url_window() -> int:
+    """The period URLs are signed for, they are the same all through it.
+
+    Cached bodies and ETags holding image URLs are keyed on it, a client
+    told its copy is fresh never holds expired URLs.
+    """
+    if not settings.MEDIA_URL_EXPIRY:
+        return 0
+
+    return int(time.time() // settings.MEDIA_URL_EXPIRY)
+
+
+def _signature(name: str, expires: str) -> str:
+    return _signer.signature(f"{name}:{expires}")
+
+
+def signed_url(url: str, name: str) -> str:
+    """``url`` of the stored file ``name`` with an expiring signature."""
+    if not settings.MEDIA_URL_EXPIRY:
+        return url
+
+    # valid until the end of the window after this one
+    expires = str((url_window() + 2) * settings.MEDIA_URL_EXPIRY)
+    query = urlencode(
+        {"expires": expires, "signature": _signature(name, expires)}
+    )
+
+    return f"{url}?{query}"
+
+
+def _check_signature(request, name: str) -> Optional[int]:
+    # seconds the url is still valid for, None when urls are not signed
+    if not settings.MEDIA_URL_EXPIRY:
+        return None
+
+    expires = request.GET.get("expires", "")
+    signature = request.GET.get("signature", "")
+
+    if not expires.isdigit() or not constant_time_compare(
+        signature, _signature(name, expires)
+    ):
+        raise PermissionDenied
+
+    remaining = int(expires) - int(time.time())
+
+    if remaining <= 0:
+        raise PermissionDenied
+
+    return remaining
+
+
+def _servable(name: str) -> str:
+    # only recipe images, never a file still being written (the storage
+    # writes under a dot name first) nor anything outside the storage
+    name = posixpath.normpath(name).lstrip("/")
+    location = settings.RECIPE_MODEL_IMAGEFIELD_LOCATION
+
+    if not name.startswith(f"{location}/") or any(
+        part.startswith(".") for part in name.split("/")
+    ):
+        raise Http404
+
+    return name
+
+
+def _cache_control(name: str, remaining: Optional[int]) -> str:
+    immutable = _IMMUTABLE.search(name)
+    max_age = IMMUTABLE_MAX_AGE if immutable else settings.MEDIA_MAX_AGE
+
+    # never kept past the expiry of the url it was fetched with
+    if remaining is not None:
+        max_age = min(max_age, remaining)
+
+    if immutable:
+        return f"public, max-age={max_age}, immutable"
+
+    return f"public, max-age={max_age}"
+
+
+def _byte_range(
+    header: Optional[str], size: int
+) -> Optional[tuple[int, int]]:
+    # the first and last byte of a single range, None for the whole file.
+    # Raises ValueError when the range cannot be satisfied
+    match = _RANGE.match(header or "")
+
+    if match is None:
+        # absent, malformed or several ranges, the whole file answers
+        # them all
+        return None
+
+    first, last = match.groups()
+
+    if not first:
+        if not last:
+            return None
+
+        first, last = max(size - int(last), 0), size - 1
+
+    else:
+        first = int(first)
+        last = min(int(last), size - 1) if last else size - 1
+
+    if first > last or first >= size:
+        raise ValueError
+
+    return first, last
+
+
+def _read_range(path: str, first: int, last: int) -> Iterator[bytes]:
+    with open(path, "rb") as file:
+        file.seek(first)
+        remaining = last - first + 1
+
+        while remaining > 0:
+            chunk = file.read(min(CHUNK_SIZE, remaining))
+
+            if not chunk:
+                break
+
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def _aread_range(
+    path: str, first: int, last: int
+) -> AsyncIterator[bytes]:
+    # Django buffers a sync iterator whole under ASGI, each chunk is read
+    # in a thread instead, any thread as no connection is involved
+    chunks = _read_range(path, first, last)
+    step = sync_to_async(next, thread_sensitive=False)
+
+    try:
+        while True:
+            chunk = await step(chunks, None)
+
+            if chunk is None:
+                return
+
+            yield chunk
+
+    finally:
+        chunks.close()
+
+
+def _offload(name: str, path: str) -> HttpResponse:
+    response = HttpResponse()
+
+    # the proxy answers range and conditional requests itself
+    if settings.MEDIA_SENDFILE == "x-accel-redirect":
+        response["X-Accel-Redirect"] = quote(
+            f"{settings.MEDIA_INTERNAL_URL}{name}"
+        )
+
+    else:
+        response["X-Sendfile"] = path
+
+    return response
+
+
+@require_safe
+def serve(request, name: str):
+    name = _servable(name)
+    remaining = _check_signature(request, name)
+    storage = storages["recipe_images"]
+
+    try:
+        path = storage.path(name)
+
+    except SuspiciousFileOperation:
+        raise Http404
+
+    if not os.path.isfile(path):
+        raise Http404
+
+    size = storage.size(name)
+    modified = storage.get_modified_time(name).timestamp()
+
+    _count(requests=1)
+
+    if not was_modified_since(
+        request.META.get("HTTP_IF_MODIFIED_SINCE"), modified
+    ):
+        _count(not_modified=1)
+        response = HttpResponseNotModified()
+
+    elif settings.MEDIA_SENDFILE:
+        _count(bytes_offloaded=size)
+        response = _offload(name, path)
+
+    else:
+        header = request.META.get("HTTP_RANGE")
+
+        # a range of a copy the client holds, which it no longer is
+        if request.META.get("HTTP_IF_RANGE", http_date(modified)) != (
+            http_date(modified)
+        ):
+            header = None
+
+        try:
+            byte_range = _byte_range(header, size)
+
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+        asgi = isinstance(request, ASGIRequest)
+
+        if byte_range is None and not asgi:
+            _count(bytes_sent=size)
+            # file_wrapper lets the WSGI server send it with sendfile()
+            response = FileResponse(open(path, "rb"))
+
+        else:
+            first, last = byte_range or (0, size - 1)
+            read = _aread_range if asgi else _read_range
+            response = StreamingHttpResponse(
+                read(path, first, last),
+                status=206 if byte_range is not None else 200,
+            )
+            response["Content-Length"] = str(last - first + 1)
+
+            if byte_range is None:
+                _count(bytes_sent=size)
+
+            else:
+                _count(partial=1, bytes_sent=last - first + 1)
+                response["Content-Range"] = f"bytes {first}-{last}/{size}"
+
+        response["Accept-Ranges"] = "bytes"
+
+    if response.status_code != 304:
+        content_type, _ = mimetypes.guess_type(name)
+        response["Content-Type"] = content_type or "application/octet-stream"
+
+    response["Cache-Control"] = _cache_control(name, remaining)
+    response["Last-Modified"] = http_date(modified)
+
+    return response
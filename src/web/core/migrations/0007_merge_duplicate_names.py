@@ -0,0 +1,65 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_names(model, through, column: str, using: str) -> None:
+    # a copy of core.dedupe as it was when this migration was written, so
+    # the migration stays as it is whatever becomes of that module
+    objects = model.objects.using(using)
+    links = through.objects.using(using)
+
+    duplicates = (
+        objects.values("user_id", "name")
+        .annotate(keep=Min("id"), total=Count("id"))
+        .filter(total__gt=1)
+    )
+
+    for duplicate in duplicates:
+        keep = duplicate["keep"]
+        ids = list(
+            objects.filter(
+                user_id=duplicate["user_id"], name=duplicate["name"]
+            )
+            .exclude(id=keep)
+            .values_list("id", flat=True)
+        )
+
+        linked = set(
+            links.filter(**{column: keep}).values_list("recipe_id", flat=True)
+        )
+        rows = links.filter(**{f"{column}__in": ids})
+        recipes = set(rows.values_list("recipe_id", flat=True)) - linked
+
+        links.bulk_create(
+            [through(recipe_id=recipe, **{column: keep}) for recipe in recipes]
+        )
+        rows.delete()
+        objects.filter(id__in=ids).delete()
+
+
+def merge_duplicates(apps, schema_editor):
+    Recipe = apps.get_model("core", "Recipe")
+    using = schema_editor.connection.alias
+
+    merge_duplicate_names(
+        apps.get_model("core", "Tag"), Recipe.tags.through, "tag_id", using
+    )
+    merge_duplicate_names(
+        apps.get_model("core", "Ingredient"),
+        Recipe.ingredients.through,
+        "ingredient_id",
+        using,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_versions"),
+    ]
+
+    # the unique constraints come in the next migration, postgres refuses
+    # to alter a table with pending trigger events in the same transaction
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.10 on 2026-10-17 08:41
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(null=True, storage=core.storage.recipe_image_storage, upload_to='uploads/recipe'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    # the index is built concurrently, which cannot run in a transaction
+    atomic = False
+
+    dependencies = [
+        ("core", "0011_job"),
+    ]
+
+    # see core.models.RecipeSearchVector, the column is generated by
+    # postgres and unknown to the model. Matches in the title weigh more
+    # than matches in the description
+    operations = [
+        migrations.RunSQL(
+            """
+            ALTER TABLE core_recipe ADD COLUMN search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('english'::regconfig, title), 'A')
+                || setweight(
+                    to_tsvector('english'::regconfig, description), 'B'
+                )
+            ) STORED
+            """,
+            "ALTER TABLE core_recipe DROP COLUMN search_vector",
+        ),
+        migrations.RunSQL(
+            "CREATE INDEX CONCURRENTLY recipe_search_idx "
+            "ON core_recipe USING gin (search_vector)",
+            "DROP INDEX CONCURRENTLY recipe_search_idx",
+        ),
+    ]
@@ -1,14 +1,46 @@
-from typing import Optional, Union
+from operator import methodcaller
+from typing import Callable, Iterable, Iterator, Optional, Union
 from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVectorField,
+)
 from django.db import models
+from django.db.models.functions import Cast
+from django.utils import timezone
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
     PermissionsMixin,
 )
 
+from core.storage import recipe_image_storage
+from recipe_menu.adapters.pagination import apaginate, paginate
+from recipe_menu.adapters.prefetch import aprefetch_related
 from recipe_menu.domain import model as domain_model
 
+# text search configuration of the recipe search vector, a change needs a
+# migration regenerating the column
+SEARCH_CONFIG = "english"
+
+
+class RecipeSearchVector(models.Expression):
+    """The ``search_vector`` column of the recipes being queried.
+
+    Postgres generates it from the title and description (migration
+    0012_recipe_search_vector) and keeps it under a GIN index. It is not a
+    model field, Django 4.2 has no generated fields and would write it on
+    every save.
+    """
+
+    output_field = SearchVectorField()
+
+    def as_sql(self, compiler, connection):
+        alias = compiler.query.get_initial_alias()
+
+        return f"{compiler.quote_name_unless_alias(alias)}.search_vector", []
+
 
 class UserManager(BaseUserManager):
     """Manager for users."""
@@ -44,6 +76,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     name = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # bumped on every change to the user's recipes, tags and ingredients
+    content_version = models.PositiveIntegerField(default=1)
 
     objects = UserManager()
 
@@ -77,7 +111,62 @@ class User(AbstractBaseUser, PermissionsMixin):
             Union[domain_model.UserFilterObj, domain_model.UserAssignedObj]
         ] = None,
         order_by: Optional[Union[str, list[str]]] = None,
+        plan: Optional[domain_model.ReadPlan] = None,
+        pagination: Optional[domain_model.PaginationObj] = None,
+    ) -> domain_model.User:
+        user = self._to_domain_user()
+
+        if not prefetching:
+            return user
+
+        if plan is None:
+            plan = domain_model.ReadPlan()
+
+        setattr(
+            user,
+            self._LISTED[filter_obj.model],
+            self._materialize(
+                self._listed(filter_obj, plan),
+                order_by=order_by,
+                pagination=pagination,
+                convert=self._converter(filter_obj, plan),
+            ),
+        )
+
+        return user
+
+    async def ato_domain(
+        self,
+        filter_obj: Union[
+            domain_model.UserFilterObj, domain_model.UserAssignedObj
+        ],
+        order_by: str,
+        plan: Optional[domain_model.ReadPlan] = None,
+        pagination: Optional[domain_model.PaginationObj] = None,
     ) -> domain_model.User:
+        # to_domain(prefetching=True) on the async ORM, the relations of
+        # the listed recipes are read by aprefetch_related since
+        # prefetch_related has no async form in Django 4.2
+        user = self._to_domain_user()
+
+        if plan is None:
+            plan = domain_model.ReadPlan()
+
+        setattr(
+            user,
+            self._LISTED[filter_obj.model],
+            await self._amaterialize(
+                self._listed(filter_obj, plan).prefetch_related(None),
+                order_by=order_by,
+                pagination=pagination,
+                convert=self._converter(filter_obj, plan),
+                relations=[lookup.prefetch_to for lookup in plan.prefetch],
+            ),
+        )
+
+        return user
+
+    def _to_domain_user(self) -> domain_model.User:
         methods = domain_model.BaseUserMethods(
             check_password=self.check_password,
             refresh_from_db=self.refresh_from_db,
@@ -92,45 +181,150 @@ class User(AbstractBaseUser, PermissionsMixin):
         )
         user.id = self.id
 
-        if not prefetching:
-            return user
+        return user
+
+    # attribute of the domain user each listed collection is kept in
+    _LISTED = {
+        domain_model.UserFilterModel.RECIPES: "_recipes",
+        domain_model.UserFilterModel.TAGS: "_tags",
+        domain_model.UserFilterModel.INGREDIENTS: "_ingredients",
+    }
 
+    def _listed(
+        self,
+        filter_obj: Union[
+            domain_model.UserFilterObj, domain_model.UserAssignedObj
+        ],
+        plan: domain_model.ReadPlan,
+    ) -> models.QuerySet:
         if filter_obj.model == domain_model.UserFilterModel.RECIPES:
-            user._recipes = [
-                recipe.to_domain()
-                for recipe in self.recipes.filter(
-                    self._recipes_queryset(
-                        tags=filter_obj.tags,
-                        ingredients=filter_obj.ingredients,
-                    )
-                ).order_by(order_by)
-            ]
+            return self._planned_recipes(filter_obj, plan)
 
-        elif filter_obj.model == domain_model.UserFilterModel.TAGS:
-            user._tags = [
-                tag.to_domain()
-                for tag in self.tags.filter(
-                    self._tags_queryset(
-                        filter_obj.tags, filter_obj.assigned_only
-                    )
+        if filter_obj.model == domain_model.UserFilterModel.TAGS:
+            return self.tags.filter(
+                self._tags_queryset(filter_obj.tags, filter_obj.assigned_only)
+            ).distinct()
+
+        return self.ingredients.filter(
+            self._ingredients_queryset(
+                filter_obj.ingredients, filter_obj.assigned_only
+            )
+        ).distinct()
+
+    @staticmethod
+    def _converter(
+        filter_obj: Union[
+            domain_model.UserFilterObj, domain_model.UserAssignedObj
+        ],
+        plan: domain_model.ReadPlan,
+    ) -> Callable:
+        if filter_obj.model == domain_model.UserFilterModel.RECIPES:
+            return lambda recipe: recipe.to_domain(fields=plan.fields)
+
+        return methodcaller("to_domain")
+
+    def stream_recipes(
+        self,
+        filter_obj: domain_model.UserFilterObj,
+        order_by: str,
+        plan: domain_model.ReadPlan,
+        chunk_size: int,
+    ) -> Iterator[domain_model.Recipe]:
+        # rows come from a server-side cursor chunk_size at a time, with
+        # the relations prefetched per chunk, nothing is kept after it
+        recipes = self._planned_recipes(filter_obj, plan).order_by(order_by)
+
+        for recipe in recipes.iterator(chunk_size=chunk_size):
+            yield recipe.to_domain(fields=plan.fields)
+
+    def _planned_recipes(
+        self,
+        filter_obj: domain_model.UserFilterObj,
+        plan: domain_model.ReadPlan,
+    ) -> models.QuerySet:
+        recipes = (
+            self.recipes.filter(
+                self._recipes_queryset(
+                    tags=filter_obj.tags,
+                    ingredients=filter_obj.ingredients,
                 )
-                .order_by(order_by)
-                .distinct()
-            ]
+            )
+            .distinct()
+            .prefetch_related(*plan.prefetch)
+        )
+
+        if filter_obj.search is not None:
+            recipes = self._search(recipes, filter_obj.search)
+
+        if plan.columns is not None:
+            recipes = recipes.only(*plan.columns)
+
+        return recipes
+
+    @staticmethod
+    def _search(recipes: models.QuerySet, search: str) -> models.QuerySet:
+        # the match is answered by the GIN index, only matching rows are
+        # ranked. The rank is read back as double precision, the real
+        # ts_rank returns would not survive the round trip through a
+        # keyset cursor
+        query = SearchQuery(
+            search, config=SEARCH_CONFIG, search_type="websearch"
+        )
 
-        elif filter_obj.model == domain_model.UserFilterModel.INGREDIENTS:
-            user._ingredients = [
-                ingredient.to_domain()
-                for ingredient in self.ingredients.filter(
-                    self._ingredients_queryset(
-                        filter_obj.ingredients, filter_obj.assigned_only
+        return (
+            recipes.alias(search_vector=RecipeSearchVector())
+            .filter(search_vector=query)
+            .annotate(
+                **{
+                    domain_model.SEARCH_RANK: Cast(
+                        SearchRank(RecipeSearchVector(), query),
+                        models.FloatField(),
                     )
-                )
-                .order_by(order_by)
-                .distinct()
-            ]
+                }
+            )
+        )
 
-        return user
+    @staticmethod
+    def _materialize(
+        queryset: models.QuerySet,
+        order_by: str,
+        pagination: Optional[domain_model.PaginationObj] = None,
+        convert: Optional[Callable] = None,
+    ) -> Union[list, domain_model.Page]:
+        if convert is None:
+            convert = methodcaller("to_domain")
+
+        if pagination is None:
+            return [convert(obj) for obj in queryset.order_by(order_by)]
+
+        rows, next, prev = paginate(queryset, order_by, pagination)
+
+        return domain_model.Page(
+            items=[convert(obj) for obj in rows], next=next, prev=prev
+        )
+
+    @staticmethod
+    async def _amaterialize(
+        queryset: models.QuerySet,
+        order_by: str,
+        convert: Callable,
+        pagination: Optional[domain_model.PaginationObj] = None,
+        relations: Iterable[str] = (),
+    ) -> Union[list, domain_model.Page]:
+        if pagination is None:
+            rows = [obj async for obj in queryset.order_by(order_by)]
+
+        else:
+            rows, next, prev = await apaginate(queryset, order_by, pagination)
+
+        await aprefetch_related(rows, relations)
+
+        if pagination is None:
+            return [convert(obj) for obj in rows]
+
+        return domain_model.Page(
+            items=[convert(obj) for obj in rows], next=next, prev=prev
+        )
 
     def _recipes_queryset(
         self, tags: Union[list[str], None], ingredients: Union[list[str], None]
@@ -172,6 +366,45 @@ class User(AbstractBaseUser, PermissionsMixin):
         return q
 
 
+def resolve_names(
+    model: Union["Tag", "Ingredient"], user, names: Iterable[str]
+) -> dict[str, Union["Tag", "Ingredient"]]:
+    """Return the user's instances of model for names, creating missing ones.
+
+    Costs one query when every name exists and three otherwise, whatever
+    the number of names.
+    """
+    names = set(names)
+
+    if not names:
+        return {}
+
+    instances = {
+        instance.name: instance
+        for instance in model.objects.filter(user=user, name__in=names)
+    }
+    missing = names - instances.keys()
+
+    if missing:
+        # ON CONFLICT DO NOTHING skips the names a concurrent request has
+        # created meanwhile, postgres does not return their ids so every
+        # missing name is read back
+        model.objects.bulk_create(
+            [model(user=user, name=name) for name in missing],
+            ignore_conflicts=True,
+        )
+        instances.update(
+            {
+                instance.name: instance
+                for instance in model.objects.filter(
+                    user=user, name__in=missing
+                )
+            }
+        )
+
+    return instances
+
+
 class Recipe(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
@@ -180,8 +413,11 @@ class Recipe(models.Model):
     link = models.CharField(max_length=255, blank=True)
 
     image = models.ImageField(
-        upload_to=settings.RECIPE_MODEL_IMAGEFIELD_LOCATION, null=True
+        upload_to=settings.RECIPE_MODEL_IMAGEFIELD_LOCATION,
+        storage=recipe_image_storage,
+        null=True,
     )
+    image_variants = models.JSONField(default=dict, blank=True)
 
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -191,6 +427,24 @@ class Recipe(models.Model):
 
     tags = models.ManyToManyField("Tag")
     ingredients = models.ManyToManyField("Ingredient")
+    version = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        # one per ordering of the recipe list, a page is read off an index
+        # range of the user instead of sorting all their recipes
+        indexes = [
+            models.Index(fields=["user", "id"], name="recipe_user_id_idx"),
+            models.Index(
+                fields=["user", "title", "id"], name="recipe_user_title_idx"
+            ),
+            models.Index(
+                fields=["user", "time_minutes", "id"],
+                name="recipe_user_time_idx",
+            ),
+            models.Index(
+                fields=["user", "price", "id"], name="recipe_user_price_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.title
@@ -201,17 +455,53 @@ class Recipe(models.Model):
         model: Union["Tag", "Ingredient"],
         relate_user,
         relate_manager,
+        current_ids: Optional[set[int]] = None,
     ) -> None:
         # domain_models:
         # is new value being insert into db, like: {"name": "tag1"}
         # relate_manager:
         # for add recipe relation instance (tag, ingredients)
+        # current_ids:
+        # ids already related, only the difference is written
+        instances = resolve_names(
+            model, relate_user, [entry.name for entry in domain_models]
+        )
+
         for entry in domain_models:
-            obj, _ = model.objects.get_or_create(
-                user=relate_user, **entry.to_dict()
+            entry.id = instances[entry.name].id
+
+        if current_ids is None:
+            current_ids = set()
+
+        requested_ids = {entry.id for entry in domain_models}
+        stale_ids = current_ids - requested_ids
+        new_ids = requested_ids - current_ids
+
+        source = f"{relate_manager.source_field_name}_id"
+        target = f"{relate_manager.target_field_name}_id"
+        through = relate_manager.through
+
+        if stale_ids:
+            through.objects.filter(
+                **{
+                    source: relate_manager.instance.id,
+                    f"{target}__in": stale_ids,
+                }
+            ).delete()
+
+        if new_ids:
+            through.objects.bulk_create(
+                [
+                    through(**{source: relate_manager.instance.id, target: id})
+                    for id in new_ids
+                ],
+                ignore_conflicts=True,
             )
-            entry.id = obj.id
-            relate_manager.add(obj)
+
+        if stale_ids or new_ids:
+            getattr(
+                relate_manager.instance, "_prefetched_objects_cache", {}
+            ).pop(relate_manager.prefetch_cache_name, None)
 
     def update_from_domain(self, recipe: domain_model.Recipe) -> None:
         self.title = recipe.title
@@ -220,19 +510,20 @@ class Recipe(models.Model):
         self.price = recipe.price
         self.link = recipe.link
         self.image = recipe.image_object.image
+        self.version = models.F("version") + 1
 
-        if self.tags.exists() and recipe.update_tags:
-            self.tags.clear()
-
-        if self.ingredients.exists() and recipe.update_ingredients:
-            self.ingredients.clear()
+        if recipe.update_image:
+            self.image_variants = recipe.image_variants
 
+        # .all() is served from the prefetch cache when update_recipe
+        # prefetched the relation it is about to change
         if recipe.update_tags:
             self._get_or_create_instance(
                 domain_models=recipe.tags,
                 model=Tag,
                 relate_user=self.user,
                 relate_manager=self.tags,
+                current_ids={tag.id for tag in self.tags.all()},
             )
 
         if recipe.update_ingredients:
@@ -241,35 +532,75 @@ class Recipe(models.Model):
                 model=Ingredient,
                 relate_user=self.user,
                 relate_manager=self.ingredients,
+                current_ids={
+                    ingredient.id for ingredient in self.ingredients.all()
+                },
             )
 
-        self.save()
+        # the image pipeline fills image_variants in after the upload
+        # commits, saving the value loaded before that would drop them
+        self.save(
+            update_fields=(
+                None
+                if recipe.update_image
+                else [
+                    field.name
+                    for field in self._meta.concrete_fields
+                    if not field.primary_key
+                    and field.name != "image_variants"
+                ]
+            )
+        )
+
+    def to_domain(
+        self, fields: Optional[Iterable[str]] = None
+    ) -> domain_model.Recipe:
+        # fields restricts the conversion to what a sparse read loaded,
+        # touching a deferred column or relation would cost a query per row
+        deferred = self.get_deferred_fields()
+
+        def loaded(name: str) -> bool:
+            return name not in deferred and (fields is None or name in fields)
 
-    def to_domain(self) -> domain_model.Recipe:
         recipe = domain_model.Recipe(
-            title=self.title,
-            description=self.description,
-            time_minutes=self.time_minutes,
-            price=self.price,
-            link=self.link,
-            image_object=domain_model.RecipeImage(self.image),
+            title=self.title if loaded("title") else None,
+            description=(
+                self.description if loaded("description") else None
+            ),
+            time_minutes=(
+                self.time_minutes if loaded("time_minutes") else None
+            ),
+            price=self.price if loaded("price") else None,
+            link=self.link if loaded("link") else None,
+            image_object=(
+                domain_model.RecipeImage(self.image)
+                if loaded("image")
+                else None
+            ),
+            image_variants=(
+                self.image_variants if loaded("image_variants") else None
+            ),
+            # .all() is served from the prefetch cache when the caller
+            # prefetched the relations, an extra .exists() would not be
             tags=(
-                [tag.to_domain() for tag in self.tags.all()]
-                if self.tags.exists()
+                [tag.to_domain(user=self.user) for tag in self.tags.all()]
+                if loaded("tags")
                 else None
             ),
             ingredients=(
                 [
-                    ingredient.to_domain()
+                    ingredient.to_domain(user=self.user)
                     for ingredient in self.ingredients.all()
                 ]
-                if self.ingredients.exists()
+                if loaded("ingredients")
                 else None
             ),
         )
 
         recipe.id = self.id
-        recipe.user = self.user
+
+        if fields is None or Recipe.user.is_cached(self):
+            recipe.user = self.user
 
         return recipe
 
@@ -298,6 +629,71 @@ class Recipe(models.Model):
 
         return instance
 
+    @classmethod
+    def add_many_from_domain(
+        cls, recipes: list[domain_model.Recipe]
+    ) -> list["Recipe"]:
+        """Insert recipes of a single user with a fixed number of queries.
+
+        The recipes are inserted in one statement, the tag and ingredient
+        names of the whole batch are resolved together and each relation
+        is linked with one more insert.
+        """
+        if not recipes:
+            return []
+
+        instances = cls.objects.bulk_create(
+            [
+                cls(
+                    title=recipe.title,
+                    description=recipe.description,
+                    time_minutes=recipe.time_minutes,
+                    price=recipe.price,
+                    link=recipe.link,
+                    user=recipe.user,
+                )
+                for recipe in recipes
+            ]
+        )
+
+        for recipe, instance in zip(recipes, instances):
+            recipe.id = instance.id
+
+        for field, model in (("tags", Tag), ("ingredients", Ingredient)):
+            domain_models = {
+                recipe.id: getattr(recipe, field) for recipe in recipes
+            }
+            resolved = resolve_names(
+                model,
+                recipes[0].user,
+                [
+                    entry.name
+                    for entries in domain_models.values()
+                    for entry in entries
+                ],
+            )
+
+            m2m = cls._meta.get_field(field)
+            through = m2m.remote_field.through
+            source = f"{m2m.m2m_field_name()}_id"
+            target = f"{m2m.m2m_reverse_field_name()}_id"
+            rows = set()
+
+            for recipe_id, entries in domain_models.items():
+                for entry in entries:
+                    entry.id = resolved[entry.name].id
+                    rows.add((recipe_id, entry.id))
+
+            through.objects.bulk_create(
+                [
+                    through(**{source: recipe_id, target: id})
+                    for recipe_id, id in rows
+                ],
+                ignore_conflicts=True,
+            )
+
+        return instances
+
 
 class Tag(models.Model):
     name = models.CharField(max_length=255)
@@ -307,6 +703,13 @@ class Tag(models.Model):
         related_name="tags",
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "name"], name="unique_tag_user_name"
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -314,11 +717,14 @@ class Tag(models.Model):
         self.name = tag.name
         self.save()
 
-    def to_domain(self) -> domain_model.Tag:
+    def to_domain(self, user=None) -> domain_model.Tag:
         tag = domain_model.Tag(name=self.name)
 
         tag.id = self.id
-        tag.user = self.user
+        # reuse an already loaded owner instead of lazily fetching it per tag
+        tag.user = (
+            user if user is not None and user.id == self.user_id else self.user
+        )
 
         return tag
 
@@ -331,6 +737,13 @@ class Ingredient(models.Model):
         related_name="ingredients",
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "name"], name="unique_ingredient_user_name"
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -338,8 +751,70 @@ class Ingredient(models.Model):
         self.name = ingredient.name
         self.save()
 
-    def to_domain(self):
+    def to_domain(self, user=None) -> domain_model.Ingredient:
         ingredient = domain_model.Ingredient(id=self.id, name=self.name)
-        ingredient.user = self.user
+        ingredient.user = (
+            user if user is not None and user.id == self.user_id else self.user
+        )
 
         return ingredient
+
+
+class Job(models.Model):
+    """Deferred work run by manage.py run_workers.
+
+    See recipe_menu.adapters.jobs, a job is the dotted path of a task
+    function and the keyword arguments it is called with.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "queued"
+        RUNNING = "running"
+        FAILED = "failed"
+
+    task = models.CharField(max_length=255)
+    payload = models.JSONField(default=dict)
+    priority = models.SmallIntegerField(default=0)
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=255, blank=True)
+    locked_until = models.DateTimeField(null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # the order workers claim queued jobs in
+            models.Index(
+                models.F("priority").desc(),
+                "run_at",
+                "id",
+                condition=models.Q(status="queued"),
+                name="job_queued_idx",
+            ),
+            models.Index(
+                "task",
+                condition=models.Q(status="running"),
+                name="job_running_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.id}"
+
+
+class ImportCheckpoint(models.Model):
+    """Records imported so far by manage.py import_recipes --checkpoint.
+
+    Saved in the transaction of each batch, so it never disagrees with the
+    recipes committed.
+    """
+
+    name = models.CharField(max_length=255, unique=True)
+    position = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} at {self.position}"
@@ -0,0 +1,80 @@
+"""JSON renderer and parser backed by orjson.
+
+Both are drop-in replacements of DRF's JSONRenderer and JSONParser and
+produce the same bytes and data. Whatever orjson does not handle natively
+(Decimal, lazy translation strings, datetimes in DRF's format, ...) goes
+through DRF's own encoder, and anything orjson rejects, or a missing
+orjson, is handed to the stdlib implementation.
+"""
+import io
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+
+except ImportError:  # pragma: no cover
+    orjson = None
+
+if orjson is not None:
+    OPTIONS = (
+        orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+_encoder = JSONEncoder()
+
+
+class ORJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+            is not None
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+
+        try:
+            ret = orjson.dumps(data, default=_encoder.default, option=OPTIONS)
+
+        except orjson.JSONEncodeError:
+            # e.g. integers above 64 bits, the stdlib has no such limit
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+
+        # same escaping as JSONRenderer, keeps the output a javascript subset
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", "utf-8")
+
+        if orjson is None or encoding.lower().replace("_", "-") != "utf-8":
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+
+        try:
+            return orjson.loads(body)
+
+        except orjson.JSONDecodeError:
+            # the stdlib accepts big integers and NaN when not strict, and
+            # words its error like JSONParser
+            return super().parse(
+                io.BytesIO(body), media_type, parser_context
+            )
@@ -0,0 +1,42 @@
+import os
+import uuid
+
+from django.core.files.storage import FileSystemStorage, storages
+
+from core import media
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage for files named after a hash of their content.
+
+    A name always stands for the same bytes, so saving a name that already
+    exists writes nothing and returns it unchanged instead of picking a new
+    one. Files are written under a temporary name and renamed into place,
+    two uploads of the same content racing each other leave one whole file.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        if self.exists(name):
+            return name
+
+        directory, filename = os.path.split(name)
+        partial = super()._save(
+            os.path.join(directory, f".{uuid.uuid4().hex}.{filename}"),
+            content,
+        )
+        os.replace(self.path(partial), self.path(name))
+
+        return name
+
+    def url(self, name):
+        # core.media only serves the files on a signed url
+        return media.signed_url(super().url(name), name)
+
+
+def recipe_image_storage():
+    # resolved when used rather than when the model is declared, tests
+    # overriding STORAGES reach the image field too
+    return storages["recipe_images"]
@@ -0,0 +1,15 @@
+from django.core.cache import cache
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """Run the tests against an empty default cache.
+
+    The cache outlives the test database, cached lists and generation
+    counters left by an earlier run would be found again by the users of
+    this run, who get the same ids.
+    """
+
+    def setup_databases(self, **kwargs):
+        cache.clear()
+        return super().setup_databases(**kwargs)
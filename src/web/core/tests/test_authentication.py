@@ -0,0 +1,105 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import (
+    JWTStatelessUserAuthentication,
+)
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.authentication import VerifiedTokens, verified_tokens
+
+ME_URL = reverse("user:me")
+
+
+class VerifiedTokensTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "user@example.com", "Aa1234567"
+        )
+
+    def token(self, lifetime=timedelta(minutes=5)):
+        token = AccessToken.for_user(self.user)
+        token.set_exp(lifetime=lifetime)
+        return str(token).encode(), AccessToken(str(token))
+
+    def test_get_verified_token(self):
+        tokens = VerifiedTokens(maxsize=2)
+        raw, token = self.token()
+        tokens.set(raw, token)
+
+        self.assertIs(tokens.get(raw), token)
+        self.assertIsNone(tokens.get(raw + b"x"))
+
+    def test_expired_token_dropped(self):
+        tokens = VerifiedTokens(maxsize=2)
+        raw, token = self.token()
+        tokens.set(raw, token)
+
+        with patch("time.time", return_value=token["exp"]):
+            self.assertIsNone(tokens.get(raw))
+
+        self.assertIsNone(tokens.get(raw))
+
+    def test_least_recently_used_evicted(self):
+        tokens = VerifiedTokens(maxsize=2)
+        entries = [self.token(timedelta(minutes=i + 1)) for i in range(3)]
+
+        tokens.set(*entries[0])
+        tokens.set(*entries[1])
+        tokens.get(entries[0][0])
+        tokens.set(*entries[2])
+
+        self.assertIsNotNone(tokens.get(entries[0][0]))
+        self.assertIsNone(tokens.get(entries[1][0]))
+        self.assertIsNotNone(tokens.get(entries[2][0]))
+
+    def test_disabled(self):
+        tokens = VerifiedTokens(maxsize=0)
+        raw, token = self.token()
+        tokens.set(raw, token)
+
+        self.assertIsNone(tokens.get(raw))
+
+
+class CachedJWTAuthenticationTests(TestCase):
+
+    def setUp(self):
+        verified_tokens.clear()
+        self.addCleanup(verified_tokens.clear)
+
+        self.user = get_user_model().objects.create_user(
+            "user@example.com", "Aa1234567"
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+    def test_token_verified_once(self):
+        with patch.object(
+            JWTStatelessUserAuthentication,
+            "get_validated_token",
+            autospec=True,
+            side_effect=JWTStatelessUserAuthentication.get_validated_token,
+        ) as verify:
+            for _ in range(3):
+                res = self.client.get(ME_URL)
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertEqual(res.data["id"], self.user.id)
+
+        verify.assert_called_once()
+
+    def test_invalid_token_not_cached(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer invalid")
+
+        for _ in range(2):
+            res = self.client.get(ME_URL)
+            self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.assertIsNone(verified_tokens.get(b"invalid"))
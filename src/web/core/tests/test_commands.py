@@ -1,10 +1,16 @@
+from decimal import Decimal
+from io import StringIO
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2Error
 
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.db import connection
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase
+
+from core.models import Recipe, Tag
 
 
 @patch("core.management.commands.wait_for_db.Command.check")
@@ -30,3 +36,61 @@ class CommandTests(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=["default"])
+
+
+class MergeDuplicateNamesTests(TestCase):
+
+    def setUp(self):
+        # recreate the state the migration finds on databases created
+        # before names were unique, rolled back with the test
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "ALTER TABLE core_tag DROP CONSTRAINT unique_tag_user_name"
+            )
+
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="Aa1234567"
+        )
+
+    def create_recipe(self):
+        return Recipe.objects.create(
+            user=self.user,
+            title="recipe",
+            time_minutes=1,
+            price=Decimal("1.00"),
+        )
+
+    def test_merge_duplicate_tags(self):
+        kept = Tag.objects.create(user=self.user, name="tag1")
+        duplicate = Tag.objects.create(user=self.user, name="tag1")
+        other = Tag.objects.create(user=self.user, name="tag2")
+
+        r1 = self.create_recipe()
+        r1.tags.add(kept, duplicate)
+        r2 = self.create_recipe()
+        r2.tags.add(duplicate, other)
+
+        out = StringIO()
+        call_command("merge_duplicate_names", stdout=out)
+
+        self.assertIn("merged 1 duplicate tags", out.getvalue())
+        self.assertFalse(Tag.objects.filter(id=duplicate.id).exists())
+        self.assertEqual(list(r1.tags.all()), [kept])
+        self.assertEqual(
+            set(r2.tags.values_list("id", flat=True)), {kept.id, other.id}
+        )
+
+    def test_merge_marks_content_changed(self):
+        Tag.objects.create(user=self.user, name="tag1")
+        Tag.objects.create(user=self.user, name="tag1")
+        self.user.refresh_from_db()
+        version = self.user.content_version
+
+        with patch(
+            "recipe_menu.adapters.list_cache.invalidate"
+        ) as invalidate:
+            call_command("merge_duplicate_names", stdout=StringIO())
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.content_version, version + 1)
+        invalidate.assert_called_once_with(self.user.id)
@@ -0,0 +1,219 @@
+import threading
+import time
+from unittest.mock import patch
+
+import psycopg2
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+from django.urls import reverse
+from psycopg2 import extensions
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.db.pool import ConnectionPool, PoolTimeout
+
+HEALTH_URL = reverse("health")
+HEALTH_METRICS_URL = reverse("health-metrics")
+
+
+class FakeConnectionInfo:
+    transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+
+class FakeCursor:
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, sql):
+        self.conn.pings += 1
+
+        if self.conn.broken:
+            raise psycopg2.OperationalError("server closed the connection")
+
+
+class FakeConnection:
+    # just enough of a psycopg2 connection for the pool
+
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.pings = 0
+        self.info = FakeConnectionInfo()
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        if self.broken:
+            raise psycopg2.OperationalError("server closed the connection")
+
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTests(SimpleTestCase):
+
+    def pool(self, **kwargs):
+        return ConnectionPool(connect=FakeConnection, dbname="dev", **kwargs)
+
+    def test_reuse_returned_connection(self):
+        pool = self.pool()
+        conn = pool.getconn()
+        pool.putconn(conn)
+
+        self.assertIs(pool.getconn(), conn)
+        self.assertEqual(pool.stats()["connections_created"], 1)
+        self.assertEqual(pool.stats()["checkouts"], 2)
+
+    def test_min_size_opened_up_front(self):
+        pool = self.pool(min_size=3)
+        pool.getconn()
+
+        self.assertEqual(pool.stats()["size"], 3)
+        self.assertEqual(pool.stats()["idle"], 2)
+
+    def test_rollback_on_return(self):
+        pool = self.pool()
+        conn = pool.getconn()
+        conn.info.transaction_status = extensions.TRANSACTION_STATUS_INERROR
+        pool.putconn(conn)
+
+        self.assertIs(pool.getconn(), conn)
+        self.assertEqual(
+            conn.info.transaction_status, extensions.TRANSACTION_STATUS_IDLE
+        )
+
+    def test_broken_connection_discarded_on_return(self):
+        pool = self.pool()
+        conn = pool.getconn()
+        conn.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+        conn.broken = True
+        pool.putconn(conn)
+
+        self.assertTrue(conn.closed)
+        self.assertIsNot(pool.getconn(), conn)
+        self.assertEqual(pool.stats()["size"], 1)
+
+    def test_idle_connection_checked_on_checkout(self):
+        pool = self.pool(check_interval=0)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        conn.broken = True
+
+        self.assertIsNot(pool.getconn(), conn)
+        self.assertEqual(conn.pings, 1)
+        self.assertEqual(pool.stats()["failed_checks"], 1)
+
+    def test_recently_used_connection_not_checked(self):
+        pool = self.pool(check_interval=60)
+        conn = pool.getconn()
+        pool.putconn(conn)
+
+        self.assertIs(pool.getconn(), conn)
+        self.assertEqual(conn.pings, 0)
+
+    def test_connection_past_lifetime_replaced(self):
+        pool = self.pool(max_lifetime=60)
+        conn = pool.getconn()
+        pool.putconn(conn)
+
+        with patch("time.monotonic", return_value=10**9):
+            self.assertIsNot(pool.getconn(), conn)
+
+        self.assertTrue(conn.closed)
+
+    def test_checkout_waits_for_free_connection(self):
+        pool = self.pool(max_size=1, timeout=5)
+        conn = pool.getconn()
+        checked_out = []
+
+        waiter = threading.Thread(
+            target=lambda: checked_out.append(pool.getconn())
+        )
+        waiter.start()
+
+        while not pool.stats()["waiting"]:
+            time.sleep(0.001)
+
+        pool.putconn(conn)
+        waiter.join()
+
+        self.assertEqual(checked_out, [conn])
+        self.assertEqual(pool.stats()["checkout_waits"], 1)
+
+    def test_checkout_timeout(self):
+        pool = self.pool(max_size=1, timeout=0.01)
+        pool.getconn()
+
+        with self.assertRaises(PoolTimeout):
+            pool.getconn()
+
+        self.assertEqual(pool.stats()["checkout_timeouts"], 1)
+
+    def test_close(self):
+        pool = self.pool()
+        idle, in_use = pool.getconn(), pool.getconn()
+        pool.putconn(idle)
+        pool.close()
+
+        self.assertTrue(idle.closed)
+        self.assertFalse(in_use.closed)
+
+        pool.putconn(in_use)
+
+        self.assertTrue(in_use.closed)
+        self.assertEqual(pool.stats()["size"], 0)
+
+
+class PooledBackendTests(TransactionTestCase):
+
+    def test_connection_reused_across_requests(self):
+        connection.close()
+        connection.ensure_connection()
+        raw_connection = connection.connection
+        connection.close()
+        connection.ensure_connection()
+
+        self.assertIs(connection.connection, raw_connection)
+        self.assertFalse(raw_connection.closed)
+
+    def test_health(self):
+        res = APIClient().get(HEALTH_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {"database": "ok"})
+
+    def test_health_metrics_admin_only(self):
+        user = get_user_model().objects.create_user(
+            "user@example.com", "Aa1234567"
+        )
+        client = APIClient()
+
+        res = client.get(HEALTH_METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        client.force_authenticate(user)
+        res = client.get(HEALTH_METRICS_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        user.is_staff = True
+        user.save()
+        res = client.get(HEALTH_METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["database"], "ok")
+        self.assertIn("media", res.data)
+        self.assertIn(
+            connection.settings_dict["NAME"],
+            [pool["database"] for pool in res.data["pools"]],
+        )
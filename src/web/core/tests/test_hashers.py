@@ -0,0 +1,86 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import identify_hasher
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from recipe_menu import service_layer as services
+from recipe_menu.adapters import repository
+from recipe_menu.domain import model as domain_model
+
+
+def stored_iterations(email: str) -> int:
+    password = get_user_model().objects.get(email=email).password
+    return identify_hasher(password).decode(password)["iterations"]
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=2000)
+class CalibratedHasherTests(TestCase):
+
+    def setUp(self):
+        get_user_model().objects.create_user("user@example.com", "Aa1234567")
+
+    def login(self, password="Aa1234567"):
+        return services.login(
+            email="user@example.com",
+            password=password,
+            repo=repository.UserRepository(),
+        )
+
+    def test_hash_at_configured_iterations(self):
+        self.assertEqual(stored_iterations("user@example.com"), 2000)
+
+    def test_login_upgrades_hash(self):
+        with override_settings(PASSWORD_HASH_ITERATIONS=3000):
+            self.login()
+
+        self.assertEqual(stored_iterations("user@example.com"), 3000)
+
+    def test_login_keeps_stronger_hash(self):
+        with override_settings(PASSWORD_HASH_ITERATIONS=1000):
+            self.login()
+
+        self.assertEqual(stored_iterations("user@example.com"), 2000)
+
+    def test_failed_login_keeps_hash(self):
+        with override_settings(PASSWORD_HASH_ITERATIONS=3000):
+            with self.assertRaises(domain_model.InvalidCredentialsError):
+                self.login("wrong-password")
+
+        self.assertEqual(stored_iterations("user@example.com"), 2000)
+
+
+class CalibrateHashersCommandTests(TestCase):
+
+    def test_calibrate(self):
+        stdout = StringIO()
+
+        call_command(
+            "calibrate_hashers",
+            "--target-ms=2",
+            "--samples=1",
+            "--min-iterations=1000",
+            stdout=stdout,
+        )
+
+        output = stdout.getvalue()
+        self.assertIn("pbkdf2_sha256: ", output)
+        iterations = int(output.rsplit("PASSWORD_HASH_ITERATIONS=", 1)[1])
+        self.assertGreaterEqual(iterations, 1000)
+        self.assertEqual(iterations % 1000, 0)
+
+    def test_calibrate_keeps_minimum(self):
+        stdout, stderr = StringIO(), StringIO()
+
+        call_command(
+            "calibrate_hashers",
+            "--target-ms=0.001",
+            "--samples=1",
+            "--min-iterations=5000",
+            stdout=stdout,
+            stderr=stderr,
+        )
+
+        self.assertIn("PASSWORD_HASH_ITERATIONS=5000", stdout.getvalue())
+        self.assertIn("keeping --min-iterations", stderr.getvalue())
@@ -0,0 +1,217 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from core.models import Job
+from recipe_menu.adapters import jobs
+
+calls = []
+
+
+@jobs.task()
+def record(value):
+    calls.append(value)
+
+
+@jobs.task(priority=5)
+def record_urgently(value):
+    calls.append(value)
+
+
+@jobs.task(max_attempts=2, retry_delay=60)
+def fail():
+    raise ValueError("boom")
+
+
+@jobs.task(concurrency=1)
+def limited():
+    pass
+
+
+class JobQueueTests(TestCase):
+
+    def setUp(self):
+        calls.clear()
+        self.worker = jobs.Worker("test")
+
+    def test_job_runs_once(self):
+        jobs.enqueue(record, {"value": 1})
+
+        self.assertEqual(self.worker.drain(), 1)
+        self.assertEqual(calls, [1])
+        self.assertFalse(Job.objects.exists())
+
+    def test_job_dropped_with_rolled_back_transaction(self):
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                jobs.enqueue(record, {"value": 1})
+                raise ValueError
+
+        self.assertEqual(self.worker.drain(), 0)
+
+    def test_priority_order(self):
+        jobs.enqueue(record, {"value": "low"})
+        jobs.enqueue(record_urgently, {"value": "task priority"})
+        jobs.enqueue(record, {"value": "high"}, priority=10)
+
+        self.worker.drain()
+
+        self.assertEqual(calls, ["high", "task priority", "low"])
+
+    def test_delayed_job_waits(self):
+        jobs.enqueue(record, {"value": 1}, delay=60)
+
+        self.assertEqual(self.worker.drain(), 0)
+
+        Job.objects.update(run_at=timezone.now())
+
+        self.assertEqual(self.worker.drain(), 1)
+
+    def test_failed_job_retried_then_given_up(self):
+        jobs.enqueue(fail)
+
+        self.worker.drain()
+
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.Status.QUEUED)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn("ValueError: boom", job.last_error)
+        self.assertGreater(
+            job.run_at, timezone.now() + timedelta(seconds=50)
+        )
+
+        Job.objects.update(run_at=timezone.now())
+        self.worker.drain()
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(self.worker.drain(), 0)
+
+    def test_concurrency_limit(self):
+        jobs.enqueue(limited)
+        jobs.enqueue(limited)
+        jobs.enqueue(record, {"value": 1})
+
+        running = jobs.claim("other")
+
+        self.assertEqual(running.task, f"{__name__}.limited")
+        self.assertEqual(jobs.claim("test").task, f"{__name__}.record")
+        self.assertIsNone(jobs.claim("test"))
+
+        jobs.run(running)
+
+        self.assertEqual(jobs.claim("test").task, f"{__name__}.limited")
+
+    def test_concurrency_below_one_rejected(self):
+        with self.assertRaises(ValueError):
+            jobs.task(concurrency=0)
+
+    def test_job_of_lost_worker_claimed_again(self):
+        jobs.enqueue(record, {"value": 1})
+        lost = jobs.claim("lost")
+        Job.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(self.worker.drain(), 1)
+        self.assertEqual(calls, [1])
+
+        # the lost worker finishing late leaves the queue alone
+        jobs.enqueue(record, {"value": 2})
+        jobs.run(lost)
+
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_enqueue_rejects_undecorated_function(self):
+        def plain():
+            pass
+
+        with self.assertRaisesMessage(TypeError, "not marked with jobs.task"):
+            jobs.enqueue(plain)
+
+        self.assertFalse(Job.objects.exists())
+
+    def test_prune_failed_jobs(self):
+        now = timezone.now()
+        long_ago = now - timedelta(days=8)
+        old = Job.objects.create(
+            task="old", status=Job.Status.FAILED, run_at=long_ago
+        )
+        Job.objects.create(
+            task="recent", status=Job.Status.FAILED, run_at=now
+        )
+        Job.objects.create(task="queued", run_at=long_ago)
+
+        self.assertEqual(jobs.prune(timedelta(days=7)), 1)
+        self.assertFalse(Job.objects.filter(id=old.id).exists())
+        self.assertEqual(Job.objects.count(), 2)
+
+    def test_unknown_task_fails(self):
+        Job.objects.create(task="core.tests.test_jobs.missing")
+
+        self.worker.drain()
+
+        self.assertIn("ImportError", Job.objects.get().last_error)
+
+
+class ConcurrentWorkerTests(TransactionTestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def test_each_job_claimed_by_one_worker(self):
+        for value in range(40):
+            jobs.enqueue(record, {"value": value})
+
+        def work(index):
+            try:
+                return jobs.Worker(f"worker{index}").drain()
+
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            counts = list(executor.map(work, range(4)))
+
+        self.assertEqual(sum(counts), 40)
+        self.assertEqual(sorted(calls), list(range(40)))
+        self.assertFalse(Job.objects.exists())
+
+    def test_worker_stops_when_asked(self):
+        stop = threading.Event()
+        stop.set()
+
+        jobs.Worker("test").run_forever(stop)
+
+    def test_run_workers_burst(self):
+        jobs.enqueue(record, {"value": 1})
+        out = StringIO()
+
+        call_command("run_workers", "--burst", stdout=out)
+
+        self.assertEqual(calls, [1])
+        self.assertIn("ran 1 jobs", out.getvalue())
+
+    def test_run_workers_prunes_failed_jobs(self):
+        Job.objects.create(
+            task="old",
+            status=Job.Status.FAILED,
+            run_at=timezone.now() - timedelta(days=2),
+        )
+        out = StringIO()
+
+        call_command(
+            "run_workers", "--burst", "--prune-after", "3", stdout=out
+        )
+        self.assertTrue(Job.objects.exists())
+
+        call_command(
+            "run_workers", "--burst", "--prune-after", "1", stdout=out
+        )
+        self.assertFalse(Job.objects.exists())
+        self.assertIn("pruned 1 failed jobs", out.getvalue())
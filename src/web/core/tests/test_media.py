@@ -0,0 +1,237 @@
+import hashlib
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+from core import media
+
+CONTENT = b"0123456789" * 10
+DIGEST = hashlib.sha256(CONTENT).hexdigest()
+IMAGE = f"uploads/recipe/{DIGEST}.jpg"
+LEGACY_IMAGE = "uploads/recipe/0b9f5cfe-8b7c-4d44-9a4f-1d5b8e4bb9a1.jpg"
+VARIANT = f"uploads/recipe/variants/{DIGEST}/thumbnail-320-q80.webp"
+# rendered before their names carried the rendering parameters
+LEGACY_VARIANT = f"uploads/recipe/variants/{DIGEST}/thumbnail.webp"
+
+
+def media_url(name: str) -> str:
+    return media.signed_url(reverse("media", args=[name]), name)
+
+
+class MediaTests(SimpleTestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+
+        settings_override = override_settings(
+            MEDIA_ROOT=media_root, MEDIA_SENDFILE="", MEDIA_URL_EXPIRY=3600
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.storage = storages["recipe_images"]
+        self.storage.save(IMAGE, ContentFile(CONTENT))
+        self.storage.save(LEGACY_IMAGE, ContentFile(CONTENT))
+        self.storage.save(VARIANT, ContentFile(CONTENT))
+        self.storage.save(LEGACY_VARIANT, ContentFile(CONTENT))
+
+    def test_serve_image(self):
+        before = media.stats()
+
+        res = self.client.get(media_url(IMAGE))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b"".join(res.streaming_content), CONTENT)
+        self.assertEqual(res["Content-Type"], "image/jpeg")
+        self.assertEqual(res["Accept-Ranges"], "bytes")
+        self.assertEqual(
+            media.stats()["bytes_sent"] - before["bytes_sent"], len(CONTENT)
+        )
+
+    async def test_serve_image_asgi(self):
+        for headers, body in (
+            ({}, CONTENT),
+            ({"Range": "bytes=10-19"}, CONTENT[10:20]),
+        ):
+            res = await self.async_client.get(
+                media_url(IMAGE), headers=headers
+            )
+
+            # streamed a chunk at a time rather than buffered whole
+            self.assertTrue(res.is_async)
+            self.assertEqual(
+                b"".join([chunk async for chunk in res.streaming_content]),
+                body,
+            )
+            self.assertEqual(res["Content-Length"], str(len(body)))
+
+    @override_settings(MEDIA_URL_EXPIRY=0)
+    def test_content_named_images_immutable(self):
+        for name in (IMAGE, VARIANT):
+            res = self.client.get(media_url(name))
+
+            self.assertEqual(
+                res["Cache-Control"], "public, max-age=31536000, immutable"
+            )
+
+    def test_cached_until_url_expires(self):
+        # signed in the third window, valid until the end of the fourth
+        with mock.patch("time.time", return_value=9000.0):
+            res = self.client.get(media_url(IMAGE))
+
+        self.assertEqual(
+            res["Cache-Control"], "public, max-age=5400, immutable"
+        )
+
+    def test_storage_urls_signed(self):
+        url = self.storage.url(IMAGE)
+
+        self.assertEqual(url, media_url(IMAGE))
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_unsigned_or_forged_url_forbidden(self):
+        url = reverse("media", args=[IMAGE])
+        other = media.signed_url(url, LEGACY_IMAGE)
+
+        for forged in [
+            url,
+            f"{url}?expires=99999999999&signature=forged",
+            f"{url}?{other.split('?')[1]}",
+            media_url(IMAGE).replace("expires=", "expires=1"),
+        ]:
+            with self.subTest(forged):
+                res = self.client.get(forged)
+
+                self.assertEqual(res.status_code, 403)
+
+    def test_expired_url_forbidden(self):
+        url = media_url(IMAGE)
+
+        with mock.patch("time.time", return_value=time.time() + 2 * 3600):
+            res = self.client.get(url)
+
+        self.assertEqual(res.status_code, 403)
+
+    @override_settings(MEDIA_URL_EXPIRY=0)
+    def test_unsigned_urls_when_disabled(self):
+        url = reverse("media", args=[IMAGE])
+
+        self.assertEqual(self.storage.url(IMAGE), url)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    @override_settings(MEDIA_MAX_AGE=60, MEDIA_URL_EXPIRY=0)
+    def test_other_images_cached_for_max_age(self):
+        for name in (LEGACY_IMAGE, LEGACY_VARIANT):
+            res = self.client.get(media_url(name))
+
+            self.assertEqual(res["Cache-Control"], "public, max-age=60")
+
+    def test_range(self):
+        cases = [
+            ("bytes=10-19", 10, 19),
+            ("bytes=90-", 90, 99),
+            ("bytes=-5", 95, 99),
+            ("bytes=95-500", 95, 99),
+        ]
+
+        for header, first, last in cases:
+            with self.subTest(header):
+                res = self.client.get(media_url(IMAGE), HTTP_RANGE=header)
+
+                self.assertEqual(res.status_code, 206)
+                self.assertEqual(
+                    b"".join(res.streaming_content),
+                    CONTENT[first:last + 1],
+                )
+                self.assertEqual(
+                    res["Content-Range"], f"bytes {first}-{last}/100"
+                )
+                self.assertEqual(res["Content-Length"], str(last - first + 1))
+
+    def test_unsatisfiable_range(self):
+        res = self.client.get(media_url(IMAGE), HTTP_RANGE="bytes=100-")
+
+        self.assertEqual(res.status_code, 416)
+        self.assertEqual(res["Content-Range"], "bytes */100")
+
+    def test_several_ranges_get_whole_file(self):
+        res = self.client.get(media_url(IMAGE), HTTP_RANGE="bytes=0-1,5-6")
+
+        self.assertEqual(res.status_code, 200)
+
+    def test_range_of_changed_file_gets_whole_file(self):
+        res = self.client.get(
+            media_url(IMAGE),
+            HTTP_RANGE="bytes=0-1",
+            HTTP_IF_RANGE=http_date(0),
+        )
+
+        self.assertEqual(res.status_code, 200)
+
+    def test_not_modified(self):
+        modified = self.storage.get_modified_time(IMAGE).timestamp()
+
+        res = self.client.get(
+            media_url(IMAGE), HTTP_IF_MODIFIED_SINCE=http_date(modified)
+        )
+
+        self.assertEqual(res.status_code, 304)
+
+    @override_settings(
+        MEDIA_SENDFILE="x-accel-redirect",
+        MEDIA_INTERNAL_URL="/internal/",
+        MEDIA_URL_EXPIRY=0,
+    )
+    def test_x_accel_redirect(self):
+        before = media.stats()
+
+        res = self.client.get(media_url(IMAGE))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res["X-Accel-Redirect"], f"/internal/{IMAGE}")
+        self.assertEqual(res.content, b"")
+        self.assertEqual(
+            res["Cache-Control"], "public, max-age=31536000, immutable"
+        )
+        self.assertEqual(
+            media.stats()["bytes_offloaded"] - before["bytes_offloaded"],
+            len(CONTENT),
+        )
+
+    @override_settings(MEDIA_SENDFILE="x-sendfile")
+    def test_x_sendfile(self):
+        res = self.client.get(media_url(IMAGE))
+
+        self.assertEqual(res["X-Sendfile"], self.storage.path(IMAGE))
+        self.assertEqual(res.content, b"")
+
+    def test_only_recipe_images_served(self):
+        self.storage.save("private/notes.txt", ContentFile(b"secret"))
+        self.storage.save(
+            "uploads/recipe/.partial.jpg", ContentFile(b"half")
+        )
+
+        for name in [
+            "private/notes.txt",
+            "uploads/recipe/../../private/notes.txt",
+            "uploads/recipe/.partial.jpg",
+            "uploads/recipe/missing.jpg",
+            "uploads/recipe",
+        ]:
+            with self.subTest(name):
+                res = self.client.get(media_url(name))
+
+                self.assertEqual(res.status_code, 404)
+
+    def test_only_safe_methods(self):
+        res = self.client.post(media_url(IMAGE))
+
+        self.assertEqual(res.status_code, 405)
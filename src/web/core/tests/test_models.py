@@ -1,6 +1,7 @@
 from decimal import Decimal
 
 from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -74,6 +75,19 @@ class ModelTests(TestCase):
         tag = models.Tag.objects.create(user=user, name=tag_name)
         self.assertEqual(str(tag), tag_name)
 
+    def test_tag_name_unique_per_user(self):
+        user = get_user_model().objects.create_user(
+            email="user@example.com", password="Aa1234567"
+        )
+        other_user = get_user_model().objects.create_user(
+            email="other@example.com", password="Aa1234567"
+        )
+        models.Tag.objects.create(user=user, name="tag1")
+        models.Tag.objects.create(user=other_user, name="tag1")
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            models.Tag.objects.create(user=user, name="tag1")
+
     def test_create_ingredient(self):
         user = get_user_model().objects.create_user(
             email="user@example.com", password="Aa1234567"
@@ -0,0 +1,73 @@
+import datetime
+import io
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import ORJSONParser, ORJSONRenderer
+
+
+class ORJSONRendererTests(SimpleTestCase):
+
+    def assertSameRendering(self, data, accepted_media_type=None):
+        self.assertEqual(
+            ORJSONRenderer().render(data, accepted_media_type),
+            JSONRenderer().render(data, accepted_media_type),
+        )
+
+    def test_render_like_stdlib(self):
+        self.assertSameRendering(
+            {
+                "id": 1,
+                "title": "食譜\u2028\u2029",
+                "price": "5.50",
+                "tags": [{"id": 1, "name": "tag1"}],
+                "image": None,
+                "ratio": 0.5,
+                1: True,
+            }
+        )
+
+    def test_render_decimal_and_lazy_strings(self):
+        self.assertSameRendering(
+            {"price": Decimal("5.25"), "detail": gettext_lazy("Not found.")}
+        )
+
+    def test_render_datetimes_like_drf(self):
+        now = timezone.now().replace(microsecond=123456)
+        self.assertSameRendering(
+            {"at": now, "on": now.date(), "naive": datetime.datetime.now()}
+        )
+
+    def test_render_falls_back_to_stdlib(self):
+        self.assertSameRendering({"big": 2**70})
+        self.assertSameRendering(
+            {"id": 1}, accepted_media_type="application/json; indent=4"
+        )
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+
+class ORJSONParserTests(SimpleTestCase):
+
+    def parse(self, parser, body: bytes):
+        return parser.parse(io.BytesIO(body))
+
+    def test_parse_like_stdlib(self):
+        for body in (
+            b'{"title": "\xe9\xa3\x9f\xe8\xad\x9c", "price": "5.50"}',
+            b'[1, 2.5, null, true]',
+            b'{"big": 1180591620717411303424}',
+        ):
+            self.assertEqual(
+                self.parse(ORJSONParser(), body),
+                self.parse(JSONParser(), body),
+            )
+
+    def test_parse_error(self):
+        with self.assertRaises(ParseError):
+            self.parse(ORJSONParser(), b'{"title": ')
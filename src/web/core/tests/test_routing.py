@@ -0,0 +1,99 @@
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.test import (
+    SimpleTestCase,
+    TransactionTestCase,
+    override_settings,
+)
+
+from core import checks
+from core.db.routers import ReplicaRouter
+from core.models import Recipe
+from recipe_menu.adapters import routing
+
+REPLICAS = ["replica1", "replica2"]
+
+
+@routing.read_only
+def read_database():
+    return ReplicaRouter().db_for_read(Recipe)
+
+
+@routing.read_only
+async def aread_database():
+    return ReplicaRouter().db_for_read(Recipe)
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS, REPLICA_STICKY_SECONDS=60)
+class ReplicaRoutingTests(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+        self.reading = routing.reading_as(7)
+        self.addCleanup(routing.stop_reading, self.reading)
+
+    def test_reads_outside_read_only_services_use_primary(self):
+        self.assertEqual(ReplicaRouter().db_for_read(Recipe), DEFAULT_DB_ALIAS)
+
+    def test_read_only_services_use_replica_of_reader(self):
+        self.assertEqual(read_database(), "replica2")
+
+        routing.reading_as(8)
+        self.assertEqual(read_database(), "replica1")
+
+    async def test_async_read_only_services_use_replica(self):
+        self.assertEqual(await aread_database(), "replica2")
+
+    def test_anonymous_reads_use_any_replica(self):
+        routing.reading_as(None)
+
+        self.assertIn(read_database(), REPLICAS)
+
+    def test_reader_sticks_to_primary_after_write(self):
+        routing.mark_written(7)
+
+        self.assertEqual(read_database(), DEFAULT_DB_ALIAS)
+
+        routing.reading_as(8)
+        self.assertEqual(read_database(), "replica1")
+
+    def test_stickiness_expires(self):
+        with override_settings(REPLICA_STICKY_SECONDS=0):
+            routing.mark_written(7)
+
+        self.assertEqual(read_database(), "replica2")
+
+    def test_reads_in_transaction_use_primary(self):
+        with transaction.atomic():
+            self.assertEqual(read_database(), DEFAULT_DB_ALIAS)
+
+    def test_writes_use_primary(self):
+        self.assertEqual(
+            ReplicaRouter().db_for_write(Recipe), DEFAULT_DB_ALIAS
+        )
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        self.assertEqual(read_database(), DEFAULT_DB_ALIAS)
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+
+    @override_settings(
+        DATABASE_REPLICAS=REPLICAS,
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+            }
+        },
+    )
+    def test_replicas_with_process_local_cache_rejected(self):
+        errors = checks.check_shared_cache(None)
+
+        self.assertEqual([error.id for error in errors], ["core.E001"])
+
+    @override_settings(DATABASE_REPLICAS=REPLICAS)
+    def test_replicas_with_shared_cache_accepted(self):
+        self.assertEqual(checks.check_shared_cache(None), [])
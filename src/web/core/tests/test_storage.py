@@ -0,0 +1,94 @@
+import hashlib
+import io
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, SimpleTestCase
+
+from core.storage import ContentAddressedStorage
+from core.uploadhandler import (
+    ContentHashMemoryFileUploadHandler,
+    ContentHashTemporaryFileUploadHandler,
+)
+
+
+class ContentAddressedStorageTests(SimpleTestCase):
+
+    def setUp(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        self.storage = ContentAddressedStorage(location=location)
+
+    def test_existing_name_not_written_again(self):
+        self.storage.save("ab/abc.jpg", ContentFile(b"first"))
+        name = self.storage.save("ab/abc.jpg", ContentFile(b"second"))
+
+        self.assertEqual(name, "ab/abc.jpg")
+        self.assertEqual(self.storage.listdir("ab"), ([], ["abc.jpg"]))
+
+        with self.storage.open(name) as file:
+            self.assertEqual(file.read(), b"first")
+
+    def test_saved_file_replaces_one_appearing_meanwhile(self):
+        # another upload of the same content finished between the
+        # existence check and the write
+        exists = self.storage.exists
+        self.storage.exists = lambda name: False
+        self.addCleanup(setattr, self.storage, "exists", exists)
+
+        self.storage.save("ab/abc.jpg", ContentFile(b"content"))
+        name = self.storage.save("ab/abc.jpg", ContentFile(b"content"))
+
+        self.assertEqual(name, "ab/abc.jpg")
+        self.assertEqual(self.storage.listdir("ab"), ([], ["abc.jpg"]))
+
+    def test_uploaded_temporary_file_moved_into_place(self):
+        upload = SimpleUploadedFile("photo.jpg", b"content")
+
+        name = self.storage.save("ab/abc.jpg", upload)
+
+        with self.storage.open(name) as file:
+            self.assertEqual(file.read(), b"content")
+
+
+class ContentHashUploadHandlerTests(SimpleTestCase):
+
+    def stream(self, handler_class, chunks: list[bytes]):
+        request = RequestFactory().post("/")
+        handler = handler_class(request)
+        size = sum(len(chunk) for chunk in chunks)
+
+        handler.handle_raw_input(io.BytesIO(), request.META, size, "boundary")
+
+        try:
+            handler.new_file("image", "photo.jpg", "image/jpeg", size)
+
+        except Exception:
+            # the memory handler stops the handlers after it
+            pass
+
+        start = 0
+
+        for chunk in chunks:
+            handler.receive_data_chunk(chunk, start)
+            start += len(chunk)
+
+        return handler.file_complete(size)
+
+    def test_hash_computed_while_streaming(self):
+        chunks = [b"a" * 10, b"b" * 10, b"c"]
+        digest = hashlib.sha256(b"".join(chunks)).hexdigest()
+
+        for handler_class in (
+            ContentHashMemoryFileUploadHandler,
+            ContentHashTemporaryFileUploadHandler,
+        ):
+            with self.subTest(handler_class.__name__):
+                file = self.stream(handler_class, chunks)
+
+                self.assertEqual(file.content_hash, digest)
+                file.seek(0)
+                self.assertEqual(file.read(), b"".join(chunks))
+                file.close()
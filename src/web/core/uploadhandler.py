@@ -0,0 +1,42 @@
+import hashlib
+
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+
+
+class ContentHashMixin:
+    """Hash each uploaded file while it streams in.
+
+    The finished file carries the SHA-256 hex digest of its bytes as
+    ``content_hash``, naming it after its content costs no second read.
+    """
+
+    def new_file(self, *args, **kwargs):
+        self.content_hash = hashlib.sha256()
+        return super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.content_hash.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+
+        if file is not None:
+            file.content_hash = self.content_hash.hexdigest()
+
+        return file
+
+
+class ContentHashMemoryFileUploadHandler(
+    ContentHashMixin, MemoryFileUploadHandler
+):
+    pass
+
+
+class ContentHashTemporaryFileUploadHandler(
+    ContentHashMixin, TemporaryFileUploadHandler
+):
+    pass
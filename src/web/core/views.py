@@ -0,0 +1,125 @@
+import inspect
+
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.db import DatabaseError, connection
+from drf_spectacular.utils import extend_schema
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core import media
+from core.db import pool as db_pool
+from recipe_menu.adapters import routing
+
+
+class AsyncAPIView(APIView):
+    # APIView whose handlers are coroutines, a comment rather than a
+    # docstring as drf-spectacular publishes view docstrings.
+    #
+    # DRF 3.14 only dispatches synchronously, under ASGI a sync view holds
+    # a thread for the whole request. Here authentication, permissions and
+    # negotiation run inline (the stateless JWT authentication does not hit
+    # the database) and the handler is awaited, so a worker serves slow
+    # clients without a thread each. Under WSGI Django runs the view with
+    # async_to_sync.
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+
+        # csrf_exempt wraps the view in a plain function on Django 4.2,
+        # which would hide that it returns a coroutine
+        if cls.view_is_async:
+            markcoroutinefunction(view)
+
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        reading = None
+
+        try:
+            self.initial(request, *args, **kwargs)
+            # read-only services keep this user on the primary after their
+            # writes, see recipe_menu.adapters.routing
+            reading = routing.reading_as(getattr(request.user, "id", None))
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+
+            # options and http_method_not_allowed stay synchronous
+            if inspect.isawaitable(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        finally:
+            if reading is not None:
+                routing.stop_reading(reading)
+
+        self.response = self.finalize_response(
+            request, response, *args, **kwargs
+        )
+        return self.response
+
+
+def check_database() -> None:
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+
+
+async def database_status() -> tuple[str, int]:
+    try:
+        await sync_to_async(check_database)()
+        return "ok", status.HTTP_200_OK
+
+    except DatabaseError:
+        return "unavailable", status.HTTP_503_SERVICE_UNAVAILABLE
+
+
+class HealthAPIView(AsyncAPIView):
+    # liveness of the database for load balancers, open to anyone so it
+    # tells nothing but the status
+
+    authentication_classes = []
+    permission_classes = []
+
+    @extend_schema(exclude=True)
+    async def get(self, request, *args, **kwargs):
+        database, code = await database_status()
+
+        return Response({"database": database}, status=code)
+
+
+class MetricsAPIView(AsyncAPIView):
+    # the health status with the metrics of this process' connection pools
+    # and media serving, for admin users only
+
+    permission_classes = [IsAdminUser]
+
+    @extend_schema(exclude=True)
+    async def get(self, request, *args, **kwargs):
+        database, code = await database_status()
+
+        return Response(
+            {
+                "database": database,
+                "pools": [pool.stats() for pool in db_pool.all_pools()],
+                "media": media.stats(),
+            },
+            status=code,
+        )
@@ -0,0 +1,30 @@
+from decimal import Decimal
+
+from recipe_menu.domain import model as domain_model
+
+
+def build_recipes(count: int, relations: int) -> list[domain_model.Recipe]:
+    # in-memory recipes shaped like the ones the list endpoint serializes
+    recipes = []
+
+    for index in range(count):
+        recipe = domain_model.Recipe(
+            title=f"recipe {index}",
+            description="description",
+            time_minutes=index % 120,
+            price=Decimal("12.50"),
+            link="https://example.com/recipe.pdf",
+            tags=[domain_model.Tag(name=f"tag {i}") for i in range(relations)],
+            ingredients=[
+                domain_model.Ingredient(id=i, name=f"ingredient {i}")
+                for i in range(relations)
+            ],
+        )
+        recipe.id = index
+
+        for i, tag in enumerate(recipe.tags):
+            tag.id = i
+
+        recipes.append(recipe)
+
+    return recipes
@@ -0,0 +1,195 @@
+"""Specialised to_representation functions generated from serializers.
+
+DRF walks every declared field of every object through get_attribute and
+to_representation. compile_serializer reads the declared fields once and
+generates a function doing the same work as straight-line code: plain
+attribute reads, int()/str() for integer and char fields and nested
+serializers of scalar fields inlined as dict comprehensions. Any other
+field keeps going through its own methods, so the output is always the
+one DRF would produce.
+"""
+import itertools
+from collections.abc import Mapping
+from typing import Callable
+
+from django.conf import settings
+from django.db.models.manager import BaseManager
+from rest_framework import fields as drf_fields
+from rest_framework import serializers
+
+# exact classes only, subclasses may override to_representation
+SCALARS = {
+    drf_fields.IntegerField: "int",
+    drf_fields.CharField: "str",
+}
+
+_compiled: dict[tuple, Callable] = {}
+_names = itertools.count()
+
+
+def _plain_source(field) -> bool:
+    return field.source != "*" and len(field.source_attrs) == 1
+
+
+def _scalar(field) -> bool:
+    return (
+        type(field) in SCALARS
+        and _plain_source(field)
+        and field.required
+        and field.default is drf_fields.empty
+        and not field.allow_null
+    )
+
+
+def _inline(serializer) -> bool:
+    # nested serializers made of required scalar fields become one
+    # dict comprehension
+    return type(serializer).to_representation in (
+        serializers.Serializer.to_representation,
+        CompiledSerializerMixin.to_representation,
+    ) and all(_scalar(field) for field in serializer.fields.values())
+
+
+def _scalar_expression(field, variable: str) -> str:
+    value = f"_v{next(_names)}"
+    attribute = field.source_attrs[0]
+
+    return (
+        f"(None if ({value} := {variable}.{attribute}) is None "
+        f"else {SCALARS[type(field)]}({value}))"
+    )
+
+
+def _read(field, name: str, lines: list[str]) -> str:
+    """Append the lines reading field into v.
+
+    Returns the indentation of the lines to run when v was read, the
+    field is left out of the result otherwise.
+    """
+    if not _plain_source(field):
+        lines += [
+            "    try:",
+            f"        v = fields[{name!r}].get_attribute(obj)",
+            "    except SkipField:",
+            "        v = SKIPPED",
+        ]
+
+    elif (
+        field.required
+        and field.default is drf_fields.empty
+        and not field.allow_null
+    ):
+        lines.append(f"    v = obj.{field.source_attrs[0]}")
+        return "    "
+
+    else:
+        # same fallbacks as Field.get_attribute on a missing attribute
+        lines += [
+            "    try:",
+            f"        v = obj.{field.source_attrs[0]}",
+            "    except (AttributeError, KeyError):",
+        ]
+
+        if field.default is not drf_fields.empty:
+            lines += [
+                "        try:",
+                f"            v = fields[{name!r}].get_default()",
+                "        except SkipField:",
+                "            v = SKIPPED",
+            ]
+
+        elif field.allow_null:
+            lines.append("        v = None")
+
+        else:
+            lines.append("        v = SKIPPED")
+
+    lines.append("    if v is not SKIPPED:")
+    return "        "
+
+
+def _generate(serializer) -> Callable:
+    lines = ["def to_representation(serializer, obj):"]
+    lines += ["    fields = serializer.fields", "    ret = {}"]
+
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+
+        if isinstance(field, serializers.SerializerMethodField):
+            lines.append(
+                f"    ret[{name!r}] = serializer.{field.method_name}(obj)"
+            )
+            continue
+
+        if _scalar(field):
+            lines.append(
+                f"    ret[{name!r}] = {_scalar_expression(field, 'obj')}"
+            )
+            continue
+
+        indent = _read(field, name, lines)
+
+        if isinstance(field, serializers.ListSerializer) and _inline(
+            field.child
+        ):
+            item = f"_i{next(_names)}"
+            entries = ", ".join(
+                f"{key!r}: {_scalar_expression(child, item)}"
+                for key, child in field.child.fields.items()
+            )
+            value = (
+                f"[{{{entries}}} for {item} in "
+                "(v.all() if isinstance(v, BaseManager) else v)]"
+            )
+
+        else:
+            value = f"fields[{name!r}].to_representation(v)"
+
+        lines.append(
+            f"{indent}ret[{name!r}] = None if v is None else {value}"
+        )
+
+    lines.append("    return ret")
+
+    namespace = {
+        "BaseManager": BaseManager,
+        "SkipField": drf_fields.SkipField,
+        "SKIPPED": object(),
+    }
+    exec("\n".join(lines), namespace)
+
+    return namespace["to_representation"]
+
+
+def compile_serializer(serializer) -> Callable:
+    """Return the to_representation function for serializer's fields.
+
+    Functions are shared by every instance of a class exposing the same
+    fields, they read the bound fields and the context off the serializer
+    they are called with.
+    """
+    key = (type(serializer), tuple(serializer.fields))
+    function = _compiled.get(key, None)
+
+    if function is None:
+        function = _compiled[key] = _generate(serializer)
+
+    return function
+
+
+class CompiledSerializerMixin:
+    # serializes through a function compiled from the declared fields, no
+    # docstring as drf-spectacular would publish it as the description
+
+    def to_representation(self, instance):
+        # attribute reads are generated, mappings keep the generic path
+        if isinstance(instance, Mapping) or not settings.COMPILED_SERIALIZERS:
+            return super().to_representation(instance)
+
+        function = getattr(self, "_compiled", None)
+
+        if function is None:
+            function = self._compiled = compile_serializer(self)
+
+        return function(self, instance)
@@ -0,0 +1,84 @@
+import hashlib
+from typing import Awaitable, Callable
+
+from django.conf import settings
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from core import media
+from recipe_menu import service_layer as services
+from recipe_menu.adapters import list_cache, repository
+
+
+def make_etag(request, *versions) -> str:
+    # the versions pin the data, the absolute url (host, path, query) and
+    # the renderer pin how it is represented, the window the signed image
+    # urls it holds
+    value = ":".join(
+        [
+            str(request.user.id),
+            *map(str, versions),
+            str(media.url_window()),
+            request.accepted_renderer.format,
+            request.build_absolute_uri(),
+        ]
+    )
+
+    return quote_etag(hashlib.sha1(value.encode()).hexdigest())
+
+
+def is_not_modified(request, etag: str) -> bool:
+    etags = parse_etags(request.headers.get("If-None-Match", ""))
+    return etag in etags or "*" in etags
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(
+        status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+    )
+
+
+async def list_response(
+    request, scope: str, parts: tuple, build: Callable[[], Awaitable[dict]]
+) -> Response:
+    key = entry = None
+
+    # off with a process-local cache, see settings.PROCESS_LOCAL_CACHES
+    if settings.LIST_CACHE_TIMEOUT:
+        # the body depends on the renderer and, through signed absolute
+        # image urls, on the host and the signing window as well
+        key = await list_cache.amake_key(
+            request.user.id,
+            scope,
+            (
+                *parts,
+                request.accepted_renderer.format,
+                request.build_absolute_uri("/"),
+                media.url_window(),
+            ),
+        )
+        entry = await list_cache.aload(key)
+
+    if entry is None:
+        etag = make_etag(
+            request,
+            await services.aretrieve_content_version(
+                user_id=request.user.id, repo=repository.UserRepository()
+            ),
+        )
+
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+
+        entry = (etag, await build())
+
+        if key is not None:
+            await list_cache.astore(key, entry)
+
+    etag, data = entry
+
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+
+    return Response(data, status=status.HTTP_200_OK, headers={"ETag": etag})
@@ -0,0 +1,109 @@
+import io
+import multiprocessing
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from recipe_menu.adapters import images
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the throughput and latency of the recipe image variants "
+        "pipeline rendering synthetic photos, in the calling process "
+        "(RECIPE_IMAGE_WORKERS=0) and in process pools of growing size, "
+        "like the one each run_workers process renders in."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--images", type=int, default=40)
+        parser.add_argument("--width", type=int, default=4000)
+        parser.add_argument("--height", type=int, default=3000)
+        parser.add_argument(
+            "--workers", type=int, nargs="+", default=[0, 1, 2, 4]
+        )
+
+    def handle(self, *args, **options):
+        data = self.photo(options["width"], options["height"])
+        args = (
+            data,
+            settings.RECIPE_IMAGE_SIZES,
+            settings.RECIPE_IMAGE_FORMATS,
+        )
+        count = options["images"]
+
+        self.stdout.write(
+            f"{count} images of {options['width']}x{options['height']}, "
+            f"{len(data) / 1024:.0f} KiB each"
+        )
+
+        for workers in options["workers"]:
+            elapsed, latencies = (
+                self.measure_pool(workers, args, count)
+                if workers > 0
+                else self.measure_inline(args, count)
+            )
+            quantiles = statistics.quantiles(latencies, n=20)
+
+            self.stdout.write(
+                f"workers {workers}: {count / elapsed:.1f} images/s, "
+                f"latency p50 {statistics.median(latencies) * 1000:.0f}ms "
+                f"p95 {quantiles[-1] * 1000:.0f}ms"
+            )
+
+    @staticmethod
+    def photo(width: int, height: int) -> bytes:
+        # noise compresses like a photo, a flat image would flatter the
+        # decoder
+        image = Image.effect_noise((width, height), 64).convert("RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=90)
+
+        return buffer.getvalue()
+
+    @staticmethod
+    def measure_inline(args: tuple, count: int) -> tuple[float, list]:
+        latencies = []
+        started = time.perf_counter()
+
+        for _ in range(count):
+            submitted = time.perf_counter()
+            images.render(*args)
+            latencies.append(time.perf_counter() - submitted)
+
+        return time.perf_counter() - started, latencies
+
+    @staticmethod
+    def measure_pool(
+        workers: int, args: tuple, count: int
+    ) -> tuple[float, list]:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        ) as executor:
+            # process start up is paid once, not by the renders measured
+            wait(
+                [
+                    executor.submit(images.render, *args)
+                    for _ in range(workers)
+                ]
+            )
+
+            latencies = []
+            started = time.perf_counter()
+
+            for _ in range(count):
+                submitted = time.perf_counter()
+                executor.submit(images.render, *args).add_done_callback(
+                    lambda _, submitted=submitted: latencies.append(
+                        time.perf_counter() - submitted
+                    )
+                )
+
+        return time.perf_counter() - started, latencies
@@ -0,0 +1,86 @@
+import io
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import ORJSONParser, ORJSONRenderer
+from recipe.benchmark import build_recipes
+from recipe.serializers import RecipeListPageSerializerOut
+from recipe_menu.domain import model as domain_model
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure recipe list pages rendered and parsed per second by the "
+        "stdlib json renderer/parser and the orjson ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000]
+        )
+        parser.add_argument("--relations", type=int, default=3)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        context = {"request": RequestFactory().get("/")}
+
+        for size in options["sizes"]:
+            data = RecipeListPageSerializerOut(
+                domain_model.Page(
+                    items=build_recipes(size, options["relations"]),
+                    next=None,
+                    prev=None,
+                ),
+                context=context,
+            ).data
+            body = JSONRenderer().render(data)
+
+            rendering = {
+                name: self.measure(
+                    lambda: renderer().render(data), options["repeat"]
+                )
+                for name, renderer in (
+                    ("stdlib", JSONRenderer),
+                    ("orjson", ORJSONRenderer),
+                )
+            }
+            parsing = {
+                name: self.measure(
+                    lambda: parser().parse(io.BytesIO(body)),
+                    options["repeat"],
+                )
+                for name, parser in (
+                    ("stdlib", JSONParser),
+                    ("orjson", ORJSONParser),
+                )
+            }
+
+            self.stdout.write(
+                f"{size} recipes ({len(body)} bytes): "
+                f"render {self.compare(rendering)}, "
+                f"parse {self.compare(parsing)}"
+            )
+
+    @staticmethod
+    def compare(rates: dict[str, float]) -> str:
+        return (
+            f"stdlib {rates['stdlib']:.0f}/s, orjson {rates['orjson']:.0f}/s "
+            f"({rates['orjson'] / rates['stdlib']:.1f}x)"
+        )
+
+    @staticmethod
+    def measure(run, repeat: int) -> float:
+        best = None
+
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+
+            best = elapsed if best is None else min(best, elapsed)
+
+        return 1 / best
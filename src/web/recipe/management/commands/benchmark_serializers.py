@@ -0,0 +1,67 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+
+from recipe.serializers import (
+    RecipeListSerializerOut,
+    TagListSerializerOut,
+    IngredientListSerializerOut,
+)
+from recipe.benchmark import build_recipes
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure objects serialized per second by the list serializers, "
+        "with the compiled functions and with plain DRF."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--objects", type=int, default=5000)
+        parser.add_argument("--relations", type=int, default=3)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        recipes = build_recipes(options["objects"], options["relations"])
+        tags = [tag for recipe in recipes for tag in recipe.tags]
+        ingredients = [
+            ingredient
+            for recipe in recipes
+            for ingredient in recipe.ingredients
+        ]
+        context = {"request": RequestFactory().get("/")}
+
+        cases = [
+            ("recipes", RecipeListSerializerOut, recipes),
+            ("tags", TagListSerializerOut, tags),
+            ("ingredients", IngredientListSerializerOut, ingredients),
+        ]
+
+        for name, serializer_class, objects in cases:
+            rates = {}
+
+            for compiled in (False, True):
+                with override_settings(COMPILED_SERIALIZERS=compiled):
+                    rates[compiled] = self.measure(
+                        serializer_class, objects, context, options["repeat"]
+                    )
+
+            self.stdout.write(
+                f"{name}: drf {rates[False]:.0f} objects/s, "
+                f"compiled {rates[True]:.0f} objects/s "
+                f"({rates[True] / rates[False]:.1f}x)"
+            )
+
+    @staticmethod
+    def measure(serializer_class, objects, context, repeat: int) -> float:
+        best = None
+
+        for _ in range(repeat):
+            started = time.perf_counter()
+            serializer_class(objects, many=True, context=context).data
+            elapsed = time.perf_counter() - started
+
+            best = elapsed if best is None else min(best, elapsed)
+
+        return len(objects) / best
@@ -0,0 +1,122 @@
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from recipe import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream recipes with their tags and ingredients as NDJSON or CSV, "
+        "reading them through a server-side cursor in id order."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output", default="-", help="file to write, stdout by default"
+        )
+        parser.add_argument(
+            "--format", choices=transfer.FORMATS, default="ndjson"
+        )
+        parser.add_argument("--user", help="only export this user's recipes")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument(
+            "--checkpoint",
+            help=(
+                "file recording the last exported id and the size of "
+                "--output up to it, an existing one truncates --output to "
+                "that size and resumes the export after the id"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        user = None
+
+        if options["user"] is not None:
+            try:
+                user = get_user_model().objects.get(email=options["user"])
+
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"user {options['user']} does not exist")
+
+        checkpoint = options["checkpoint"]
+        resumed = transfer.load_checkpoint(checkpoint)
+        after_id = resumed.position if resumed is not None else None
+
+        if options["output"] == "-":
+            if after_id is not None:
+                raise CommandError("resuming needs --output to append to")
+
+            # records carry their own line endings
+            stream = self.stdout
+            stream.ending = ""
+
+        else:
+            if resumed is not None and resumed.offset is not None:
+                self.truncate(options["output"], resumed.offset)
+
+            stream = open(
+                options["output"],
+                "a" if after_id is not None else "w",
+                newline="",
+                encoding="utf-8",
+            )
+
+        chunk_size = options["chunk_size"]
+        write = transfer.writer(
+            stream, options["format"], header=after_id is None
+        )
+        progress = transfer.Progress(self.stderr, "exported", every=chunk_size)
+        last_id = after_id
+
+        try:
+            recipes = transfer.export_queryset(user, after_id).iterator(
+                chunk_size=chunk_size
+            )
+
+            for recipe in recipes:
+                write(transfer.to_record(recipe))
+                last_id = recipe.id
+                progress.advance()
+
+                if progress.count % chunk_size == 0:
+                    # the checkpoint never runs ahead of the written rows
+                    self.save_checkpoint(checkpoint, stream, last_id)
+
+            if last_id is not None:
+                self.save_checkpoint(checkpoint, stream, last_id)
+
+            else:
+                stream.flush()
+
+        finally:
+            if stream is not self.stdout:
+                stream.close()
+
+        progress.report()
+        self.stderr.write(self.style.SUCCESS("export finished"))
+
+    def truncate(self, path, offset):
+        # rows written after the checkpoint, and a half written last line,
+        # are dropped so the resumed export writes each recipe once
+        try:
+            size = os.path.getsize(path)
+
+        except OSError:
+            raise CommandError(f"cannot resume, {path} does not exist")
+
+        if size < offset:
+            raise CommandError(
+                f"cannot resume, {path} is shorter than the checkpoint"
+            )
+
+        os.truncate(path, offset)
+
+    def save_checkpoint(self, checkpoint, stream, last_id):
+        stream.flush()
+        transfer.save_checkpoint(
+            checkpoint,
+            last_id,
+            stream.tell() if stream is not self.stdout else None,
+        )
@@ -0,0 +1,156 @@
+import itertools
+import sys
+from collections import defaultdict
+from typing import Optional, Union
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.core.management.base import BaseCommand
+
+from core.models import ImportCheckpoint
+from recipe import transfer
+from recipe.serializers import RecipeCreateSerializerIn
+from recipe_menu import service_layer as services
+from recipe_menu.adapters import repository
+
+
+class Command(BaseCommand):
+    help = (
+        "Import recipes from NDJSON or CSV written by export_recipes, in "
+        "batches of bulk inserts. Recipes get new ids."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="file to read, - for stdin")
+        parser.add_argument(
+            "--format", choices=transfer.FORMATS, default="ndjson"
+        )
+        parser.add_argument(
+            "--user", help="owner of every recipe instead of the user column"
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--checkpoint",
+            help=(
+                "name of a checkpoint recording the number of imported "
+                "records in the database, an existing one resumes the "
+                "import after them"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        self.user_ids = {}
+
+        checkpoint = options["checkpoint"]
+        position = (
+            ImportCheckpoint.objects.filter(name=checkpoint)
+            .values_list("position", flat=True)
+            .first()
+            if checkpoint is not None
+            else None
+        ) or 0
+        batch_size = options["batch_size"]
+
+        if options["path"] == "-":
+            stream = sys.stdin
+
+        else:
+            stream = open(options["path"], newline="", encoding="utf-8")
+
+        progress = transfer.Progress(self.stderr, "imported", every=batch_size)
+        imported = skipped = 0
+
+        try:
+            records = itertools.islice(
+                transfer.reader(stream, options["format"]), position, None
+            )
+
+            while True:
+                batch = list(itertools.islice(records, batch_size))
+
+                if not batch:
+                    break
+
+                created = self.import_batch(
+                    batch, position, options["user"], checkpoint
+                )
+                imported += created
+                skipped += len(batch) - created
+                position += len(batch)
+                progress.advance(len(batch))
+
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        progress.report()
+        self.stderr.write(
+            self.style.SUCCESS(
+                f"imported {imported} recipes, skipped {skipped}"
+            )
+        )
+
+    @transaction.atomic
+    def import_batch(
+        self,
+        batch: list[Union[dict, transfer.InvalidRecord]],
+        position: int,
+        owner,
+        checkpoint: Optional[str] = None,
+    ) -> int:
+        recipes = defaultdict(list)
+
+        self.resolve_users(
+            {owner}
+            if owner is not None
+            else {r.get("user") for r in batch if isinstance(r, dict)}
+        )
+
+        for number, record in enumerate(batch, start=position + 1):
+            if isinstance(record, transfer.InvalidRecord):
+                self.stderr.write(f"record {number}: {record.reason}")
+                continue
+
+            email = owner if owner is not None else record.get("user")
+            user_id = self.user_ids.get(email, None)
+
+            if user_id is None:
+                self.stderr.write(f"record {number}: unknown user {email}")
+                continue
+
+            serializer = RecipeCreateSerializerIn(
+                data=transfer.to_payload(record)
+            )
+
+            if not serializer.is_valid():
+                self.stderr.write(f"record {number}: {serializer.errors}")
+                continue
+
+            recipes[user_id].append(serializer.validated_data)
+
+        for user_id, payloads in recipes.items():
+            services.create_recipes(
+                recipes=payloads,
+                user_id=user_id,
+                repo=repository.RecipeRepository(),
+            )
+
+        # committed with the recipes, a crash never replays a batch
+        if checkpoint is not None:
+            ImportCheckpoint.objects.update_or_create(
+                name=checkpoint, defaults={"position": position + len(batch)}
+            )
+
+        return sum(len(payloads) for payloads in recipes.values())
+
+    def resolve_users(self, emails: set) -> None:
+        missing = emails - self.user_ids.keys()
+
+        if missing:
+            # unknown emails are remembered too, they are looked up once
+            self.user_ids.update(dict.fromkeys(missing))
+            self.user_ids.update(
+                get_user_model()
+                .objects.filter(email__in=missing)
+                .values_list("email", "id")
+            )
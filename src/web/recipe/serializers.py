@@ -1,5 +1,24 @@
+from django.conf import settings
+from django.core.files.storage import storages
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
+from recipe.compiled import CompiledSerializerMixin
+
+
+class SparseFieldsMixin:
+    # keeps only the fields listed in context["fields"], when given
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = self.context.get("fields", None)
+
+        if requested is None:
+            return fields
+
+        return {
+            name: field for name, field in fields.items() if name in requested
+        }
+
 
 class RecipeTagsSerailizerIn(serializers.Serializer):
     name = serializers.CharField()
@@ -10,6 +29,27 @@ class RecipeTagsSerailizerOut(serializers.Serializer):
     name = serializers.CharField()
 
 
+def image_variant_urls(context: dict, variants: dict) -> dict:
+    if not variants:
+        return {}
+
+    request = context["request"]
+    storage = storages["recipe_images"]
+
+    return {
+        name: {
+            format: request.build_absolute_uri(storage.url(path))
+            for format, path in formats.items()
+        }
+        for name, formats in variants.items()
+    }
+
+
+IMAGE_VARIANTS_FIELD = serializers.DictField(
+    child=serializers.DictField(child=serializers.URLField())
+)
+
+
 class RecipeIngredientsSerializerIn(serializers.Serializer):
     name = serializers.CharField()
 
@@ -19,13 +59,18 @@ class RecipeIngredientsSerializerOut(serializers.Serializer):
     name = serializers.CharField()
 
 
-class RecipeListSerializerOut(serializers.Serializer):
+class RecipeListSerializerOut(
+    CompiledSerializerMixin, SparseFieldsMixin, serializers.Serializer
+):
     id = serializers.IntegerField()
     title = serializers.CharField()
     time_minutes = serializers.IntegerField()
     price = serializers.DecimalField(max_digits=5, decimal_places=2)
     link = serializers.CharField()
     image = serializers.SerializerMethodField("get_image_url", required=False)
+    image_variants = serializers.SerializerMethodField(
+        "get_image_variant_urls", required=False
+    )
     tags = RecipeTagsSerailizerOut(many=True, required=False)
     ingredients = RecipeIngredientsSerializerOut(many=True, required=False)
 
@@ -39,6 +84,18 @@ class RecipeListSerializerOut(serializers.Serializer):
         except ValueError:
             pass
 
+    @extend_schema_field(IMAGE_VARIANTS_FIELD)
+    def get_image_variant_urls(self, model):
+        return image_variant_urls(self.context, model.image_variants)
+
+
+class RecipeListPageSerializerOut(
+    CompiledSerializerMixin, serializers.Serializer
+):
+    next = serializers.CharField(allow_null=True)
+    prev = serializers.CharField(allow_null=True)
+    results = RecipeListSerializerOut(many=True, source="items")
+
 
 class RecipeDetailSerializerOut(RecipeListSerializerOut):
     description = serializers.CharField()
@@ -54,6 +111,30 @@ class RecipeCreateSerializerIn(serializers.Serializer):
     ingredients = RecipeIngredientsSerializerIn(many=True, required=False)
 
 
+@extend_schema_field(RecipeCreateSerializerIn(many=True))
+class RecipeBulkItemsField(serializers.ListField):
+    # items are validated one by one with RecipeCreateSerializerIn, so an
+    # invalid recipe is reported on its own instead of failing the batch
+    child = serializers.DictField()
+
+
+class RecipeBulkCreateSerializerIn(serializers.Serializer):
+    recipes = RecipeBulkItemsField(
+        allow_empty=False, max_length=settings.RECIPE_BULK_MAX_SIZE
+    )
+    atomic = serializers.BooleanField(default=False)
+
+
+class RecipeBulkItemSerializerOut(serializers.Serializer):
+    index = serializers.IntegerField()
+    recipe = RecipeDetailSerializerOut(allow_null=True)
+    errors = serializers.DictField(allow_null=True)
+
+
+class RecipeBulkCreateSerializerOut(serializers.Serializer):
+    results = RecipeBulkItemSerializerOut(many=True)
+
+
 class RecipeCreateSerializerOut(serializers.Serializer):
     title = serializers.CharField()
     time_minutes = serializers.IntegerField()
@@ -91,6 +172,9 @@ class RecipeUploadImageSerializerIn(serializers.Serializer):
 class RecipeUploadImageSerializerOut(serializers.Serializer):
     id = serializers.IntegerField(required=True)
     image = serializers.SerializerMethodField("get_image_url")
+    image_variants = serializers.SerializerMethodField(
+        "get_image_variant_urls"
+    )
 
     def get_image_url(self, model):
         if model.image.name is None:
@@ -98,12 +182,24 @@ class RecipeUploadImageSerializerOut(serializers.Serializer):
 
         return self.context["request"].build_absolute_uri(model.image.url)
 
+    @extend_schema_field(IMAGE_VARIANTS_FIELD)
+    def get_image_variant_urls(self, model):
+        return image_variant_urls(self.context, model.image_variants)
 
-class TagListSerializerOut(serializers.Serializer):
+
+class TagListSerializerOut(CompiledSerializerMixin, serializers.Serializer):
     id = serializers.IntegerField()
     name = serializers.CharField()
 
 
+class TagListPageSerializerOut(
+    CompiledSerializerMixin, serializers.Serializer
+):
+    next = serializers.CharField(allow_null=True)
+    prev = serializers.CharField(allow_null=True)
+    results = TagListSerializerOut(many=True, source="items")
+
+
 class TagDetailPatchSerializerIn(serializers.Serializer):
     name = serializers.CharField()
 
@@ -112,11 +208,21 @@ class TagDetailPatchSerializerOut(serializers.Serializer):
     name = serializers.CharField()
 
 
-class IngredientListSerializerOut(serializers.Serializer):
+class IngredientListSerializerOut(
+    CompiledSerializerMixin, serializers.Serializer
+):
     id = serializers.IntegerField()
     name = serializers.CharField()
 
 
+class IngredientListPageSerializerOut(
+    CompiledSerializerMixin, serializers.Serializer
+):
+    next = serializers.CharField(allow_null=True)
+    prev = serializers.CharField(allow_null=True)
+    results = IngredientListSerializerOut(many=True, source="items")
+
+
 class IngredientDetailPatchSerializerIn(serializers.Serializer):
     name = serializers.CharField()
 
@@ -0,0 +1,62 @@
+import itertools
+from typing import AsyncIterator, Iterable, Iterator
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework.settings import api_settings
+
+
+def _render_items(
+    items: Iterable, serializer_class, context: dict, chunk_size: int
+) -> Iterator[bytes]:
+    # the configured json renderer, the browsable one is never streamed
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    items = iter(items)
+    separator = b""
+
+    # same body as an unpaginated page, written one chunk of items at a
+    # time so neither the rows nor the rendered json are held whole
+    yield b'{"next":null,"prev":null,"results":['
+
+    while True:
+        chunk = list(itertools.islice(items, chunk_size))
+
+        if not chunk:
+            break
+
+        rendered = renderer.render(
+            serializer_class(chunk, many=True, context=context).data
+        )
+
+        yield separator + rendered[1:-1]
+        separator = b","
+
+    yield b"]}"
+
+
+async def _arender_items(chunks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    # the sync generator keeps its server-side cursor on one connection,
+    # every step runs on the same thread through sync_to_async
+    step = sync_to_async(next)
+
+    while True:
+        chunk = await step(chunks, None)
+
+        if chunk is None:
+            return
+
+        yield chunk
+
+
+def page_response(
+    request, items: Iterable, serializer_class, context: dict, chunk_size: int
+) -> StreamingHttpResponse:
+    chunks = _render_items(items, serializer_class, context, chunk_size)
+
+    # Django buffers a sync iterator whole under ASGI, and an async one
+    # under WSGI
+    if isinstance(request._request, ASGIRequest):
+        chunks = _arender_items(chunks)
+
+    return StreamingHttpResponse(chunks, content_type="application/json")
@@ -0,0 +1,305 @@
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.models import ImportCheckpoint, Recipe, Tag, Ingredient
+from recipe_menu import service_layer as services
+
+
+def create_recipe(user, **params):
+    default = {
+        "title": "recipe title",
+        "description": "recipe description",
+        "time_minutes": 25,
+        "price": Decimal("5.25"),
+        "link": "https://example.com/recipe.pdf",
+    }
+    default.update(params)
+
+    return Recipe.objects.create(user=user, **default)
+
+
+class RecipeTransferCommandTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "user@example.com", "Aa1234567"
+        )
+        self.other_user = get_user_model().objects.create_user(
+            "other@example.com", "Aa1234567"
+        )
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+        tag = Tag.objects.create(user=self.user, name="tag1")
+        ingredient = Ingredient.objects.create(user=self.user, name="salt")
+
+        for index in range(5):
+            recipe = create_recipe(self.user, title=f"recipe{index}")
+            recipe.tags.add(tag)
+            recipe.ingredients.add(ingredient)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.tmpdir.name, name)
+
+    def export(self, *args) -> None:
+        call_command(
+            "export_recipes", *args, stdout=StringIO(), stderr=StringIO()
+        )
+
+    def import_(self, *args) -> StringIO:
+        stderr = StringIO()
+        call_command("import_recipes", *args, stdout=StringIO(), stderr=stderr)
+        return stderr
+
+    def test_export_ndjson(self):
+        out = StringIO()
+        call_command("export_recipes", stdout=out, stderr=StringIO())
+
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+
+        self.assertEqual(
+            [record["title"] for record in records],
+            [f"recipe{index}" for index in range(5)],
+        )
+        self.assertEqual(records[0]["user"], self.user.email)
+        self.assertEqual(records[0]["price"], "5.25")
+        self.assertEqual(records[0]["tags"], ["tag1"])
+        self.assertEqual(records[0]["ingredients"], ["salt"])
+
+    def test_export_import_csv_round_trip(self):
+        output = self.path("recipes.csv")
+        self.export("--format", "csv", "--output", output)
+
+        self.import_(
+            output, "--format", "csv", "--user", self.other_user.email
+        )
+
+        recipes = Recipe.objects.filter(user=self.other_user).order_by("id")
+        self.assertEqual(
+            [recipe.title for recipe in recipes],
+            [f"recipe{index}" for index in range(5)],
+        )
+        self.assertEqual(
+            list(recipes[0].tags.values_list("name", "user")),
+            [("tag1", self.other_user.id)],
+        )
+        self.assertEqual(recipes[0].ingredients.get().name, "salt")
+
+    def test_export_resumes_from_checkpoint(self):
+        output = self.path("recipes.ndjson")
+        checkpoint = self.path("export.checkpoint")
+        first = Recipe.objects.order_by("id")[1]
+
+        with open(checkpoint, "w") as file:
+            json.dump({"position": first.id}, file)
+
+        with open(output, "w") as file:
+            file.write("{}\n")
+
+        self.export("--output", output, "--checkpoint", checkpoint)
+
+        with open(output) as file:
+            lines = file.read().splitlines()
+
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(json.loads(lines[1])["title"], "recipe2")
+
+        with open(checkpoint) as file:
+            saved = json.load(file)
+
+        self.assertEqual(
+            saved["position"], Recipe.objects.order_by("id").last().id
+        )
+        self.assertEqual(saved["offset"], os.path.getsize(output))
+
+    def test_export_resume_drops_rows_after_checkpoint(self):
+        output = self.path("recipes.ndjson")
+        checkpoint = self.path("export.checkpoint")
+        self.export("--output", output, "--chunk-size", "2")
+
+        with open(output) as file:
+            lines = file.read().splitlines()
+
+        first = Recipe.objects.order_by("id")[1]
+        offset = len("\n".join(lines[:2]).encode()) + 1
+
+        with open(checkpoint, "w") as file:
+            json.dump({"position": first.id, "offset": offset}, file)
+
+        # rows flushed after the checkpoint and a half written line
+        with open(output, "a") as file:
+            file.write(lines[2][:10])
+
+        self.export("--output", output, "--checkpoint", checkpoint)
+
+        with open(output) as file:
+            self.assertEqual(file.read().splitlines(), lines)
+
+    def test_import_resumes_from_checkpoint(self):
+        output = self.path("recipes.ndjson")
+        self.export("--output", output)
+        ImportCheckpoint.objects.create(name="import", position=3)
+
+        self.import_(
+            output,
+            "--user",
+            self.other_user.email,
+            "--batch-size",
+            "1",
+            "--checkpoint",
+            "import",
+        )
+
+        self.assertEqual(
+            list(
+                Recipe.objects.filter(user=self.other_user)
+                .order_by("id")
+                .values_list("title", flat=True)
+            ),
+            ["recipe3", "recipe4"],
+        )
+        self.assertEqual(
+            ImportCheckpoint.objects.get(name="import").position, 5
+        )
+
+    def test_import_checkpoint_committed_with_batch(self):
+        output = self.path("recipes.ndjson")
+        self.export("--output", output)
+        args = (
+            output,
+            "--user",
+            self.other_user.email,
+            "--batch-size",
+            "2",
+            "--checkpoint",
+            "import",
+        )
+        create_recipes = services.create_recipes
+
+        def crash_on_second_batch(*args, **kwargs):
+            if Recipe.objects.filter(user=self.other_user).exists():
+                raise RuntimeError("crash")
+
+            return create_recipes(*args, **kwargs)
+
+        with mock.patch.object(
+            services, "create_recipes", crash_on_second_batch
+        ):
+            with self.assertRaises(RuntimeError):
+                self.import_(*args)
+
+        self.assertEqual(
+            ImportCheckpoint.objects.get(name="import").position, 2
+        )
+
+        self.import_(*args)
+
+        self.assertEqual(
+            list(
+                Recipe.objects.filter(user=self.other_user)
+                .order_by("id")
+                .values_list("title", flat=True)
+            ),
+            [f"recipe{index}" for index in range(5)],
+        )
+
+    def test_import_skips_invalid_records(self):
+        source = self.path("recipes.ndjson")
+        records = [
+            {"user": self.other_user.email, "title": "ok", "time_minutes": 1,
+             "price": "1.00"},
+            {"user": self.other_user.email, "title": "no price",
+             "time_minutes": 1},
+            {"user": "nobody@example.com", "title": "no owner",
+             "time_minutes": 1, "price": "1.00"},
+        ]
+
+        with open(source, "w") as file:
+            file.writelines(json.dumps(record) + "\n" for record in records)
+
+        stderr = self.import_(source)
+
+        self.assertEqual(
+            list(
+                Recipe.objects.filter(user=self.other_user).values_list(
+                    "title", flat=True
+                )
+            ),
+            ["ok"],
+        )
+        self.assertIn("record 2", stderr.getvalue())
+        self.assertIn("record 3: unknown user", stderr.getvalue())
+        self.assertIn("imported 1 recipes, skipped 2", stderr.getvalue())
+
+    def test_import_skips_unreadable_records(self):
+        source = self.path("recipes.ndjson")
+        record = {"title": "ok", "time_minutes": 1, "price": "1.00"}
+
+        with open(source, "w") as file:
+            file.write(json.dumps(record) + "\n")
+            file.write("{not json\n")
+            file.write("[1, 2]\n")
+            file.write(json.dumps({**record, "tags": 5}) + "\n")
+            file.write(json.dumps({**record, "user": ["x"]}) + "\n")
+
+        stderr = self.import_(source, "--user", self.other_user.email)
+
+        self.assertEqual(
+            Recipe.objects.filter(user=self.other_user).count(), 1
+        )
+        self.assertIn("record 2: invalid JSON", stderr.getvalue())
+        self.assertIn("record 3: not a JSON object", stderr.getvalue())
+        self.assertIn("record 4", stderr.getvalue())
+        self.assertIn("record 5: user is not an email", stderr.getvalue())
+        self.assertIn("imported 1 recipes, skipped 4", stderr.getvalue())
+
+    def test_import_csv_without_list_columns(self):
+        source = self.path("recipes.csv")
+
+        with open(source, "w") as file:
+            file.write("title,time_minutes,price\nok,1,1.00\nshort\n")
+
+        stderr = self.import_(
+            source, "--format", "csv", "--user", self.other_user.email
+        )
+
+        recipe = Recipe.objects.get(user=self.other_user)
+        self.assertEqual(recipe.title, "ok")
+        self.assertFalse(recipe.tags.exists())
+        self.assertIn("record 2", stderr.getvalue())
+        self.assertIn("imported 1 recipes, skipped 1", stderr.getvalue())
+
+    def test_import_skips_malformed_csv_rows(self):
+        source = self.path("recipes.csv")
+
+        with open(source, "w") as file:
+            file.write(
+                "title,time_minutes,price\n"
+                "first,1,1.00\n"
+                f"{'x' * 200000},1,1.00\n"
+                "second,1,1.00\n"
+            )
+
+        stderr = self.import_(
+            source, "--format", "csv", "--user", self.other_user.email
+        )
+
+        self.assertEqual(
+            list(
+                Recipe.objects.filter(user=self.other_user)
+                .order_by("id")
+                .values_list("title", flat=True)
+            ),
+            ["first", "second"],
+        )
+        self.assertIn("record 2: invalid CSV", stderr.getvalue())
+        self.assertIn("imported 2 recipes, skipped 1", stderr.getvalue())
@@ -0,0 +1,134 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TransactionTestCase
+
+from core.models import Ingredient, Recipe, Tag
+from recipe_menu import service_layer as services
+from recipe_menu.adapters import repository
+
+from .test_recipe_api import create_recipe
+
+THREADS = 8
+
+
+def in_thread(func):
+    # each worker thread has its own database connection, hand it back
+    # before the thread ends
+    def run(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+
+        finally:
+            connection.close()
+
+    return run
+
+
+class ConcurrentRepositoryTests(TransactionTestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "user@example.com", "Aa1234567"
+        )
+
+    def run_threads(self, func, args):
+        with ThreadPoolExecutor(max_workers=len(args)) as executor:
+            return list(executor.map(in_thread(func), args))
+
+    def test_shared_repository_deletes_own_rows(self):
+        # both threads load their recipe before either deletes
+        repo = repository.RecipeRepository()
+        loaded = threading.Barrier(2)
+        recipes = [
+            create_recipe(self.user, title=f"recipe{index}")
+            for index in range(2)
+        ]
+
+        def delete(recipe):
+            domain_recipe = repo.get({"id": recipe.id})
+            loaded.wait(timeout=10)
+            repo.delete(domain_recipe)
+
+        self.run_threads(delete, recipes)
+
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_shared_repository_updates_own_rows(self):
+        repo = repository.TagRepository()
+        loaded = threading.Barrier(2)
+        tags = [
+            Tag.objects.create(user=self.user, name=f"tag{index}")
+            for index in range(2)
+        ]
+
+        def rename(tag):
+            domain_tag = repo.get({"id": tag.id})
+            loaded.wait(timeout=10)
+            domain_tag.name = f"renamed {tag.name}"
+            repo.update(domain_tag)
+
+        self.run_threads(rename, tags)
+
+        self.assertEqual(
+            sorted(Tag.objects.values_list("name", flat=True)),
+            ["renamed tag0", "renamed tag1"],
+        )
+
+    def test_concurrent_recipe_updates(self):
+        recipes = [
+            create_recipe(self.user, title=f"recipe{index}")
+            for index in range(THREADS)
+        ]
+        version = self.user.content_version
+
+        def update(recipe):
+            return services.update_recipe(
+                id=recipe.id,
+                update_fields={
+                    "title": f"updated {recipe.title}",
+                    "tags": [{"name": f"tag {recipe.title}"}],
+                },
+                user_id=self.user.id,
+                repo=repository.RecipeRepository(),
+            )
+
+        results = self.run_threads(update, recipes)
+
+        self.assertEqual(
+            [result.title for result in results],
+            [f"updated recipe{index}" for index in range(THREADS)],
+        )
+
+        for index, recipe in enumerate(recipes):
+            recipe.refresh_from_db()
+            self.assertEqual(recipe.title, f"updated recipe{index}")
+            self.assertEqual(
+                list(recipe.tags.values_list("name", flat=True)),
+                [f"tag recipe{index}"],
+            )
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.content_version, version + THREADS)
+
+    def test_concurrent_deletes(self):
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=f"ingredient{i}")
+            for i in range(THREADS)
+        ]
+        kept = ingredients.pop()
+
+        def delete(ingredient):
+            services.delete_ingredient(
+                id=ingredient.id,
+                user_id=self.user.id,
+                repo=repository.IngredientRepository(),
+            )
+
+        self.run_threads(delete, ingredients)
+
+        self.assertEqual(
+            list(Ingredient.objects.values_list("id", flat=True)), [kept.id]
+        )
@@ -0,0 +1,316 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import storages
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from recipe_menu.adapters import images, jobs, repository
+
+from .test_recipe_api import (
+    TOKEN_URL,
+    create_recipe,
+    detail_url,
+    image_upload_url,
+)
+
+SIZES = {"thumbnail": 32, "medium": 64}
+FORMATS = ("webp", "jpeg")
+ORIENTATION = 0x0112
+
+
+def photo(
+    size=(200, 100), format="JPEG", mode="RGB", color="red", **options
+) -> bytes:
+    buffer = io.BytesIO()
+    Image.new(mode, size, color).save(buffer, format, **options)
+
+    return buffer.getvalue()
+
+
+class RenderTests(SimpleTestCase):
+
+    def open(self, data: bytes) -> Image.Image:
+        return Image.open(io.BytesIO(data))
+
+    def test_sizes_and_formats(self):
+        variants = images.render(photo(), SIZES, FORMATS)
+
+        self.assertEqual(set(variants), set(SIZES))
+
+        for name, size in SIZES.items():
+            self.assertEqual(set(variants[name]), set(FORMATS))
+
+            webp = self.open(variants[name]["webp"])
+            jpeg = self.open(variants[name]["jpeg"])
+
+            self.assertEqual(webp.format, "WEBP")
+            self.assertEqual(jpeg.format, "JPEG")
+            self.assertTrue(jpeg.info.get("progressive"))
+            self.assertEqual(jpeg.size, (size, size // 2))
+
+    def test_never_enlarged(self):
+        variants = images.render(photo(size=(40, 20)), SIZES, FORMATS)
+
+        self.assertEqual(self.open(variants["medium"]["jpeg"]).size, (40, 20))
+
+    def test_exif_removed_and_orientation_applied(self):
+        exif = Image.Exif()
+        exif[ORIENTATION] = 6
+        exif[0x010F] = "camera maker"
+
+        variants = images.render(photo(exif=exif), SIZES, FORMATS)
+
+        for data in variants["medium"].values():
+            image = self.open(data)
+
+            self.assertEqual(image.size, (32, 64))
+            self.assertFalse(image.getexif())
+
+    def test_transparent_image_flattened_for_jpeg(self):
+        data = photo(format="PNG", mode="RGBA", color=(255, 0, 0, 0))
+
+        variants = images.render(data, SIZES, FORMATS)
+
+        self.assertEqual(self.open(variants["medium"]["jpeg"]).mode, "RGB")
+        self.assertEqual(self.open(variants["medium"]["webp"]).mode, "RGBA")
+
+
+class ImageVariantsMixin:
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+
+        settings_override = override_settings(
+            MEDIA_ROOT=media_root,
+            RECIPE_IMAGE_SIZES=SIZES,
+            RECIPE_IMAGE_FORMATS=FORMATS,
+            RECIPE_IMAGE_WORKERS=0,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = get_user_model().objects.create_user(
+            "user@example.com", "Aa1234567"
+        )
+        self.recipe = create_recipe(user=self.user)
+        self.login()
+
+    def login(self):
+        self.client = APIClient()
+        res = self.client.post(
+            TOKEN_URL, {"email": "user@example.com", "password": "Aa1234567"}
+        )
+        self.headers = {
+            "HTTP_AUTHORIZATION": (
+                f"{res.data['token_type']} {res.data['access_token']}"
+            )
+        }
+
+    def upload(self, recipe=None, data=None):
+        res = self.client.patch(
+            image_upload_url((recipe or self.recipe).id),
+            {"image": SimpleUploadedFile("photo.jpg", data or photo())},
+            **self.headers,
+            format="multipart",
+        )
+        jobs.Worker("test").drain()
+
+        return res
+
+    def set_image(self, recipe, data: bytes):
+        # named like the images uploaded before content addressing
+        recipe.image = SimpleUploadedFile(f"{uuid.uuid4()}.jpg", data)
+        recipe.save()
+
+
+class ImageVariantsTests(ImageVariantsMixin, TestCase):
+
+    def test_variants_rendered_after_upload(self):
+        self.upload()
+
+        self.recipe.refresh_from_db()
+        variants = self.recipe.image_variants
+
+        self.assertEqual(set(variants), set(SIZES))
+
+        for name, formats in variants.items():
+            self.assertEqual(set(formats), set(FORMATS))
+
+            for path in formats.values():
+                self.assertTrue(storages["recipe_images"].exists(path))
+
+        # named after the size and quality they were rendered at
+        self.assertTrue(
+            variants["thumbnail"]["webp"].endswith(
+                f"/thumbnail-{SIZES['thumbnail']}-q{images.QUALITY}.webp"
+            )
+        )
+
+    def test_variant_urls_served(self):
+        self.upload()
+        self.recipe.refresh_from_db()
+
+        res = self.client.get(detail_url(self.recipe.id), **self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data["image_variants"]["thumbnail"]["webp"],
+            "http://testserver"
+            + storages["recipe_images"].url(
+                self.recipe.image_variants["thumbnail"]["webp"]
+            ),
+        )
+
+    def test_no_variants_before_rendering(self):
+        res = self.client.patch(
+            image_upload_url(self.recipe.id),
+            {"image": SimpleUploadedFile("photo.jpg", photo())},
+            **self.headers,
+            format="multipart",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["image_variants"], {})
+
+    def test_update_keeps_variants(self):
+        self.upload()
+
+        res = self.client.patch(
+            detail_url(self.recipe.id), {"title": "new"}, **self.headers
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        self.assertEqual(set(self.recipe.image_variants), set(SIZES))
+
+    def test_new_upload_drops_variants(self):
+        self.upload()
+
+        self.client.patch(
+            image_upload_url(self.recipe.id),
+            {"image": SimpleUploadedFile("photo.jpg", photo())},
+            **self.headers,
+            format="multipart",
+        )
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_variants, {})
+
+    def test_variants_of_replaced_image_discarded(self):
+        self.set_image(self.recipe, photo())
+        repo = repository.RecipeRepository()
+        stale, _ = repo.get_image(self.recipe.id)
+
+        self.set_image(self.recipe, photo())
+
+        self.assertFalse(
+            repo.set_image_variants(
+                self.recipe.id, stale, {"thumbnail": {"webp": "x.webp"}}
+            )
+        )
+
+    def test_versions_bumped(self):
+        self.set_image(self.recipe, photo())
+        self.user.refresh_from_db()
+        version = self.recipe.version
+        content_version = self.user.content_version
+
+        images.render_variants(self.recipe.id)
+
+        self.recipe.refresh_from_db()
+        self.user.refresh_from_db()
+        self.assertEqual(self.recipe.version, version + 1)
+        self.assertEqual(self.user.content_version, content_version + 1)
+
+
+class ContentAddressedImageTests(ImageVariantsMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.other = create_recipe(user=self.user, title="other")
+        self.storage = storages["recipe_images"]
+
+    def test_image_named_after_content(self):
+        data = photo()
+        digest = hashlib.sha256(data).hexdigest()
+
+        self.upload(data=data)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(
+            self.recipe.image.name, f"uploads/recipe/{digest}.jpg"
+        )
+
+    def test_identical_uploads_stored_once(self):
+        data = photo()
+
+        self.upload(data=data)
+        self.upload(self.other, data)
+
+        self.recipe.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.recipe.image.name, self.other.image.name)
+        self.assertEqual(
+            self.other.image_variants, self.recipe.image_variants
+        )
+        self.assertEqual(
+            self.storage.listdir("uploads/recipe")[1],
+            [os.path.basename(self.recipe.image.name)],
+        )
+
+    def test_shared_image_kept_until_last_recipe_replaces_it(self):
+        self.upload()
+        self.upload(self.other)
+        self.recipe.refresh_from_db()
+        image = self.recipe.image.name
+        variants = self.recipe.image_variants["medium"]["webp"]
+
+        self.upload(data=photo(size=(100, 100)))
+
+        self.assertTrue(self.storage.exists(image))
+        self.assertTrue(self.storage.exists(variants))
+
+        self.upload(self.other, photo(size=(100, 100)))
+
+        self.assertFalse(self.storage.exists(image))
+        self.assertFalse(self.storage.exists(variants))
+
+    def test_deleting_recipe_releases_image(self):
+        self.upload()
+        self.recipe.refresh_from_db()
+
+        res = self.client.delete(detail_url(self.recipe.id), **self.headers)
+        jobs.Worker("test").drain()
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(self.storage.exists(self.recipe.image.name))
+
+
+class ImageProcessPoolTests(ImageVariantsMixin, TransactionTestCase):
+
+    def test_rendered_in_process_pool(self):
+        self.set_image(self.recipe, photo())
+        self.addCleanup(images.shutdown)
+
+        with override_settings(RECIPE_IMAGE_WORKERS=1):
+            variants = images.render_variants(self.recipe.id)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image_variants, variants)
+        self.assertEqual(set(variants), set(SIZES))
@@ -69,7 +69,7 @@ class PrivateIngredientAPITests(TestCase):
 
         ingredients = Ingredient.objects.all().order_by(order_by)
         serializer = IngredientListSerializerOut(ingredients, many=True)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_ingredients_limited_to_user(self):
         ingredient = Ingredient.objects.create(user=self.user, name="ingre1")
@@ -78,9 +78,9 @@ class PrivateIngredientAPITests(TestCase):
         res = self.client.get(INGREDIENTS_URLS, **self.headers)
         self.assert_200(res.status_code)
 
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]["name"], ingredient.name)
-        self.assertEqual(res.data[0]["id"], ingredient.id)
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(res.data["results"][0]["name"], ingredient.name)
+        self.assertEqual(res.data["results"][0]["id"], ingredient.id)
 
     def test_update_ingredient(self):
         ingredient = Ingredient.objects.create(user=self.user, name="ingre1")
@@ -122,8 +122,8 @@ class PrivateIngredientAPITests(TestCase):
         s1 = IngredientListSerializerOut(i1)
         s2 = IngredientListSerializerOut(i2)
 
-        self.assertIn(s1.data, res.data)
-        self.assertNotIn(s2.data, res.data)
+        self.assertIn(s1.data, res.data["results"])
+        self.assertNotIn(s2.data, res.data["results"])
 
     def test_filterd_ingredients_unique(self):
         i1 = Ingredient.objects.create(user=self.user, name="ingre1")
@@ -146,4 +146,4 @@ class PrivateIngredientAPITests(TestCase):
         res = self.client.get(
             INGREDIENTS_URLS, {"assigned_only": 1}, **self.headers
         )
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data["results"]), 1)
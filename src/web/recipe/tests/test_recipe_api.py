@@ -1,9 +1,14 @@
+import base64
+import json
 import tempfile
 import os
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from PIL import Image
 
@@ -19,6 +24,7 @@ from recipe.serializers import (
 from recipe_menu.adapters import repository
 
 RECIPES_URL = reverse("recipe:recipe-list")
+RECIPES_BULK_URL = reverse("recipe:recipe-bulk")
 TOKEN_URL = reverse("user:token")
 
 
@@ -104,7 +110,285 @@ class PrivateRecipeAPITests(TestCase):
             recipes, many=True, context={"request": res.wsgi_request}
         ).data
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, data)
+        self.assertEqual(res.data["results"], data)
+
+    @override_settings(LIST_CACHE_TIMEOUT=0)
+    def test_retrieve_recipes_constant_queries(self):
+        tag = Tag.objects.create(user=self.user, name="tag1")
+        ingredient = Ingredient.objects.create(user=self.user, name="ingre1")
+
+        # content version, user, recipes, tags and ingredients
+        expected_queries = 5
+
+        for count in (1, 10):
+            while Recipe.objects.filter(user=self.user).count() < count:
+                recipe = create_recipe(self.user)
+                recipe.tags.add(tag)
+                recipe.ingredients.add(ingredient)
+
+            with self.assertNumQueries(expected_queries):
+                res = self.client.get(RECIPES_URL, **self.headers)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(res.data["results"]), count)
+
+    def test_retrieve_recipes_cached(self):
+        create_recipe(self.user)
+
+        res = self.client.get(RECIPES_URL, **self.headers)
+        self.assertEqual(len(res.data["results"]), 1)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(RECIPES_URL, **self.headers)
+
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached.data, res.data)
+
+    @override_settings(LIST_CACHE_TIMEOUT=0)
+    def test_recipes_not_cached_when_cache_off(self):
+        create_recipe(self.user)
+        self.client.get(RECIPES_URL, **self.headers)
+
+        # written without invalidating, as another process would be unseen
+        # by a process-local cache
+        create_recipe(self.user)
+        res = self.client.get(RECIPES_URL, **self.headers)
+
+        self.assertEqual(len(res.data["results"]), 2)
+
+    def test_recipes_cache_invalidated_on_write(self):
+        recipe = create_recipe(self.user, title="before")
+
+        res = self.client.get(RECIPES_URL, **self.headers)
+        self.assertEqual(res.data["results"][0]["title"], "before")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                detail_url(recipe.id), {"title": "after"}, **self.headers
+            )
+
+        res = self.client.get(RECIPES_URL, **self.headers)
+        self.assertEqual(res.data["results"][0]["title"], "after")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(detail_url(recipe.id), **self.headers)
+
+        res = self.client.get(RECIPES_URL, **self.headers)
+        self.assertEqual(res.data["results"], [])
+
+    def test_filter_recipes_without_duplicates(self):
+        t1 = Tag.objects.create(user=self.user, name="tag1")
+        t2 = Tag.objects.create(user=self.user, name="tag2")
+        recipe = create_recipe(self.user)
+        recipe.tags.add(t1, t2)
+
+        params = {"tags": f"{t1.id},{t2.id}"}
+        res = self.client.get(RECIPES_URL, params, **self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_paginate_recipes(self):
+        for title in ["b", "a", "c", "a", "b"]:
+            create_recipe(self.user, title=title)
+
+        expected = list(
+            Recipe.objects.filter(user=self.user)
+            .order_by("title", "id")
+            .values_list("id", flat=True)
+        )
+
+        ids = []
+        params = {"o": "title", "page_size": 2}
+        pages = 0
+        while True:
+            res = self.client.get(RECIPES_URL, params, **self.headers)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            ids += [recipe["id"] for recipe in res.data["results"]]
+            pages += 1
+
+            if res.data["next"] is None:
+                break
+
+            params["cursor"] = res.data["next"]
+
+        self.assertEqual(ids, expected)
+        self.assertEqual(pages, 3)
+
+        back = []
+        while res.data["prev"] is not None:
+            params["cursor"] = res.data["prev"]
+            res = self.client.get(RECIPES_URL, params, **self.headers)
+            back = [recipe["id"] for recipe in res.data["results"]] + back
+
+        self.assertEqual(back, expected[:4])
+
+    @override_settings(LIST_MAX_PAGE_SIZE=2)
+    def test_page_size_capped(self):
+        for _ in range(3):
+            create_recipe(self.user)
+
+        params = {"page_size": 100}
+        res = self.client.get(RECIPES_URL, params, **self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertIsNotNone(res.data["next"])
+        self.assertIsNone(res.data["prev"])
+
+    def test_invalid_cursor_bad_request(self):
+        create_recipe(self.user)
+        create_recipe(self.user)
+
+        res = self.client.get(
+            RECIPES_URL, {"cursor": "invalid"}, **self.headers
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(RECIPES_URL, {"page_size": 1}, **self.headers)
+        res = self.client.get(
+            RECIPES_URL,
+            {"page_size": 1, "o": "title", "cursor": res.data["next"]},
+            **self.headers,
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_forged_cursor_bad_request(self):
+        create_recipe(self.user)
+
+        for order_by, position in (
+            ("-id", ["abc"]),
+            ("-id", [None]),
+            ("-id", [{}]),
+            ("price", ["abc", 1]),
+            ("title", ["title", None]),
+        ):
+            cursor = base64.urlsafe_b64encode(
+                json.dumps({"o": order_by, "p": position, "d": "n"}).encode()
+            ).decode()
+
+            res = self.client.get(
+                RECIPES_URL, {"o": order_by, "cursor": cursor}, **self.headers
+            )
+
+            self.assertEqual(
+                res.status_code, status.HTTP_400_BAD_REQUEST, position
+            )
+
+    def test_unknown_ordering_bad_request(self):
+        create_recipe(self.user)
+
+        for order_by in (
+            "user__email",
+            "image",
+            "description",
+            "-link",
+            "missing",
+            "--id",
+        ):
+            for params in ({}, {"page_size": 1}, {"stream": 1}):
+                res = self.client.get(
+                    RECIPES_URL, {"o": order_by, **params}, **self.headers
+                )
+
+                self.assertEqual(
+                    res.status_code, status.HTTP_400_BAD_REQUEST, order_by
+                )
+
+    @override_settings(LIST_CACHE_TIMEOUT=0)
+    def test_retrieve_recipes_sparse_fields(self):
+        tag = Tag.objects.create(user=self.user, name="tag1")
+        for _ in range(3):
+            create_recipe(self.user).tags.add(tag)
+
+        # content version, user and one narrow recipes query
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(
+                RECIPES_URL, {"fields": "title"}, **self.headers
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 3)
+        self.assertNotIn("description", queries[-1]["sql"])
+        for recipe in res.data["results"]:
+            self.assertEqual(set(recipe), {"id", "title"})
+
+        res = self.client.get(
+            RECIPES_URL, {"fields": "title,tags"}, **self.headers
+        )
+        for recipe in res.data["results"]:
+            self.assertEqual(set(recipe), {"id", "title", "tags"})
+            self.assertEqual(recipe["tags"][0]["name"], tag.name)
+
+    def test_retrieve_recipe_detail_sparse_fields(self):
+        recipe = create_recipe(self.user)
+
+        res = self.client.get(
+            detail_url(recipe.id),
+            {"fields": "description,price"},
+            **self.headers,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data,
+            {
+                "id": recipe.id,
+                "price": str(recipe.price),
+                "description": recipe.description,
+            },
+        )
+
+    def test_retrieve_recipes_unknown_field_bad_request(self):
+        res = self.client.get(
+            RECIPES_URL, {"fields": "title,password"}, **self.headers
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(LIST_STREAM_CHUNK_SIZE=2)
+    def test_stream_recipes(self):
+        tag = Tag.objects.create(user=self.user, name="tag1")
+        for index in range(5):
+            create_recipe(self.user, title=f"recipe{index}").tags.add(tag)
+        create_recipe(self.other_user)
+
+        params = {"o": "id", "page_size": 1}
+        res = self.client.get(
+            RECIPES_URL, {**params, "stream": 1}, **self.headers
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+
+        chunks = list(res.streaming_content)
+        data = json.loads(b"".join(chunks))
+
+        # opening, three chunks of at most two recipes and closing
+        self.assertEqual(len(chunks), 5)
+        self.assertIsNone(data["next"])
+        self.assertIsNone(data["prev"])
+
+        params["page_size"] = 5
+        paged = self.client.get(RECIPES_URL, params, **self.headers)
+        self.assertEqual(
+            data["results"], json.loads(paged.content)["results"]
+        )
+
+    def test_stream_recipes_sparse_fields(self):
+        recipe = create_recipe(self.user, title="recipe")
+
+        params = {"stream": 1, "fields": "title"}
+        res = self.client.get(RECIPES_URL, params, **self.headers)
+        data = json.loads(b"".join(res.streaming_content))
+
+        self.assertEqual(
+            data["results"], [{"id": recipe.id, "title": "recipe"}]
+        )
+
+    def test_stream_no_recipes(self):
+        res = self.client.get(RECIPES_URL, {"stream": 1}, **self.headers)
+        data = json.loads(b"".join(res.streaming_content))
+
+        self.assertEqual(data, {"next": None, "prev": None, "results": []})
 
     def test_recipe_list_limited_to_user(self):
         order_by = "-id"
@@ -119,7 +403,7 @@ class PrivateRecipeAPITests(TestCase):
         recipes = Recipe.objects.filter(user=self.user).order_by(order_by)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(
-            res.data,
+            res.data["results"],
             RecipeListSerializerOut(
                 recipes, many=True, context={"request": res.wsgi_request}
             ).data,
@@ -140,6 +424,48 @@ class PrivateRecipeAPITests(TestCase):
         )
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
+    def test_retrieve_recipe_detail_not_modified(self):
+        recipe = create_recipe(self.user)
+        url = detail_url(recipe.id)
+
+        res = self.client.get(url, **self.headers)
+        etag = res["ETag"]
+
+        with self.assertNumQueries(1):
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+
+        self.client.patch(url, {"title": "changed"}, **self.headers)
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+        self.assertEqual(res.data["title"], "changed")
+
+    def test_retrieve_recipes_not_modified(self):
+        create_recipe(self.user)
+
+        res = self.client.get(RECIPES_URL, **self.headers)
+        etag = res["ETag"]
+
+        with self.assertNumQueries(0):
+            res = self.client.get(
+                RECIPES_URL, HTTP_IF_NONE_MATCH=etag, **self.headers
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        cache.clear()
+
+        with self.assertNumQueries(1):
+            res = self.client.get(
+                RECIPES_URL, HTTP_IF_NONE_MATCH=etag, **self.headers
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
     def test_create_recipe(self):
         price = "1.99"
         payload = {
@@ -275,6 +601,53 @@ class PrivateRecipeAPITests(TestCase):
         self.assertIn(tag2, recipe.tags.all())
         self.assertNotIn(tag1, recipe.tags.all())
 
+    def test_update_recipe_same_tags_no_writes(self):
+        recipe = create_recipe(self.user)
+        recipe.tags.add(
+            Tag.objects.create(user=self.user, name="tag1"),
+            Tag.objects.create(user=self.user, name="tag2"),
+        )
+
+        payload = {"tags": [{"name": "tag2"}, {"name": "tag1"}]}
+        url = detail_url(recipe.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.patch(
+                url, payload, **self.headers, format="json"
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(
+            [
+                query["sql"]
+                for query in queries
+                if '"core_recipe_tags"' in query["sql"]
+                and query["sql"].startswith(("INSERT", "DELETE"))
+            ]
+        )
+        self.assertEqual(recipe.tags.count(), 2)
+
+    def test_update_recipe_tags_writes_difference(self):
+        tag1 = Tag.objects.create(user=self.user, name="tag1")
+        tag2 = Tag.objects.create(user=self.user, name="tag2")
+        recipe = create_recipe(self.user)
+        recipe.tags.add(tag1, tag2)
+        kept = recipe.tags.through.objects.get(recipe=recipe, tag=tag2)
+
+        payload = {"tags": [{"name": "tag2"}, {"name": "tag3"}]}
+        url = detail_url(recipe.id)
+        res = self.client.patch(url, payload, **self.headers, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(recipe.tags.values_list("name", flat=True)),
+            ["tag2", "tag3"],
+        )
+        # the row for the tag that stayed is left untouched
+        self.assertTrue(
+            recipe.tags.through.objects.filter(id=kept.id).exists()
+        )
+
     def test_clear_recipe_tags(self):
         tag1 = Tag.objects.create(user=self.user, name="tag1")
         recipe = create_recipe(self.user)
@@ -336,6 +709,159 @@ class PrivateRecipeAPITests(TestCase):
         self.assertEqual(recipes[0].ingredients.count(), len(ingredients))
         self.assertEqual(Recipe.objects.all()[0].ingredients.count(), 2)
 
+    def test_create_recipe_ingredients_constant_queries(self):
+        Ingredient.objects.create(user=self.user, name="ingre0")
+
+        # the owner's profile is cached from the first request on
+        repository.UserRepository().get_profile({"id": self.user.id})
+
+        counts = []
+        for size in (2, 20):
+            payload = {
+                "title": "recipe",
+                "time_minutes": 1,
+                "price": Decimal("1.00"),
+                "description": "",
+                "link": "",
+                "ingredients": [
+                    {"name": f"ingre{index}"} for index in range(size)
+                ],
+            }
+
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.post(
+                    RECIPES_URL, payload, **self.headers, format="json"
+                )
+
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(
+                [ingredient["name"] for ingredient in res.data["ingredients"]],
+                [ingredient["name"] for ingredient in payload["ingredients"]],
+            )
+            self.assertTrue(
+                all(ingredient["id"] for ingredient in res.data["ingredients"])
+            )
+            counts.append(len(queries))
+
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user).count(), 20
+        )
+
+    def bulk_payload(self, size: int, **params) -> dict:
+        return {
+            "recipes": [
+                {
+                    "title": f"recipe{index}",
+                    "time_minutes": 1,
+                    "price": "1.00",
+                    "description": "",
+                    "link": "",
+                    "tags": [{"name": "shared"}, {"name": f"tag{index}"}],
+                    "ingredients": [{"name": "salt"}],
+                }
+                for index in range(size)
+            ],
+            **params,
+        }
+
+    def test_bulk_create_recipes(self):
+        Tag.objects.create(user=self.user, name="shared")
+        payload = self.bulk_payload(3)
+
+        res = self.client.post(
+            RECIPES_BULK_URL, payload, **self.headers, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 3)
+        self.assertEqual(
+            Tag.objects.filter(user=self.user, name="shared").count(), 1
+        )
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user).count(), 1
+        )
+
+        for index, result in enumerate(res.data["results"]):
+            recipe = Recipe.objects.get(id=result["recipe"]["id"])
+            self.assertEqual(result["index"], index)
+            self.assertIsNone(result["errors"])
+            self.assertEqual(recipe.title, f"recipe{index}")
+            self.assertEqual(
+                sorted(recipe.tags.values_list("name", flat=True)),
+                ["shared", f"tag{index}"],
+            )
+            self.assertEqual(recipe.ingredients.count(), 1)
+
+    def test_bulk_create_constant_queries(self):
+        Tag.objects.create(user=self.user, name="shared")
+        Ingredient.objects.create(user=self.user, name="salt")
+        # the owner's profile is cached from the first request on
+        repository.UserRepository().get_profile({"id": self.user.id})
+
+        counts = []
+        for size in (2, 20):
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.post(
+                    RECIPES_BULK_URL,
+                    self.bulk_payload(size),
+                    **self.headers,
+                    format="json",
+                )
+
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            counts.append(len(queries))
+
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 22)
+
+    def test_bulk_create_reports_invalid_items(self):
+        payload = self.bulk_payload(3)
+        del payload["recipes"][1]["title"]
+
+        res = self.client.post(
+            RECIPES_BULK_URL, payload, **self.headers, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        results = res.data["results"]
+        self.assertIn("title", results[1]["errors"])
+        self.assertIsNone(results[1]["recipe"])
+        self.assertEqual(
+            [results[0]["recipe"]["title"], results[2]["recipe"]["title"]],
+            ["recipe0", "recipe2"],
+        )
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 2)
+
+    def test_bulk_create_atomic_rejects_batch(self):
+        payload = self.bulk_payload(3, atomic=True)
+        payload["recipes"][2]["price"] = "not a price"
+
+        res = self.client.post(
+            RECIPES_BULK_URL, payload, **self.headers, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("price", res.data["results"][2]["errors"])
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+        self.assertFalse(Tag.objects.filter(user=self.user).exists())
+
+    def test_bulk_create_invalidates_list_cache(self):
+        create_recipe(self.user)
+        self.client.get(RECIPES_URL, **self.headers)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                RECIPES_BULK_URL,
+                self.bulk_payload(1),
+                **self.headers,
+                format="json",
+            )
+
+        res = self.client.get(RECIPES_URL, **self.headers)
+
+        self.assertEqual(len(res.data["results"]), 2)
+
     def test_create_ingredient_on_update(self):
         recipe = create_recipe(self.user)
 
@@ -401,7 +927,7 @@ class PrivateRecipeAPITests(TestCase):
             r3, context={"request": res.wsgi_request}
         )
 
-        data = [data["tags"][0] for data in res.data]
+        data = [data["tags"][0] for data in res.data["results"]]
         self.assertIn(s1.data["tags"][0], data)
         self.assertIn(s2.data["tags"][0], data)
         self.assertNotIn(s3.data["tags"], data)
@@ -431,7 +957,7 @@ class PrivateRecipeAPITests(TestCase):
             r3, context={"request": res.wsgi_request}
         )
 
-        data = [data["ingredients"][0] for data in res.data]
+        data = [data["ingredients"][0] for data in res.data["results"]]
         self.assertIn(s1.data["ingredients"][0], data)
         self.assertIn(s2.data["ingredients"][0], data)
         self.assertNotIn(s3.data["ingredients"], data)
@@ -489,3 +1015,116 @@ class ImageUploadTests(TestCase):
             url, {"image": "noimage"}, **self.headers, format="multipart"
         )
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncRecipeAPITests(TestCase):
+    """Requests served through the ASGI handler, on an event loop."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "user@example.com", "Aa1234567"
+        )
+        tag = Tag.objects.create(user=self.user, name="tag1")
+
+        for index in range(3):
+            create_recipe(self.user, title=f"recipe{index}").tags.add(tag)
+
+        res = APIClient().post(
+            TOKEN_URL, {"email": "user@example.com", "password": "Aa1234567"}
+        )
+        self.headers = {
+            "AUTHORIZATION": (
+                f"{res.data['token_type']} {res.data['access_token']}"
+            )
+        }
+
+    async def test_retrieve_recipes(self):
+        res = await self.async_client.get(
+            RECIPES_URL, {"o": "id"}, headers=self.headers
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe["title"] for recipe in res.json()["results"]],
+            ["recipe0", "recipe1", "recipe2"],
+        )
+        self.assertEqual(res.json()["results"][0]["tags"][0]["name"], "tag1")
+
+    @override_settings(LIST_CACHE_TIMEOUT=0)
+    async def test_retrieve_recipes_pages_on_async_orm(self):
+        res = await self.async_client.get(
+            RECIPES_URL,
+            {"o": "title", "page_size": 2, "fields": "title,tags"},
+            headers=self.headers,
+        )
+
+        self.assertEqual(
+            [
+                (recipe["title"], recipe["tags"][0]["name"])
+                for recipe in res.json()["results"]
+            ],
+            [("recipe0", "tag1"), ("recipe1", "tag1")],
+        )
+
+        res = await self.async_client.get(
+            RECIPES_URL,
+            {"o": "title", "page_size": 2, "cursor": res.json()["next"]},
+            headers=self.headers,
+        )
+
+        self.assertEqual(
+            [recipe["title"] for recipe in res.json()["results"]],
+            ["recipe2"],
+        )
+
+    async def test_retrieve_recipe(self):
+        recipe = await Recipe.objects.aget(title="recipe1")
+
+        res = await self.async_client.get(
+            detail_url(recipe.id), headers=self.headers
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["title"], "recipe1")
+        self.assertEqual(res.json()["tags"][0]["name"], "tag1")
+        self.assertEqual(res.json()["ingredients"], [])
+
+    async def test_stream_recipes(self):
+        res = await self.async_client.get(
+            RECIPES_URL, {"o": "id", "stream": 1}, headers=self.headers
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.is_async)
+
+        body = b"".join([chunk async for chunk in res.streaming_content])
+        self.assertEqual(len(json.loads(body)["results"]), 3)
+
+    async def test_create_and_update_recipe(self):
+        res = await self.async_client.post(
+            RECIPES_URL,
+            {
+                "title": "new",
+                "time_minutes": 1,
+                "price": "1.00",
+                "description": "",
+                "link": "",
+                "tags": [{"name": "tag1"}],
+            },
+            content_type="application/json",
+            headers=self.headers,
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        recipe = await Recipe.objects.aget(user=self.user, title="new")
+        res = await self.async_client.patch(
+            detail_url(recipe.id),
+            {"title": "renamed"},
+            content_type="application/json",
+            headers=self.headers,
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(
+            await Recipe.objects.filter(title="renamed").aexists()
+        )
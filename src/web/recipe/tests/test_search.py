@@ -0,0 +1,175 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from recipe_menu import service_layer as services
+from recipe_menu.adapters import repository
+from recipe_menu.domain import model as domain_model
+
+from .test_recipe_api import TOKEN_URL, create_recipe, detail_url
+
+SEARCH_URL = reverse("recipe:recipe-search")
+
+
+class RecipeSearchTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "user@example.com", "Aa1234567"
+        )
+        self.other_user = get_user_model().objects.create_user(
+            "other@example.com", "Aa1234567"
+        )
+
+        self.client = APIClient()
+        res = self.client.post(
+            TOKEN_URL, {"email": "user@example.com", "password": "Aa1234567"}
+        )
+        self.headers = {
+            "HTTP_AUTHORIZATION": (
+                f"{res.data['token_type']} {res.data['access_token']}"
+            )
+        }
+
+    def search(self, **params):
+        return self.client.get(SEARCH_URL, params, **self.headers)
+
+    def titles(self, res) -> list[str]:
+        return [recipe["title"] for recipe in res.data["results"]]
+
+    def test_matches_title_and_description(self):
+        create_recipe(self.user, title="Tomato soup")
+        create_recipe(
+            self.user, title="Gazpacho", description="cold, with tomatoes"
+        )
+        create_recipe(self.user, title="Pancakes")
+
+        res = self.search(q="tomato")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(self.titles(res)), {"Tomato soup", "Gazpacho"})
+
+    def test_title_match_ranked_first(self):
+        create_recipe(
+            self.user, title="Gazpacho", description="tomato and cucumber"
+        )
+        create_recipe(self.user, title="Tomato salad", description="fresh")
+
+        res = self.search(q="tomato")
+
+        self.assertEqual(self.titles(res), ["Tomato salad", "Gazpacho"])
+
+    def test_websearch_syntax(self):
+        create_recipe(self.user, title="Tomato soup")
+        create_recipe(self.user, title="Tomato salad")
+        create_recipe(self.user, title="Soup of the tomato day")
+
+        self.assertEqual(
+            self.titles(self.search(q='"tomato soup"')), ["Tomato soup"]
+        )
+        self.assertEqual(
+            self.titles(self.search(q="tomato -soup")), ["Tomato salad"]
+        )
+
+    def test_stop_words_match_nothing(self):
+        create_recipe(self.user, title="The soup")
+
+        res = self.search(q="the")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"], [])
+
+    def test_limited_to_user(self):
+        create_recipe(self.other_user, title="Tomato soup")
+
+        res = self.search(q="tomato")
+
+        self.assertEqual(res.data["results"], [])
+
+    def test_combined_with_tag_filter(self):
+        tagged = create_recipe(self.user, title="Tomato soup")
+        create_recipe(self.user, title="Tomato salad")
+        tag = Tag.objects.create(user=self.user, name="winter")
+        tagged.tags.add(tag)
+
+        res = self.search(q="tomato", tags=str(tag.id))
+
+        self.assertEqual(self.titles(res), ["Tomato soup"])
+
+    def test_paginated_by_rank(self):
+        for index in range(5):
+            # equal ranks for some, the id breaks the tie
+            create_recipe(
+                self.user,
+                title="Tomato " * (index % 2 + 1),
+                description=f"number {index}",
+            )
+
+        expected = self.titles(self.search(q="tomato", page_size=10))
+        pages = []
+        res = self.search(q="tomato", page_size=2)
+
+        while True:
+            pages.extend(self.titles(res))
+
+            if res.data["next"] is None:
+                break
+
+            res = self.search(q="tomato", page_size=2, cursor=res.data["next"])
+
+        self.assertEqual(len(expected), 5)
+        self.assertEqual(pages, expected)
+
+        res = self.search(q="tomato", page_size=2, cursor=res.data["prev"])
+
+        self.assertEqual(self.titles(res), expected[2:4])
+
+    def test_sparse_fields(self):
+        create_recipe(self.user, title="Tomato soup")
+
+        res = self.search(q="tomato", fields="title")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(res.data["results"][0]), {"id", "title"})
+
+    def test_follows_recipe_updates(self):
+        recipe = create_recipe(self.user, title="Tomato soup")
+        self.search(q="tomato")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                detail_url(recipe.id), {"title": "Onion soup"}, **self.headers
+            )
+
+        self.assertEqual(self.search(q="tomato").data["results"], [])
+        self.assertEqual(self.titles(self.search(q="onion")), ["Onion soup"])
+
+    def test_blank_query_bad_request(self):
+        for params in ({}, {"q": "  "}, {"q": "x" * 256}):
+            res = self.search(**params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_service_requires_search(self):
+        with self.assertRaises(domain_model.InvalidSearchError):
+            services.search_recipes(
+                user_id=self.user.id,
+                filter_obj=domain_model.UserFilterObj(
+                    model=domain_model.UserFilterModel.RECIPES
+                ),
+                repo=repository.UserRepository(),
+            )
+
+    def test_match_uses_index(self):
+        create_recipe(self.user, title="Tomato soup")
+        recipes = get_user_model()._search(Recipe.objects.all(), "tomato")
+
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            plan = recipes.explain()
+
+        self.assertIn("recipe_search_idx", plan)
@@ -0,0 +1,107 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.models import Recipe, Tag, Ingredient
+from recipe_menu.domain import model as domain_model
+
+from recipe.serializers import (
+    RecipeListSerializerOut,
+    RecipeListPageSerializerOut,
+    RecipeDetailSerializerOut,
+    TagListPageSerializerOut,
+)
+
+
+def serialize(serializer_class, instance, compiled: bool, **kwargs):
+    with override_settings(COMPILED_SERIALIZERS=compiled):
+        return serializer_class(instance, **kwargs).data
+
+
+class CompiledSerializerTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "user@example.com", "Aa1234567"
+        )
+        self.context = {"request": RequestFactory().get("/")}
+
+        tag = Tag.objects.create(user=self.user, name="tag1")
+        ingredient = Ingredient.objects.create(user=self.user, name="salt")
+
+        for index in range(3):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f"recipe{index}",
+                description="",
+                time_minutes=index,
+                price=Decimal("5.5"),
+                link="",
+            )
+            recipe.tags.add(tag)
+            recipe.ingredients.add(ingredient)
+
+        self.recipes = [
+            recipe.to_domain() for recipe in Recipe.objects.order_by("id")
+        ]
+
+    def assertSameOutput(self, serializer_class, instance, **kwargs):
+        self.assertEqual(
+            serialize(serializer_class, instance, True, **kwargs),
+            serialize(serializer_class, instance, False, **kwargs),
+        )
+
+    def test_recipe_list_matches_drf(self):
+        self.assertSameOutput(
+            RecipeListSerializerOut,
+            self.recipes,
+            many=True,
+            context=self.context,
+        )
+
+        data = serialize(
+            RecipeListSerializerOut,
+            self.recipes,
+            True,
+            many=True,
+            context=self.context,
+        )
+        self.assertEqual(data[0]["price"], "5.50")
+        self.assertEqual(data[0]["tags"][0]["name"], "tag1")
+
+    def test_recipe_detail_matches_drf(self):
+        self.assertSameOutput(
+            RecipeDetailSerializerOut, self.recipes[0], context=self.context
+        )
+
+    def test_sparse_fields_match_drf(self):
+        for fields in ({"id", "title"}, {"id", "tags", "price"}):
+            self.assertSameOutput(
+                RecipeListSerializerOut,
+                self.recipes,
+                many=True,
+                context={**self.context, "fields": fields},
+            )
+
+        data = serialize(
+            RecipeListSerializerOut,
+            self.recipes,
+            True,
+            many=True,
+            context={**self.context, "fields": {"id", "title"}},
+        )
+        self.assertEqual(list(data[0]), ["id", "title"])
+
+    def test_pages_match_drf(self):
+        page = domain_model.Page(items=self.recipes, next="n", prev=None)
+        self.assertSameOutput(
+            RecipeListPageSerializerOut, page, context=self.context
+        )
+
+        tags = domain_model.Page(
+            items=[tag.to_domain() for tag in Tag.objects.all()],
+            next=None,
+            prev=None,
+        )
+        self.assertSameOutput(TagListPageSerializerOut, tags)
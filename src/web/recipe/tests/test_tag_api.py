@@ -66,7 +66,36 @@ class PrivateTagsApiTests(TestCase):
         serializer = TagListSerializerOut(tags, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
+
+    def test_paginate_tags(self):
+        for name in ["tag1", "tag2", "tag3"]:
+            Tag.objects.create(user=self.user, name=name)
+
+        res = self.client.get(TAGS_URL, {"page_size": 2}, **self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [tag["name"] for tag in res.data["results"]], ["tag3", "tag2"]
+        )
+
+        params = {"page_size": 2, "cursor": res.data["next"]}
+        res = self.client.get(TAGS_URL, params, **self.headers)
+
+        self.assertEqual(
+            [tag["name"] for tag in res.data["results"]], ["tag1"]
+        )
+        self.assertIsNone(res.data["next"])
+        self.assertIsNotNone(res.data["prev"])
+
+    def test_unknown_ordering_bad_request(self):
+        Tag.objects.create(user=self.user, name="tag1")
+
+        res = self.client.get(
+            TAGS_URL, {"o": "user__email", "page_size": 1}, **self.headers
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
     def test_tags_limited_to_user(self):
         Tag.objects.create(user=self.other_user, name="other user tag")
@@ -75,9 +104,9 @@ class PrivateTagsApiTests(TestCase):
         res = self.client.get(TAGS_URL, **self.headers)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]["name"], tag.name)
-        self.assertEqual(res.data[0]["id"], tag.id)
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(res.data["results"][0]["name"], tag.name)
+        self.assertEqual(res.data["results"][0]["id"], tag.id)
 
     def test_update_tag(self):
         tag = Tag.objects.create(user=self.user, name="Hello")
@@ -91,6 +120,32 @@ class PrivateTagsApiTests(TestCase):
 
         self.assertEqual(tag.name, payload["name"])
 
+    def test_tags_cache_invalidated_on_update(self):
+        tag = Tag.objects.create(user=self.user, name="Hello")
+
+        res = self.client.get(TAGS_URL, **self.headers)
+        self.assertEqual(res.data["results"][0]["name"], "Hello")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                detail_url(tag.id), {"name": "World"}, **self.headers
+            )
+
+        res = self.client.get(TAGS_URL, **self.headers)
+        self.assertEqual(res.data["results"][0]["name"], "World")
+
+    def test_update_tag_existing_name_bad_request(self):
+        Tag.objects.create(user=self.user, name="Hello")
+        tag = Tag.objects.create(user=self.user, name="World")
+
+        res = self.client.patch(
+            detail_url(tag.id), {"name": "Hello"}, **self.headers
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, "World")
+
     def test_delete_tag(self):
         tag = Tag.objects.create(user=self.user, name="Hello")
 
@@ -118,8 +173,8 @@ class PrivateTagsApiTests(TestCase):
         s1 = TagListSerializerOut(t1)
         s2 = TagListSerializerOut(t2)
 
-        self.assertIn(s1.data, res.data)
-        self.assertNotIn(s2.data, res.data)
+        self.assertIn(s1.data, res.data["results"])
+        self.assertNotIn(s2.data, res.data["results"])
 
     def test_filterd_tags_unique(self):
         t1 = Tag.objects.create(user=self.user, name="tag1")
@@ -140,4 +195,4 @@ class PrivateTagsApiTests(TestCase):
         r2.tags.add(t1)
 
         res = self.client.get(TAGS_URL, {"assigned_only": 1}, **self.headers)
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data["results"]), 1)
@@ -0,0 +1,231 @@
+import csv
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Optional, TextIO, Union
+
+from django.db.models import Prefetch
+
+from core.models import Ingredient, Recipe, Tag
+
+FORMATS = ("ndjson", "csv")
+
+COLUMNS = [
+    "id",
+    "user",
+    "title",
+    "description",
+    "time_minutes",
+    "price",
+    "link",
+    "tags",
+    "ingredients",
+]
+
+# tags and ingredients share one csv cell, joined by this separator
+CSV_LIST_SEPARATOR = "|"
+
+
+def export_queryset(user=None, after_id: Optional[int] = None):
+    queryset = (
+        Recipe.objects.select_related("user")
+        .prefetch_related(
+            Prefetch("tags", queryset=Tag.objects.only("id", "name")),
+            Prefetch(
+                "ingredients", queryset=Ingredient.objects.only("id", "name")
+            ),
+        )
+        .order_by("id")
+    )
+
+    if user is not None:
+        queryset = queryset.filter(user=user)
+
+    if after_id is not None:
+        queryset = queryset.filter(id__gt=after_id)
+
+    return queryset
+
+
+def to_record(recipe: Recipe) -> dict:
+    return {
+        "id": recipe.id,
+        "user": recipe.user.email,
+        "title": recipe.title,
+        "description": recipe.description,
+        "time_minutes": recipe.time_minutes,
+        "price": str(recipe.price),
+        "link": recipe.link,
+        "tags": [tag.name for tag in recipe.tags.all()],
+        "ingredients": [
+            ingredient.name for ingredient in recipe.ingredients.all()
+        ],
+    }
+
+
+@dataclass(frozen=True)
+class InvalidRecord:
+    """Stands in the records read for one that could not be parsed."""
+
+    reason: str
+
+
+def _names(value) -> list:
+    # anything but a list is passed on for the serializer to reject
+    if not isinstance(value, list):
+        return value
+
+    return [{"name": name} for name in value]
+
+
+def to_payload(record: dict) -> dict:
+    # a record in the shape RecipeCreateSerializerIn validates
+    return {
+        "title": record.get("title"),
+        "time_minutes": record.get("time_minutes"),
+        "price": record.get("price"),
+        "description": record.get("description", ""),
+        "link": record.get("link", ""),
+        "tags": _names(record.get("tags") or []),
+        "ingredients": _names(record.get("ingredients") or []),
+    }
+
+
+def writer(
+    stream: TextIO, format: str, header: bool = True
+) -> Callable[[dict], None]:
+    if format == "ndjson":
+
+        def write(record: dict) -> None:
+            stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+        return write
+
+    csv_writer = csv.DictWriter(stream, fieldnames=COLUMNS)
+
+    if header:
+        csv_writer.writeheader()
+
+    def write(record: dict) -> None:
+        csv_writer.writerow(
+            {
+                **record,
+                "tags": CSV_LIST_SEPARATOR.join(record["tags"]),
+                "ingredients": CSV_LIST_SEPARATOR.join(record["ingredients"]),
+            }
+        )
+
+    return write
+
+
+def reader(
+    stream: Iterable[str], format: str
+) -> Iterator[Union[dict, InvalidRecord]]:
+    # one item per record, a record that cannot be parsed is replaced by an
+    # InvalidRecord so the import skips it and reads on
+    if format == "ndjson":
+        for line in stream:
+            if not line.strip():
+                continue
+
+            try:
+                record = json.loads(line)
+
+            except ValueError as exc:
+                yield InvalidRecord(f"invalid JSON, {exc}")
+                continue
+
+            if not isinstance(record, dict):
+                yield InvalidRecord("not a JSON object")
+                continue
+
+            # owners are looked up by email, in a set
+            if not isinstance(record.get("user", ""), (str, type(None))):
+                yield InvalidRecord("user is not an email")
+                continue
+
+            yield record
+
+        return
+
+    rows = iter(csv.DictReader(stream))
+
+    while True:
+        try:
+            row = next(rows)
+
+        except StopIteration:
+            return
+
+        except csv.Error as exc:
+            # the reader resumes on the line after the malformed row
+            yield InvalidRecord(f"invalid CSV, {exc}")
+            continue
+
+        # a missing column, or cell of a short row, holds no names
+        for column in ("tags", "ingredients"):
+            row[column] = [
+                name
+                for name in (row.get(column) or "").split(CSV_LIST_SEPARATOR)
+                if name
+            ]
+
+        yield row
+
+
+@dataclass(frozen=True)
+class ExportCheckpoint:
+    """The last exported id and the size of the output written up to it."""
+
+    position: int
+    offset: Optional[int] = None
+
+
+def load_checkpoint(path: Optional[str]) -> Optional[ExportCheckpoint]:
+    if path is None or not os.path.exists(path):
+        return None
+
+    with open(path) as file:
+        data = json.load(file)
+
+    return ExportCheckpoint(data["position"], data.get("offset"))
+
+
+def save_checkpoint(
+    path: Optional[str], position: int, offset: Optional[int] = None
+) -> None:
+    if path is None:
+        return
+
+    # written aside and renamed, a crash never leaves a truncated checkpoint
+    with open(f"{path}.tmp", "w") as file:
+        json.dump({"position": position, "offset": offset}, file)
+
+    os.replace(f"{path}.tmp", path)
+
+
+class Progress:
+    """Report the number of processed recipes and the rate to a stream."""
+
+    def __init__(self, stream, label: str, every: int = 1000):
+        self.stream = stream
+        self.label = label
+        self.every = every
+        self.count = 0
+        self.reported = 0
+        self.started = time.monotonic()
+
+    def advance(self, count: int = 1) -> None:
+        self.count += count
+
+        if self.count - self.reported >= self.every:
+            self.report()
+
+    def report(self) -> None:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        self.reported = self.count
+        self.stream.write(
+            f"{self.label} {self.count} recipes "
+            f"({self.count / elapsed:.0f} recipes/s)"
+        )
@@ -5,6 +5,16 @@ app_name = "recipe"
 
 urlpatterns = [
     path("recipes/", views.RecipeListAPIView.as_view(), name="recipe-list"),
+    path(
+        "recipes/search/",
+        views.RecipeSearchAPIView.as_view(),
+        name="recipe-search",
+    ),
+    path(
+        "recipes/bulk/",
+        views.RecipeBulkAPIView.as_view(),
+        name="recipe-bulk",
+    ),
     path(
         "recipes/<int:recipe_id>/image/",
         views.RecipeUploadImageAPIView.as_view(),
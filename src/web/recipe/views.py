@@ -1,86 +1,166 @@
+from django.conf import settings
 from drf_spectacular.utils import (
     extend_schema,
     OpenApiParameter,
     OpenApiTypes,
 )
 from rest_framework import status
-from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import (
-    JWTStatelessUserAuthentication,
-)
 
+from core.authentication import CachedJWTStatelessUserAuthentication
+from core.views import AsyncAPIView
 from recipe_menu import service_layer as services
+from recipe import conditional, streaming
 from recipe_menu.adapters import repository
 from recipe.serializers import (
     RecipeListSerializerOut,
+    RecipeListPageSerializerOut,
     RecipeDetailSerializerOut,
     RecipeCreateSerializerIn,
+    RecipeBulkCreateSerializerIn,
+    RecipeBulkCreateSerializerOut,
     RecipeDetailPatchSerializerIn,
     RecipeDetailPatchSerializerOut,
     RecipeUploadImageSerializerIn,
     RecipeUploadImageSerializerOut,
-    TagListSerializerOut,
+    TagListPageSerializerOut,
     TagDetailPatchSerializerIn,
     TagDetailPatchSerializerOut,
-    IngredientListSerializerOut,
+    IngredientListPageSerializerOut,
     IngredientDetailPatchSerializerIn,
     IngredientDetailPatchSerializerOut,
 )
 from recipe_menu.domain import model as domain_model
 
+FIELDS_PARAMETER = OpenApiParameter(
+    "fields",
+    OpenApiTypes.STR,
+    description="Comma separated list of fields to return, all by default",
+)
 
-class RecipeListAPIView(APIView):
-    authentication_classes = [JWTStatelessUserAuthentication]
+RECIPE_FILTER_PARAMETERS = [
+    OpenApiParameter(
+        "tags",
+        OpenApiTypes.STR,
+        description="Comma separated list of tag IDs to filter",
+    ),
+    OpenApiParameter(
+        "ingredients",
+        OpenApiTypes.STR,
+        description="Comma separated list of ingredient IDs to filter",
+    ),
+]
+
+PAGINATION_PARAMETERS = [
+    OpenApiParameter(
+        "cursor",
+        OpenApiTypes.STR,
+        description="Opaque cursor taken from the next or prev field",
+    ),
+    OpenApiParameter(
+        "page_size",
+        OpenApiTypes.INT,
+        description="Number of results per page",
+    ),
+    OpenApiParameter(
+        "o",
+        OpenApiTypes.STR,
+        description="Field to order the results by, prefix - to reverse",
+    ),
+]
+
+
+class RecipeListAPIView(AsyncAPIView):
+    authentication_classes = [CachedJWTStatelessUserAuthentication]
     permission_classes = [IsAuthenticated]
 
     @extend_schema(
         request="",
         responses={
-            200: RecipeListSerializerOut,
+            200: RecipeListPageSerializerOut,
+            304: "",
             400: domain_model.UserNotExist,
             401: "",
         },
         methods=["GET"],
-        parameters=[
+        parameters=PAGINATION_PARAMETERS
+        + [
+            FIELDS_PARAMETER,
             OpenApiParameter(
-                "tags",
-                OpenApiTypes.STR,
-                description="Comma separated list of tag IDs to filter",
-            ),
-            OpenApiParameter(
-                "ingredients",
-                OpenApiTypes.STR,
-                description="Comma separated list of ingredient IDs to filter",
+                "stream",
+                OpenApiTypes.INT,
+                enum=[0, 1],
+                description=(
+                    "1 streams every matching recipe in one response, "
+                    "cursor and page_size are ignored"
+                ),
             ),
-        ],
+        ]
+        + RECIPE_FILTER_PARAMETERS,
     )
-    def get(self, request, *args, **kwargs):
+    async def get(self, request, *args, **kwargs):
         order_by = request.query_params.get("o", "-id")
 
         try:
-            recipes = services.retrieve_recipes(
-                user_id=request.user.id,
-                filter_obj=domain_model.UserFilterObj(
-                    model=domain_model.UserFilterModel.RECIPES,
-                    tags=request.query_params.get("tags", None),
-                    ingredients=request.query_params.get("ingredients", None),
-                ),
-                order_by=order_by,
-                repo=repository.UserRepository(),
+            filter_obj = domain_model.UserFilterObj(
+                model=domain_model.UserFilterModel.RECIPES,
+                tags=request.query_params.get("tags", None),
+                ingredients=request.query_params.get("ingredients", None),
+            )
+            pagination = domain_model.PaginationObj(
+                cursor=request.query_params.get("cursor", None),
+                page_size=request.query_params.get("page_size", None),
+            )
+            fields = domain_model.RecipeFieldsObj(
+                fields=request.query_params.get("fields", None)
             )
 
-        except domain_model.UserNotExist as exc:
-            return Response({"detail": exc.message}, status=exc.status_code)
+            if request.query_params.get("stream", None) == "1":
+                return streaming.page_response(
+                    request,
+                    await services.astream_recipes(
+                        user_id=request.user.id,
+                        filter_obj=filter_obj,
+                        order_by=order_by,
+                        fields=fields,
+                        repo=repository.UserRepository(),
+                    ),
+                    RecipeListSerializerOut,
+                    context={"request": request, "fields": fields.fields},
+                    chunk_size=settings.LIST_STREAM_CHUNK_SIZE,
+                )
+
+            async def build():
+                page = await services.aretrieve_recipes(
+                    user_id=request.user.id,
+                    filter_obj=filter_obj,
+                    order_by=order_by,
+                    pagination=pagination,
+                    fields=fields,
+                    repo=repository.UserRepository(),
+                )
+
+                return RecipeListPageSerializerOut(
+                    page,
+                    context={"request": request, "fields": fields.fields},
+                ).data
+
+            return await conditional.list_response(
+                request,
+                scope=filter_obj.model.value,
+                parts=(filter_obj, order_by, pagination, fields),
+                build=build,
+            )
 
-        return Response(
-            RecipeListSerializerOut(
-                recipes, many=True, context={"request": request}
-            ).data,
-            status=status.HTTP_200_OK,
-        )
+        except (
+            domain_model.UserNotExist,
+            domain_model.InvalidOrderingError,
+            domain_model.InvalidPaginationError,
+            domain_model.InvalidFieldsError,
+        ) as exc:
+            return Response({"detail": exc.message}, status=exc.status_code)
 
     @extend_schema(
         request=RecipeCreateSerializerIn,
@@ -90,11 +170,11 @@ class RecipeListAPIView(APIView):
         },
         methods=["POST"],
     )
-    def post(self, request, *args, **kwargs):
+    async def post(self, request, *args, **kwargs):
         serializer = RecipeCreateSerializerIn(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        recipe = services.create_recipe(
+        recipe = await services.acreate_recipe(
             title=serializer.validated_data.get("title"),
             time_minutes=serializer.validated_data.get("time_minutes"),
             price=serializer.validated_data.get("price"),
@@ -112,36 +192,198 @@ class RecipeListAPIView(APIView):
         )
 
 
-class RecipeDetailAPIView(APIView):
-    authentication_classes = [JWTStatelessUserAuthentication]
+class RecipeSearchAPIView(AsyncAPIView):
+    authentication_classes = [CachedJWTStatelessUserAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        request="",
+        responses={
+            200: RecipeListPageSerializerOut,
+            304: "",
+            400: domain_model.InvalidSearchError,
+            401: "",
+        },
+        methods=["GET"],
+        parameters=[
+            OpenApiParameter(
+                "q",
+                OpenApiTypes.STR,
+                required=True,
+                description=(
+                    "Words to find in the title or description, "
+                    'supports "quoted phrases", or and -word'
+                ),
+            ),
+            FIELDS_PARAMETER,
+        ]
+        + [
+            parameter
+            for parameter in PAGINATION_PARAMETERS
+            if parameter.name != "o"
+        ]
+        + RECIPE_FILTER_PARAMETERS,
+    )
+    async def get(self, request, *args, **kwargs):
+        # always ordered by relevance, the best match first
+        try:
+            filter_obj = domain_model.UserFilterObj(
+                model=domain_model.UserFilterModel.RECIPES,
+                tags=request.query_params.get("tags", None),
+                ingredients=request.query_params.get("ingredients", None),
+                search=request.query_params.get("q", ""),
+            )
+            pagination = domain_model.PaginationObj(
+                cursor=request.query_params.get("cursor", None),
+                page_size=request.query_params.get("page_size", None),
+            )
+            fields = domain_model.RecipeFieldsObj(
+                fields=request.query_params.get("fields", None)
+            )
+
+            async def build():
+                page = await services.asearch_recipes(
+                    user_id=request.user.id,
+                    filter_obj=filter_obj,
+                    pagination=pagination,
+                    fields=fields,
+                    repo=repository.UserRepository(),
+                )
+
+                return RecipeListPageSerializerOut(
+                    page,
+                    context={"request": request, "fields": fields.fields},
+                ).data
+
+            return await conditional.list_response(
+                request,
+                scope=filter_obj.model.value,
+                parts=(filter_obj, pagination, fields),
+                build=build,
+            )
+
+        except (
+            domain_model.UserNotExist,
+            domain_model.InvalidSearchError,
+            domain_model.InvalidPaginationError,
+            domain_model.InvalidFieldsError,
+        ) as exc:
+            return Response({"detail": exc.message}, status=exc.status_code)
+
+
+class RecipeBulkAPIView(AsyncAPIView):
+    authentication_classes = [CachedJWTStatelessUserAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        request=RecipeBulkCreateSerializerIn,
+        responses={
+            201: RecipeBulkCreateSerializerOut,
+            400: RecipeBulkCreateSerializerOut,
+            401: "",
+        },
+        methods=["POST"],
+    )
+    async def post(self, request, *args, **kwargs):
+        serializer = RecipeBulkCreateSerializerIn(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        items = [
+            RecipeCreateSerializerIn(data=item)
+            for item in serializer.validated_data.get("recipes")
+        ]
+        results = [
+            {
+                "index": index,
+                "recipe": None,
+                "errors": None if item.is_valid() else item.errors,
+            }
+            for index, item in enumerate(items)
+        ]
+        valid = [
+            (result, item)
+            for result, item in zip(results, items)
+            if result["errors"] is None
+        ]
+
+        # atomic: the client wants all recipes created or none of them
+        if len(valid) != len(items) and serializer.validated_data.get(
+            "atomic"
+        ):
+            return Response(
+                RecipeBulkCreateSerializerOut({"results": results}).data,
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        recipes = await services.acreate_recipes(
+            recipes=[item.validated_data for _, item in valid],
+            user_id=request.user.id,
+            repo=repository.RecipeRepository(),
+        )
+
+        for (result, _), recipe in zip(valid, recipes):
+            result["recipe"] = recipe
+
+        return Response(
+            RecipeBulkCreateSerializerOut({"results": results}).data,
+            status=(
+                status.HTTP_201_CREATED
+                if recipes
+                else status.HTTP_400_BAD_REQUEST
+            ),
+        )
+
+
+class RecipeDetailAPIView(AsyncAPIView):
+    authentication_classes = [CachedJWTStatelessUserAuthentication]
     permission_classes = [IsAuthenticated]
 
     @extend_schema(
         request="",
         responses={
             200: RecipeDetailSerializerOut,
+            304: "",
             400: domain_model.RecipeNotExist,
             401: "",
         },
         methods=["GET"],
+        parameters=[FIELDS_PARAMETER],
     )
-    def get(self, request, *args, **kwargs):
+    async def get(self, request, *args, **kwargs):
         id = kwargs.get("recipe_id", None)
 
         try:
-            recipe = services.retrieve_recipe(
+            version = await services.aretrieve_recipe_version(
                 id=id,
                 repo=repository.RecipeRepository(),
             )
+            etag = conditional.make_etag(request, *version)
+
+            if conditional.is_not_modified(request, etag):
+                return conditional.not_modified_response(etag)
 
-        except domain_model.RecipeNotExist as exc:
+            fields = domain_model.RecipeFieldsObj(
+                fields=request.query_params.get("fields", None)
+            )
+
+            recipe = await services.aretrieve_recipe(
+                id=id,
+                fields=fields,
+                repo=repository.RecipeRepository(),
+            )
+
+        except (
+            domain_model.RecipeNotExist,
+            domain_model.InvalidFieldsError,
+        ) as exc:
             return Response({"detail": exc.message}, status=exc.status_code)
 
         return Response(
             RecipeDetailSerializerOut(
-                recipe, context={"request": request}
+                recipe, context={"request": request, "fields": fields.fields}
             ).data,
             status=status.HTTP_200_OK,
+            headers={"ETag": etag},
         )
 
     @extend_schema(
@@ -154,14 +396,14 @@ class RecipeDetailAPIView(APIView):
         },
         methods=["PATCH"],
     )
-    def patch(self, request, *args, **kwargs):
+    async def patch(self, request, *args, **kwargs):
         id = kwargs.get("recipe_id", None)
 
         serializer = RecipeDetailPatchSerializerIn(data=request.data)
         serializer.is_valid(raise_exception=True)
 
         try:
-            recipe = services.update_recipe(
+            recipe = await services.aupdate_recipe(
                 id=id,
                 update_fields={
                     "title": serializer.validated_data.get("title"),
@@ -203,11 +445,11 @@ class RecipeDetailAPIView(APIView):
         },
         methods=["DELETE"],
     )
-    def delete(self, request, *args, **kwargs):
+    async def delete(self, request, *args, **kwargs):
         id = kwargs.get("recipe_id", None)
 
         try:
-            services.delete_recipe(
+            await services.adelete_recipe(
                 id=id,
                 user_id=request.user.id,
                 repo=repository.RecipeRepository(),
@@ -222,8 +464,8 @@ class RecipeDetailAPIView(APIView):
         return Response("OK", status=status.HTTP_204_NO_CONTENT)
 
 
-class RecipeUploadImageAPIView(APIView):
-    authentication_classes = [JWTStatelessUserAuthentication]
+class RecipeUploadImageAPIView(AsyncAPIView):
+    authentication_classes = [CachedJWTStatelessUserAuthentication]
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser]
 
@@ -237,14 +479,14 @@ class RecipeUploadImageAPIView(APIView):
         },
         methods=["PATCH"],
     )
-    def patch(self, request, *args, **kwargs):
+    async def patch(self, request, *args, **kwargs):
         id = kwargs.get("recipe_id", None)
 
         serializer = RecipeUploadImageSerializerIn(data=request.FILES)
         serializer.is_valid(raise_exception=True)
 
         try:
-            recipe = services.update_recipe_image(
+            recipe = await services.aupdate_recipe_image(
                 id=id,
                 image_object=domain_model.RecipeImage(
                     image=serializer.validated_data.get("image")
@@ -267,19 +509,21 @@ class RecipeUploadImageAPIView(APIView):
         )
 
 
-class TagsListAPIView(APIView):
-    authentication_classes = [JWTStatelessUserAuthentication]
+class TagsListAPIView(AsyncAPIView):
+    authentication_classes = [CachedJWTStatelessUserAuthentication]
     permission_classes = [IsAuthenticated]
 
     @extend_schema(
         request="",
         responses={
-            200: TagListSerializerOut,
+            200: TagListPageSerializerOut,
+            304: "",
             400: domain_model.UserNotExist,
             401: "",
         },
         methods=["GET"],
-        parameters=[
+        parameters=PAGINATION_PARAMETERS
+        + [
             OpenApiParameter(
                 "assigned_only",
                 OpenApiTypes.INT,
@@ -288,33 +532,49 @@ class TagsListAPIView(APIView):
             ),
         ],
     )
-    def get(self, request, *args, **kwargs):
+    async def get(self, request, *args, **kwargs):
         order_by = request.query_params.get("o", "-name")
 
         try:
-            tags = services.retrieve_tags(
-                user_id=request.user.id,
-                filter_obj=domain_model.UserAssignedObj(
-                    model=domain_model.UserFilterModel.TAGS,
-                    tags=request.query_params.get("tags", None),
-                    assigned_only=bool(
-                        int(request.query_params.get("assigned_only", 0))
-                    ),
+            filter_obj = domain_model.UserAssignedObj(
+                model=domain_model.UserFilterModel.TAGS,
+                tags=request.query_params.get("tags", None),
+                assigned_only=bool(
+                    int(request.query_params.get("assigned_only", 0))
                 ),
-                order_by=order_by,
-                repo=repository.UserRepository(),
+            )
+            pagination = domain_model.PaginationObj(
+                cursor=request.query_params.get("cursor", None),
+                page_size=request.query_params.get("page_size", None),
             )
 
-        except domain_model.UserNotExist as exc:
-            return Response({"detail": exc.message}, status=exc.status_code)
+            async def build():
+                page = await services.aretrieve_tags(
+                    user_id=request.user.id,
+                    filter_obj=filter_obj,
+                    order_by=order_by,
+                    pagination=pagination,
+                    repo=repository.UserRepository(),
+                )
+
+                return TagListPageSerializerOut(page).data
+
+            return await conditional.list_response(
+                request,
+                scope=filter_obj.model.value,
+                parts=(filter_obj, order_by, pagination),
+                build=build,
+            )
 
-        return Response(
-            TagListSerializerOut(tags, many=True).data,
-            status=status.HTTP_200_OK,
-        )
+        except (
+            domain_model.UserNotExist,
+            domain_model.InvalidOrderingError,
+            domain_model.InvalidPaginationError,
+        ) as exc:
+            return Response({"detail": exc.message}, status=exc.status_code)
 
 
-class TagDetailAPIView(APIView):
+class TagDetailAPIView(AsyncAPIView):
     @extend_schema(
         request=TagDetailPatchSerializerIn,
         responses={
@@ -325,14 +585,14 @@ class TagDetailAPIView(APIView):
         },
         methods=["PATCH"],
     )
-    def patch(self, request, *args, **kwargs):
+    async def patch(self, request, *args, **kwargs):
         id = kwargs.get("tag_id", None)
 
         serializer = TagDetailPatchSerializerIn(data=request.data)
         serializer.is_valid(raise_exception=True)
 
         try:
-            tag = services.update_tag(
+            tag = await services.aupdate_tag(
                 id=id,
                 update_fields={
                     "name": serializer.validated_data.get("name"),
@@ -344,6 +604,7 @@ class TagDetailAPIView(APIView):
         except (
             domain_model.TagNotExist,
             domain_model.TagNotOwnerError,
+            domain_model.TagAlreadyExist,
         ) as exc:
             return Response({"detail": exc.message}, status=exc.status_code)
 
@@ -362,11 +623,11 @@ class TagDetailAPIView(APIView):
         },
         methods=["DELETE"],
     )
-    def delete(self, request, *args, **kwargs):
+    async def delete(self, request, *args, **kwargs):
         id = kwargs.get("tag_id", None)
 
         try:
-            services.delete_tag(
+            await services.adelete_tag(
                 id=id,
                 user_id=request.user.id,
                 repo=repository.TagRepository(),
@@ -381,19 +642,21 @@ class TagDetailAPIView(APIView):
         return Response("OK", status=status.HTTP_204_NO_CONTENT)
 
 
-class IngredientListAPIView(APIView):
-    authentication_classes = [JWTStatelessUserAuthentication]
+class IngredientListAPIView(AsyncAPIView):
+    authentication_classes = [CachedJWTStatelessUserAuthentication]
     permission_classes = [IsAuthenticated]
 
     @extend_schema(
         request="",
         responses={
-            200: IngredientListSerializerOut,
+            200: IngredientListPageSerializerOut,
+            304: "",
             400: domain_model.UserNotExist,
             401: "",
         },
         methods=["GET"],
-        parameters=[
+        parameters=PAGINATION_PARAMETERS
+        + [
             OpenApiParameter(
                 "assigned_only",
                 OpenApiTypes.INT,
@@ -402,33 +665,49 @@ class IngredientListAPIView(APIView):
             ),
         ],
     )
-    def get(self, request, *args, **kwargs):
+    async def get(self, request, *args, **kwargs):
         order_by = request.query_params.get("o", "-name")
 
         try:
-            ingredients = services.retrieve_ingredients(
-                user_id=request.user.id,
-                filter_obj=domain_model.UserAssignedObj(
-                    model=domain_model.UserFilterModel.INGREDIENTS,
-                    ingredients=request.query_params.get("ingredients", None),
-                    assigned_only=bool(
-                        int(request.query_params.get("assigned_only", 0))
-                    ),
+            filter_obj = domain_model.UserAssignedObj(
+                model=domain_model.UserFilterModel.INGREDIENTS,
+                ingredients=request.query_params.get("ingredients", None),
+                assigned_only=bool(
+                    int(request.query_params.get("assigned_only", 0))
                 ),
-                order_by=order_by,
-                repo=repository.UserRepository(),
+            )
+            pagination = domain_model.PaginationObj(
+                cursor=request.query_params.get("cursor", None),
+                page_size=request.query_params.get("page_size", None),
             )
 
-        except domain_model.UserNotExist as exc:
-            return Response({"detail": exc.message}, status=exc.status_code)
+            async def build():
+                page = await services.aretrieve_ingredients(
+                    user_id=request.user.id,
+                    filter_obj=filter_obj,
+                    order_by=order_by,
+                    pagination=pagination,
+                    repo=repository.UserRepository(),
+                )
+
+                return IngredientListPageSerializerOut(page).data
+
+            return await conditional.list_response(
+                request,
+                scope=filter_obj.model.value,
+                parts=(filter_obj, order_by, pagination),
+                build=build,
+            )
 
-        return Response(
-            IngredientListSerializerOut(ingredients, many=True).data,
-            status=status.HTTP_200_OK,
-        )
+        except (
+            domain_model.UserNotExist,
+            domain_model.InvalidOrderingError,
+            domain_model.InvalidPaginationError,
+        ) as exc:
+            return Response({"detail": exc.message}, status=exc.status_code)
 
 
-class IngredientDetailAPIView(APIView):
+class IngredientDetailAPIView(AsyncAPIView):
 
     @extend_schema(
         request=IngredientDetailPatchSerializerIn,
@@ -440,14 +719,14 @@ class IngredientDetailAPIView(APIView):
         },
         methods=["PATCH"],
     )
-    def patch(self, request, *args, **kwargs):
+    async def patch(self, request, *args, **kwargs):
         id = kwargs.get("ingredient_id", None)
 
         serializer = IngredientDetailPatchSerializerIn(data=request.data)
         serializer.is_valid(raise_exception=True)
 
         try:
-            ingredient = services.update_ingredient(
+            ingredient = await services.aupdate_ingredient(
                 id=id,
                 update_fields={
                     "name": serializer.validated_data.get("name"),
@@ -459,6 +738,7 @@ class IngredientDetailAPIView(APIView):
         except (
             domain_model.IngredientNotExist,
             domain_model.IngredientNotOwnerError,
+            domain_model.IngredientAlreadyExist,
         ) as exc:
             return Response({"detail": exc.message}, status=exc.status_code)
 
@@ -477,11 +757,11 @@ class IngredientDetailAPIView(APIView):
         },
         methods=["DELETE"],
     )
-    def delete(self, request, *args, **kwargs):
+    async def delete(self, request, *args, **kwargs):
         id = kwargs.get("ingredient_id", None)
 
         try:
-            services.delete_ingredient(
+            await services.adelete_ingredient(
                 id=id,
                 user_id=request.user.id,
                 repo=repository.IngredientRepository(),
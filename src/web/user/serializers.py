@@ -1,8 +1,5 @@
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
-from rest_framework_simplejwt.authentication import (
-    JWTStatelessUserAuthentication,
-)
 from rest_framework_simplejwt.exceptions import (
     InvalidToken,
 )
@@ -39,16 +36,14 @@ class ManageUserGetSerializerIn(serializers.Serializer):
     invalid_token_msg = "Token contained no recognizable user identification"
 
     def validate(self, attrs):
-        request = self.context.get("request")
-
-        jwt_authenticator = JWTStatelessUserAuthentication()
-        result = jwt_authenticator.authenticate(request)
+        # the token the view authenticated the request with, not verified
+        # a second time
+        token = getattr(self.context.get("request"), "auth", None)
 
-        if result is None:
+        if token is None:
             raise InvalidToken(_(self.invalid_token_msg))
 
-        token_user, payload = result
-        attrs["user_id"] = payload["user_id"]
+        attrs["user_id"] = token["user_id"]
         return attrs
 
 
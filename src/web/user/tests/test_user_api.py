@@ -1,11 +1,16 @@
+import time
+from unittest.mock import patch
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from recipe_menu.domain import model as domain_model
-from recipe_menu.adapters import repository
+from recipe_menu.adapters import repository, user_cache
 
 
 CREATE_USER_URL = reverse("user:create")
@@ -187,3 +192,99 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(self.user.name, self.update_name)
         self.assertTrue(self.user.check_password(self.update_password))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_update_name_keeps_password(self):
+        self.client.patch(ME_URL, {"name": self.update_name}, **self.headers)
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password(self.password))
+
+
+class UserProfileCacheTests(TestCase):
+
+    def setUp(self):
+        user_cache.profiles.clear()
+        self.addCleanup(user_cache.profiles.clear)
+
+        self.repo = repository.UserRepository()
+        self.user = create_user(
+            email="test@example.com",
+            name="test",
+            password="Aa1234567",
+            repo=self.repo,
+        )
+
+        res = APIClient().post(
+            TOKEN_URL, {"email": "test@example.com", "password": "Aa1234567"}
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {res.data['access_token']}"
+        )
+
+    def test_profile_served_from_memory(self):
+        self.client.get(ME_URL)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data["name"], "test")
+        self.assertEqual(len(queries), 0)
+
+    def test_update_invalidates_profile(self):
+        self.client.get(ME_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(ME_URL, {"name": "renamed"})
+
+        self.assertEqual(self.client.get(ME_URL).data["name"], "renamed")
+
+    def test_register_stores_profile(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(
+                CREATE_USER_URL,
+                {
+                    "email": "new@example.com",
+                    "name": "new",
+                    "password": "Aa1234567",
+                },
+            )
+
+        self.assertEqual(
+            user_cache.profiles.get({"email": "new@example.com"}),
+            user_cache.Profile(res.data["id"], "new@example.com", "new"),
+        )
+
+    def test_profile_expires(self):
+        profiles = user_cache.ProfileCache(maxsize=2, timeout=10)
+        profile = user_cache.Profile(self.user.id, "test@example.com", "test")
+        profiles.set(profile)
+
+        self.assertEqual(profiles.get({"id": self.user.id}), profile)
+        self.assertEqual(profiles.get({"email": "test@example.com"}), profile)
+
+        with patch("time.monotonic", return_value=time.monotonic() + 10):
+            self.assertIsNone(profiles.get({"id": self.user.id}))
+
+        self.assertIsNone(profiles.get({"email": "test@example.com"}))
+
+    def test_least_recently_used_evicted(self):
+        profiles = user_cache.ProfileCache(maxsize=2, timeout=10)
+
+        for id in range(3):
+            profiles.set(user_cache.Profile(id, f"{id}@example.com", ""))
+
+        self.assertIsNone(profiles.get({"id": 0}))
+        self.assertIsNone(profiles.get({"email": "0@example.com"}))
+        self.assertEqual(profiles.get({"id": 2}).email, "2@example.com")
+
+    def test_login_bypasses_cache(self):
+        user_cache.profiles.set(
+            user_cache.Profile(self.user.id, "test@example.com", "stale")
+        )
+
+        res = APIClient().post(
+            TOKEN_URL, {"email": "test@example.com", "password": "Aa1234567"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -1,11 +1,7 @@
 from drf_spectacular.utils import extend_schema
 from rest_framework import status
-from rest_framework.decorators import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.authentication import (
-    JWTStatelessUserAuthentication,
-)
 
 from .serializers import (
     UserSerializerIn,
@@ -16,12 +12,14 @@ from .serializers import (
     ManageUserGetSerializerOut,
     ManageUserPatchSerializerIn,
 )
+from core.authentication import CachedJWTStatelessUserAuthentication
+from core.views import AsyncAPIView
 from recipe_menu import service_layer as services
 from recipe_menu.adapters import repository
 from recipe_menu.domain import model as domain_model
 
 
-class RegisterAPIView(APIView):
+class RegisterAPIView(AsyncAPIView):
 
     authentication_classes = []
 
@@ -33,12 +31,12 @@ class RegisterAPIView(APIView):
         },
         methods=["POST"],
     )
-    def post(self, request, *args, **kwargs):
+    async def post(self, request, *args, **kwargs):
         serializer = UserSerializerIn(data=request.data)
         serializer.is_valid(raise_exception=True)
 
         try:
-            instance = services.register(
+            instance = await services.aregister(
                 email=serializer.data["email"],
                 name=serializer.data["name"],
                 password=serializer.data["password"],
@@ -53,7 +51,7 @@ class RegisterAPIView(APIView):
         )
 
 
-class LoginAPIView(APIView):
+class LoginAPIView(AsyncAPIView):
 
     authentication_classes = []
 
@@ -64,12 +62,12 @@ class LoginAPIView(APIView):
         },
         methods=["POST"],
     )
-    def post(self, request, *args, **kwargs):
+    async def post(self, request, *args, **kwargs):
         serializer = LoginSerializerIn(data=request.data)
         serializer.is_valid(raise_exception=True)
 
         try:
-            credentials = services.login(
+            credentials = await services.alogin(
                 email=serializer.data["email"],
                 password=serializer.data["password"],
                 repo=repository.UserRepository(),
@@ -87,9 +85,9 @@ class LoginAPIView(APIView):
         )
 
 
-class ManageUserAPIView(APIView):
+class ManageUserAPIView(AsyncAPIView):
 
-    authentication_classes = [JWTStatelessUserAuthentication]
+    authentication_classes = [CachedJWTStatelessUserAuthentication]
     permission_classes = [IsAuthenticated]
 
     @extend_schema(
@@ -100,14 +98,14 @@ class ManageUserAPIView(APIView):
         },
         methods=["GET"],
     )
-    def get(self, request, *args, **kwargs):
+    async def get(self, request, *args, **kwargs):
         serializer = ManageUserGetSerializerIn(
             data=request.data, context={"request": request}
         )
         serializer.is_valid(raise_exception=True)
 
         try:
-            user = services.retrieve_user(
+            user = await services.aretrieve_user(
                 id=request.user.id,
                 repo=repository.UserRepository(),
             )
@@ -127,11 +125,11 @@ class ManageUserAPIView(APIView):
         },
         methods=["PATCH"],
     )
-    def patch(self, request, *args, **kwargs):
+    async def patch(self, request, *args, **kwargs):
         serializer = ManageUserPatchSerializerIn(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        services.update_user(
+        await services.aupdate_user(
             id=request.user.id,
             update_fields={
                 "name": serializer.validated_data.get("name"),